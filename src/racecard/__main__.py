@@ -22,6 +22,7 @@ import sys
 
 import click
 
+from . import bench
 from .app import simplecli
 
 
@@ -37,6 +38,68 @@ def cli(context):
     simplecli.main()
 
 
+@cli.command("bench")
+@click.argument("names", nargs=-1)
+@click.option(
+    "-o", "--output", type=click.Path(dir_okay=False), help="Save results to a file."
+)
+@click.option(
+    "-b",
+    "--baseline",
+    type=click.Path(exists=True, dir_okay=False),
+    help="Compare results to those saved in a file.",
+)
+@click.option(
+    "--threshold",
+    default=bench.runner.DEFAULT_THRESHOLD,
+    show_default=True,
+    help="Fraction by which a benchmark must get worse to count as a regression.",
+)
+@click.option(
+    "--min-time",
+    default=bench.runner.DEFAULT_MIN_TIME,
+    show_default=True,
+    help="Seconds that each timed run should take at least.",
+)
+@click.option(
+    "--repeat",
+    default=bench.runner.DEFAULT_REPEAT,
+    show_default=True,
+    help="Number of timed runs of each benchmark.",
+)
+def run_bench(names, output, baseline, threshold, min_time, repeat):
+    """Runs the core engine benchmarks.
+
+    NAMES limits the benchmarks run to those whose names start with any of them.
+    Exits with status 1 if there are regressions from the baseline.
+    """
+    if names:
+        names = [name for name in bench.BENCHMARKS if name.startswith(names)]
+        if not names:
+            raise click.BadParameter("No benchmarks match.", param_hint="NAMES")
+    base = bench.load(baseline) if baseline else {}
+    results = []
+    for result in bench.run(names or None, min_time, repeat):
+        results.append(result)
+        line = f"{result.name:<28}{result.ops_per_sec:>14,.1f} ops/s"
+        line += f"{result.peak_bytes:>10,} B peak"
+        if result.name in base:
+            change = result.ops_per_sec / base[result.name].ops_per_sec - 1
+            line += f"{change:>+10.1%}"
+        click.echo(line)
+    if output:
+        bench.save(results, output)
+    changes = bench.compare(results, base, threshold)
+    for change in changes:
+        click.echo(
+            f"Regression: {change.name} {change.metric} was {change.baseline:,.1f},"
+            f" now {change.current:,.1f}",
+            err=True,
+        )
+    if changes:
+        sys.exit(1)
+
+
 try:
     # If REST server can be imported, assume all other dependencies are also installed.
     from flask import cli as flaskcli
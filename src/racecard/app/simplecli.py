@@ -24,7 +24,7 @@ import typing
 import uuid
 
 from .. import core
-from ..core import exceptions
+from ..core import bots, deck, exceptions
 
 
 class QuitException(exceptions.ExceptionBase):
@@ -41,6 +41,8 @@ class Move:
 
 game = core.Game()  # pylint: disable=invalid-name
 player_names: typing.Dict[uuid.UUID, str] = {}  # pylint: disable=invalid-name
+# Policies of the computer players, by player id.
+bot_policies: typing.Dict[uuid.UUID, bots.Policy] = {}  # pylint: disable=invalid-name
 
 
 def get_num_players():
@@ -56,6 +58,20 @@ def get_num_players():
     return num_players
 
 
+def get_num_bots(num_players):
+    """Asks user how many of the players are computer players and returns result."""
+    num_bots = -1
+    while not 0 <= num_bots < num_players:
+        try:
+            prompt = f"\nHow Many Computer Players? [0-{num_players-1}] "
+            num_bots = int(input(prompt).strip())  # nosec
+            if not 0 <= num_bots < num_players:
+                raise ValueError
+        except ValueError:
+            print("Invalid choice, try again.")
+    return num_bots
+
+
 def get_player_names(num_players):
     """Asks user for the name of each player and returns results as a list."""
     names = []
@@ -187,6 +203,10 @@ def handle_coup_fourre(target_id):
         # we actually need it.  But in this case we know it is the current player since
         # there are only 2 players.
         target_id = game.current_player_id
+    if target_id in bot_policies:
+        if bots.offer_coup_fourre(game, target_id, bot_policies) is not None:
+            print(f"\nCOUP FOURRÉ by {player_names[target_id]}!")
+        return
     state = game.get_player_state(target_id)
     print_player_state(state)
     print(f"\nATTENTION {player_names[target_id]}!")
@@ -239,6 +259,39 @@ def get_target_id(move):
         return None
 
 
+def describe_move(player_id, move, cards):
+    """Returns a description of a move, i.e. by a computer player.
+
+    cards are the player's card kinds from before the move.  See Game.get_cards().
+    """
+    name = player_names[player_id]
+    if move.action is core.Actions.DRAW:
+        return f"{name} draws a card."
+    if move.action is core.Actions.DRAW_DISCARD:
+        return f"{name} draws from the discard pile."
+    if move.action is core.Actions.EXTENSION:
+        return f"{name} calls an Extension!"
+    if move.action is core.Actions.NO_EXTENSION:
+        return f"{name} does not call an Extension."
+    card = deck.NAMES[cards[move.card_index]]
+    if move.action is core.Actions.DISCARD:
+        return f"{name} discards [{card}]."
+    if move.target_id is not None:
+        return f"{name} plays [{card}] on {player_names[move.target_id]}."
+    return f"{name} plays [{card}]."
+
+
+def play_bot_turn(player_id):
+    """Plays a computer player's turn and prints what it did."""
+    cards = bytes(game.get_cards(player_id))
+    move, result = bots.play_turn(game, bot_policies)
+    print(f"\n{describe_move(player_id, move, cards)}")
+    if result is core.PlayResults.CAN_COUP_FOURRE:
+        # Computer players were already offered it by play_turn().
+        if move.target_id not in bot_policies:
+            handle_coup_fourre(move.target_id)
+
+
 def play_round():
     """Plays one round by presenting state, asking for input and sending the play."""
     # Note: User input in 1-based not 0-based.
@@ -250,6 +303,10 @@ def play_round():
         print("Last Discarded:", get_last_discarded())
         print_player_states()
         player_id = game.current_player_id
+        if player_id in bot_policies:
+            play_bot_turn(player_id)
+            print("-" * 10)
+            continue
         move = get_player_move(player_id)
         if move.action == "q":
             raise QuitException()
@@ -321,10 +378,15 @@ conditions.  See the LICENCE file for details.
     print("Race Card!  Lets Race!")
     try:
         num_players = get_num_players()
-        names = get_player_names(num_players)
+        num_bots = get_num_bots(num_players)
+        names = get_player_names(num_players - num_bots)
         for name in names:
             id_ = game.add_player()
             player_names[id_] = name
+        for i in range(num_bots):
+            id_ = game.add_player()
+            player_names[id_] = f"Computer {i+1}"
+            bot_policies[id_] = bots.heuristic_policy
         print("\nBegin!")
         game.begin()
         next_hand = True
@@ -0,0 +1,24 @@
+#    Race Card - An implementation of the card game Mille Bornes
+#    Copyright (C) 2020  Krys Lawrence <krys AT krys DOT ca>
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU Affero General Public License as published
+#    by the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU Affero General Public License for more details.
+#
+#    You should have received a copy of the GNU Affero General Public License
+#    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+"""Benchmarks of the core engine, to catch performance regressions.
+
+Run them with "racecard bench".
+"""
+
+from . import cases  # noqa: F401  # Registers the benchmarks.
+from .runner import BENCHMARKS, Change, Result, compare, load, run, save  # noqa: F401
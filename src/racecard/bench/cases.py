@@ -0,0 +1,344 @@
+#    Race Card - An implementation of the card game Mille Bornes
+#    Copyright (C) 2020  Krys Lawrence <krys AT krys DOT ca>
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU Affero General Public License as published
+#    by the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU Affero General Public License for more details.
+#
+#    You should have received a copy of the GNU Affero General Public License
+#    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+"""The core engine benchmarks.
+
+Every benchmark is seeded, so each run does exactly the same work.  Setup functions
+build whatever each operation needs up front, usually by cloning a prepared player or
+hand, so that only the operation itself is timed.
+"""
+
+
+import functools
+import itertools
+import random
+
+from ..core import bots, deck, game, hand, player, simulation
+from ..core.hand import Actions
+from .runner import benchmark
+
+SEED = "racecard-bench"
+_NUM_POSITIONS = 1000  # Number of different hand positions to play cards from.
+_MOVES_INTO_HAND = 30  # Moves made in the current hand of games that are cloned.
+
+# Helpers
+
+
+def _repeat(func, loops):
+    """Returns a function that calls func loops times."""
+
+    def run():
+        for _ in itertools.repeat(None, loops):
+            func()
+
+    return run
+
+
+def _each(func, items):
+    """Returns a function that calls func on each of items."""
+
+    def run():
+        for item in items:
+            func(item)
+
+    return run
+
+
+def _clones(template, loops):
+    """Returns a list of loops clones of template."""
+    return [template.clone() for _ in range(loops)]
+
+
+def _rolling_player(cards):
+    """Returns a new player that has played a Roll and holds the given card kinds."""
+    player_ = player.Player()
+    player_.replace_hand([deck.ROLL, *cards])
+    player_.play_remedy(player_.hand.find(deck.ROLL))
+    return player_
+
+
+@functools.lru_cache(maxsize=None)
+def _play_positions():
+    """Returns (hand, player id, Move) for the first card plays of random hands.
+
+    Each move is a legal PLAY in its hand, which must be cloned before playing it.
+    """
+    rng = random.Random(SEED)
+    positions = []
+    while len(positions) < _NUM_POSITIONS:
+        hand_ = hand.Hand(["a", "b", "c"], rng)
+        pending_id = None
+        while not hand_.is_completed and len(positions) < _NUM_POSITIONS:
+            player_id, moves = hand.next_decision(hand_, pending_id)
+            plays = [move for move in moves if move and move.action is Actions.PLAY]
+            if plays:
+                positions.append((hand_.clone(), player_id, rng.choice(plays)))
+            move = rng.choice(plays or moves)
+            pending_id = hand.apply_move(hand_, player_id, move)
+    return positions
+
+
+@functools.lru_cache(maxsize=None)
+def _card_decisions():
+    """Returns (game, player id, moves) for the card plays or discards of games.
+
+    Games are played by heuristic policies.  Policies only read the game, so each
+    position can be decided on any number of times.
+    """
+    positions = []
+    for index in itertools.count():
+        game_ = game.Game(f"{SEED}:{index}")
+        player_ids = [game_.add_player() for _ in range(3)]
+        policies = dict.fromkeys(player_ids, bots.heuristic_policy)
+        game_.begin()
+        while len(positions) < _NUM_POSITIONS:
+            if game_.is_hand_completed:
+                if game_.is_completed:
+                    break
+                game_.next_hand()
+                continue
+            player_id = game_.current_player_id
+            moves = game_.legal_moves(player_id)
+            if moves[-1].action is Actions.DISCARD:
+                positions.append((game_.clone(), player_id, moves))
+            bots.play_turn(game_, policies)
+        else:
+            return positions
+
+
+def _random_move(game_):
+    """Makes a move for the current player of game_ with the random policy."""
+    player_id = game_.current_player_id
+    moves = game_.legal_moves(player_id)
+    game_.make_move(player_id, simulation.random_policy(game_, player_id, moves))
+
+
+def _new_game(num_players):
+    """Returns a new, begun game."""
+    game_ = game.Game(SEED)
+    for _ in range(num_players):
+        game_.add_player()
+    game_.begin()
+    return game_
+
+
+@functools.lru_cache(maxsize=None)
+def _completed_game():
+    """Returns a complete game played by random policies."""
+    game_ = _new_game(3)
+    while True:
+        while not game_.is_hand_completed:
+            _random_move(game_)
+        if game_.is_completed:
+            return game_
+        game_.next_hand()
+
+
+@functools.lru_cache(maxsize=None)
+def _game_in_hand(hand_number):
+    """Returns a game part way into the given hand, played by random policies.
+
+    The earlier hands are completed, so the game holds all of their summaries.
+    """
+    game_ = _new_game(3)
+    while game_.hand_number < hand_number:
+        while not game_.is_hand_completed:
+            _random_move(game_)
+        game_.next_hand()
+    for _ in range(_MOVES_INTO_HAND):
+        _random_move(game_)
+    return game_
+
+
+# Benchmarks
+
+
+@benchmark("deck.make_deck")
+def make_deck(loops):
+    """Shuffles a new deck."""
+    rng = random.Random(SEED)
+    return _repeat(lambda: deck.make_deck(rng=rng), loops)
+
+
+@benchmark("hand.deal")
+def deal(loops):
+    """Deals a new 4 player hand, including shuffling its deck."""
+    rng = random.Random(SEED)
+    return _repeat(lambda: hand.Hand(["a", "b", "c", "d"], rng), loops)
+
+
+@benchmark("hand.play")
+def hand_play(loops):
+    """Plays a card through Hand.play(), with its rule checks."""
+    positions = list(itertools.islice(itertools.cycle(_play_positions()), loops))
+    positions = [
+        (hand_.clone(), player_id, move) for hand_, player_id, move in positions
+    ]
+
+    def play(position):
+        hand_, player_id, move = position
+        hand_.play(player_id, move.card_index, move.target_id)
+
+    return _each(play, positions)
+
+
+@benchmark("player.play_distance")
+def play_distance(loops):
+    """Plays a distance card."""
+    players = _clones(_rolling_player([deck.D100]), loops)
+    return _each(lambda player_: player_.play_distance(0, 1000), players)
+
+
+@benchmark("player.play_remedy")
+def play_remedy(loops):
+    """Plays a remedy to a hazard."""
+    template = _rolling_player([deck.SPARE_TIRE])
+    template.recieve_hazard(deck.FLAT_TIRE)
+    players = _clones(template, loops)
+    return _each(lambda player_: player_.play_remedy(0), players)
+
+
+@benchmark("player.play_safety")
+def play_safety(loops):
+    """Plays a safety that also clears a hazard."""
+    template = player.Player()
+    template.replace_hand([deck.RIGHT_OF_WAY])
+    template.recieve_hazard(deck.SPEED_LIMIT)
+    players = _clones(template, loops)
+    return _each(lambda player_: player_.play_safety(0), players)
+
+
+@benchmark("player.play_hazard")
+def play_hazard(loops):
+    """Plays a hazard from one player on another."""
+    attacker = player.Player()
+    attacker.replace_hand([deck.ACCIDENT])
+    pairs = list(zip(_clones(attacker, loops), _clones(_rolling_player([]), loops)))
+
+    def attack(pair):
+        attacker, target = pair
+        target.recieve_hazard(attacker.play_hazard(0))
+
+    return _each(attack, pairs)
+
+
+@benchmark("player.get_state")
+def get_state(loops):
+    """Takes a new snapshot of a player's state."""
+    template = _rolling_player([deck.D25, deck.D50, deck.D75, deck.D100, deck.D200])
+    for _ in range(3):
+        template.play_distance(0, 1000)
+    players = _clones(template, loops)
+    return _each(player.Player.get_state, players)
+
+
+@benchmark("player.get_state.cached")
+def get_state_cached(loops):
+    """Returns the snapshot of an unchanged player's state."""
+    player_ = _rolling_player([deck.D25, deck.D50, deck.D75])
+    player_.get_state()
+    return _repeat(player_.get_state, loops)
+
+
+@benchmark("player.calc_score")
+def calc_score(loops):
+    """Scores a player that won the hand."""
+    template = _rolling_player([deck.DRIVING_ACE, deck.D200, deck.D100, deck.D100])
+    template.play_safety(0)
+    for _ in range(3):
+        template.play_distance(0, 400)
+    players = _clones(template, loops)
+    return _each(lambda player_: player_.calc_score(True, False, True), players)
+
+
+@benchmark("game.get_game_scores")
+def get_game_scores(loops):
+    """Returns the score cards of a complete game."""
+    game_ = _completed_game()
+    return _repeat(game_.get_game_scores, loops)
+
+
+@benchmark("game.clone_hand")
+def clone_hand(loops):
+    """Clones the live hand of a game."""
+    return _repeat(_game_in_hand(1).clone_hand, loops)
+
+
+@benchmark("game.clone.hand_1")
+def clone_game_hand_1(loops):
+    """Clones a game during its first hand."""
+    return _repeat(_game_in_hand(1).clone, loops)
+
+
+@benchmark("game.clone.hand_6")
+def clone_game_hand_6(loops):
+    """Clones a game during its sixth hand.  It should cost about the same as hand 1."""
+    return _repeat(_game_in_hand(6).clone, loops)
+
+
+def _live_games(num_players, loops):
+    """Returns a function that begins loops new games and keeps them all alive.
+
+    The retained and peak memory of one operation is then the size of a live game.
+    """
+    games = []
+    return _repeat(lambda: games.append(_new_game(num_players)), loops)
+
+
+@benchmark("game.live_2p")
+def live_games_2p(loops):
+    """Begins a 2 player game and keeps it."""
+    return _live_games(2, loops)
+
+
+@benchmark("game.live_4p")
+def live_games_4p(loops):
+    """Begins a 4 player game and keeps it."""
+    return _live_games(4, loops)
+
+
+@benchmark("game.live_6p")
+def live_games_6p(loops):
+    """Begins a 6 player game and keeps it."""
+    return _live_games(6, loops)
+
+
+def _random_games(num_players, loops):
+    """Returns a function that plays loops complete games with random policies."""
+    policies = [simulation.random_policy] * num_players
+    return _each(
+        lambda index: simulation.play_game(index, policies, SEED), range(loops)
+    )
+
+
+@benchmark("game.random_2p")
+def random_games_2p(loops):
+    """Plays a complete 2 player game with random policies."""
+    return _random_games(2, loops)
+
+
+@benchmark("game.random_4p")
+def random_games_4p(loops):
+    """Plays a complete 4 player game with random policies."""
+    return _random_games(4, loops)
+
+
+@benchmark("bots.heuristic_policy")
+def heuristic_policy(loops):
+    """Decides on a card to play or discard with the heuristic policy."""
+    positions = list(itertools.islice(itertools.cycle(_card_decisions()), loops))
+    return _each(lambda position: bots.heuristic_policy(*position), positions)
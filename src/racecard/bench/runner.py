@@ -0,0 +1,162 @@
+#    Race Card - An implementation of the card game Mille Bornes
+#    Copyright (C) 2020  Krys Lawrence <krys AT krys DOT ca>
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU Affero General Public License as published
+#    by the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU Affero General Public License for more details.
+#
+#    You should have received a copy of the GNU Affero General Public License
+#    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+"""Times benchmarks, measures their memory use and compares runs against a baseline.
+
+A benchmark is a setup function registered with benchmark().  It is called with a
+number of loops and returns a function that does the benchmarked operation that many
+times, so any per-operation preparation is left out of the timings.
+"""
+
+
+import gc
+import json
+import platform
+import time
+import tracemalloc
+import typing
+
+DEFAULT_MIN_TIME = 0.2  # Seconds that each timed run should take at least.
+DEFAULT_REPEAT = 5
+DEFAULT_THRESHOLD = 0.1  # Slowdown, as a fraction, that counts as a regression.
+_MEMORY_SLACK = 256  # Bytes that peak memory can vary by from run to run anyway.
+
+# Benchmark setup functions, by name, in the order they were registered.
+BENCHMARKS = {}
+
+
+class Result(typing.NamedTuple):
+    """The measurements of one benchmark."""
+
+    name: str
+    ops_per_sec: float  # From the fastest of the repeated runs.
+    peak_bytes: int  # Most memory allocated at once during a single operation.
+    retained_bytes: int  # Memory still allocated after a single operation.
+    loops: int  # Operations per timed run.
+
+
+class Change(typing.NamedTuple):
+    """A benchmark that got slower or used more memory than its baseline."""
+
+    name: str
+    metric: str  # The Result field that changed.
+    baseline: float
+    current: float
+
+
+def benchmark(name):
+    """Decorator that registers a benchmark setup function under the given name."""
+
+    def register(setup):
+        BENCHMARKS[name] = setup
+        return setup
+
+    return register
+
+
+def _time(setup, loops):
+    """Returns how many seconds loops operations take.  gc is off while timing."""
+    func = setup(loops)
+    gc_was_enabled = gc.isenabled()
+    gc.collect()
+    gc.disable()
+    try:
+        start = time.perf_counter()
+        func()
+        return time.perf_counter() - start
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+
+def _calibrate(setup, min_time):
+    """Returns the number of loops that takes at least min_time seconds."""
+    loops = 1
+    while _time(setup, loops) < min_time:
+        loops *= 2
+    return loops
+
+
+def _measure_memory(setup):
+    """Returns the peak and retained bytes allocated by a single operation."""
+    func = setup(1)
+    gc.collect()
+    tracemalloc.start()
+    try:
+        func()
+        retained, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak, retained
+
+
+def run_one(name, min_time=DEFAULT_MIN_TIME, repeat=DEFAULT_REPEAT):
+    """Runs the named benchmark and returns its Result."""
+    setup = BENCHMARKS[name]
+    loops = _calibrate(setup, min_time)
+    best = min(_time(setup, loops) for _ in range(repeat))
+    peak, retained = _measure_memory(setup)
+    return Result(name, loops / best, peak, retained, loops)
+
+
+def run(names=None, min_time=DEFAULT_MIN_TIME, repeat=DEFAULT_REPEAT):
+    """Runs the named benchmarks, or else all of them, and yields their Results."""
+    for name in BENCHMARKS if names is None else names:
+        yield run_one(name, min_time, repeat)
+
+
+def save(results, path):
+    """Saves Results to a JSON file, along with details of the Python that ran them."""
+    data = {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "machine": platform.machine(),
+        "results": {result.name: result._asdict() for result in results},
+    }
+    with open(path, "w") as file_:
+        json.dump(data, file_, indent=2)
+        file_.write("\n")
+
+
+def load(path):
+    """Returns the Results saved to a JSON file by save(), by name."""
+    with open(path) as file_:
+        data = json.load(file_)
+    return {name: Result(**fields) for name, fields in data["results"].items()}
+
+
+def compare(results, baseline, threshold=DEFAULT_THRESHOLD):
+    """Returns a Change for every regression of results from baseline.
+
+    baseline is a dict of Results by name, as returned by load().  A benchmark has
+    regressed if its operations per second dropped, or its peak memory rose, by more
+    than threshold (a fraction).  Benchmarks missing from baseline are skipped.
+    """
+    changes = []
+    for result in results:
+        base = baseline.get(result.name)
+        if base is None:
+            continue
+        if result.ops_per_sec < base.ops_per_sec * (1 - threshold):
+            changes.append(
+                Change(result.name, "ops_per_sec", base.ops_per_sec, result.ops_per_sec)
+            )
+        if result.peak_bytes > base.peak_bytes * (1 + threshold) + _MEMORY_SLACK:
+            changes.append(
+                Change(result.name, "peak_bytes", base.peak_bytes, result.peak_bytes)
+            )
+    return changes
@@ -18,4 +18,4 @@
 """Core logic and configuration."""
 
 from .game import Game  # noqa: F401
-from .hand import PlayResults  # noqa: F401
+from .hand import Actions, HandSummary, Move, PlayResults  # noqa: F401
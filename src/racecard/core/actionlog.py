@@ -0,0 +1,122 @@
+#    Race Card - An implementation of the card game Mille Bornes
+#    Copyright (C) 2020  Krys Lawrence <krys AT krys DOT ca>
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU Affero General Public License as published
+#    by the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU Affero General Public License for more details.
+#
+#    You should have received a copy of the GNU Affero General Public License
+#    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+"""Records every change made to a Game in a compact, append-only log.
+
+A Game can be rebuilt exactly from its log with Game.replay(), because the log also
+holds the seed of the game's random number generator.  Logs are a few kilobytes per
+game, so they are cheap to store, i.e. with pickle, for crash recovery or to reproduce
+real games later.
+"""
+
+
+import dataclasses
+import typing
+
+from . import common
+
+Ops = common.Enum(  # pylint: disable=invalid-name
+    "Ops",
+    (
+        "BEGIN NEXT_HAND DRAW DRAW_DISCARD PLAY DISCARD FORCED_DISCARD COUP_FOURRE "
+        "EXTENSION NO_EXTENSION TOGGLE_SORT"
+    ),
+)
+
+NONE = 255  # Stored in place of None.
+
+_OPS = tuple(Ops)
+_OP_CODES = {op: code for code, op in enumerate(_OPS)}
+_ENTRY_SIZE = 4
+
+
+def _none(value):
+    return NONE if value is None else value
+
+
+def _from_none(value):
+    return None if value == NONE else value
+
+
+def iter_actions(data):
+    """Yields (op, player_index, card_index, target_index) for every action in data.
+
+    data is logged actions as bytes, 4 per action.  See ActionLog.get_hand_actions().
+    """
+    for start in range(0, len(data), _ENTRY_SIZE):
+        code, player_index, card_index, target_index = data[start : start + _ENTRY_SIZE]
+        yield (
+            _OPS[code],
+            _from_none(player_index),
+            _from_none(card_index),
+            _from_none(target_index),
+        )
+
+
+@common.slotted
+@dataclasses.dataclass
+class ActionLog:
+    """The log of one game.
+
+    Each action is stored as 4 bytes: the op code, then the indexes in player_ids of the
+    player and target (if any) and the card index (if any).  Actions are kept in one
+    chunk per hand, as completed hands never change.  Only the last chunk is a
+    bytearray.  Earlier ones are bytes, so they can be shared.  See clone().
+    """
+
+    seed: typing.Union[int, str]  # The Game's seed.  See common.make_rng().
+    player_ids: typing.List[typing.Any] = dataclasses.field(default_factory=list)
+    _chunks: typing.List[typing.Union[bytes, bytearray]] = dataclasses.field(
+        default_factory=lambda: [bytearray()]
+    )
+    rules: typing.Any = None  # The game's ruleset.RuleSet, or None for the standard.
+
+    def __len__(self):
+        return sum(len(chunk) for chunk in self._chunks) // _ENTRY_SIZE
+
+    def __iter__(self):
+        """Yields (op, player_index, card_index, target_index) for every action."""
+        for chunk in self._chunks:
+            yield from iter_actions(chunk)
+
+    @property
+    def actions(self):
+        """Returns all actions as bytes, 4 per action."""
+        return b"".join(self._chunks)
+
+    def get_hand_actions(self, hand_number):
+        """Returns the actions of the given hand as bytes, 4 per action.
+
+        hand_number counts from 1, as Game.hand_number.  The first hand's actions also
+        include those made before it, i.e. BEGIN.
+        """
+        return bytes(self._chunks[hand_number - 1])
+
+    def append(self, op, player_index=None, card_index=None, target_index=None):
+        """Appends an action.  A new chunk is started for each new hand."""
+        if op is Ops.NEXT_HAND:
+            self._chunks[-1] = bytes(self._chunks[-1])
+            self._chunks.append(bytearray())
+        self._chunks[-1] += bytes(
+            (_OP_CODES[op], _none(player_index), _none(card_index), _none(target_index))
+        )
+
+    def clone(self):
+        """Returns an independent copy.  Chunks of completed hands are shared."""
+        chunks = self._chunks[:]
+        chunks[-1] = chunks[-1][:]
+        return ActionLog(self.seed, self.player_ids[:], chunks, self.rules)
@@ -0,0 +1,179 @@
+#    Race Card - An implementation of the card game Mille Bornes
+#    Copyright (C) 2020  Krys Lawrence <krys AT krys DOT ca>
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU Affero General Public License as published
+#    by the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU Affero General Public License for more details.
+#
+#    You should have received a copy of the GNU Affero General Public License
+#    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+"""Bots that play seats of a game, and the helpers that let them take their turns.
+
+A bot is a policy: any callable with the signature
+
+    policy(game, player_id, moves) -> Move or None
+
+game is the Game being played, which policies must only read.  moves is the list of
+legal Moves for player_id, as returned by Game.legal_moves().  Returning None
+declines an optional move, i.e. a Coup Fourré.  The same policies drive the simulator
+(see simulation.simulate()), computer players in the CLI and autoplayed seats on the
+server, all through play_turn() and autoplay().
+"""
+
+
+import typing
+
+from . import deck, exceptions
+from .hand import Actions, Move, PlayResults
+
+# Most cards left in the draw pile for which extensions are still called.
+MIN_CARDS_TO_EXTEND = 20
+
+# Safeties that make each remedy useless, as a mask of (1 << card) bits.  Roll is
+# useless with Right of Way, Spare Tire with Puncture Proof, and so on.
+_REMEDY_SAFETIES = tuple(
+    sum(
+        {
+            1 << deck.PREVENTED_BY[hazard]
+            for hazard, remedy in enumerate(deck.REMEDIED_BY)
+            if remedy == card
+        }
+    )
+    for card in range(deck.NUM_KINDS)
+)
+
+
+class Policy(typing.Protocol):  # pylint: disable=too-few-public-methods
+    """The signature of every bot.  See the module docstring."""
+
+    def __call__(
+        self, game: typing.Any, player_id: typing.Any, moves: typing.List[Move]
+    ) -> typing.Optional[Move]:
+        ...
+
+
+def offer_coup_fourre(game, target_id, policies):
+    """Lets the targeted player's policy call a Coup Fourré, if they have a policy.
+
+    policies maps player ids to policies.  Returns the Move made, or None if the Coup
+    Fourré was not called.
+    """
+    policy = policies.get(target_id)
+    if policy is None:
+        return None
+    move = policy(game, target_id, game.legal_moves(target_id))
+    if move is not None:
+        game.make_move(target_id, move)
+    return move
+
+
+def play_turn(game, policies):
+    """Makes the current player's move with their policy and returns (move, result).
+
+    policies maps player ids to policies, and must have one for the current player.
+    If the move allows a Coup Fourré, it is offered to the target's policy, if any.
+    Otherwise, i.e. for people, the caller must offer it.  Raises NoMoveError if the
+    policy returns None, as only a Coup Fourré can be declined.
+    """
+    player_id = game.current_player_id
+    move = policies[player_id](game, player_id, game.legal_moves(player_id))
+    if move is None:
+        raise exceptions.NoMoveError()
+    result = game.make_move(player_id, move)
+    if result is PlayResults.CAN_COUP_FOURRE:
+        offer_coup_fourre(game, move.target_id, policies)
+    return move, result
+
+
+def autoplay(game, policies):
+    """Plays turns until the hand is over or a player without a policy is up.
+
+    policies is as for play_turn().  Returns the number of turns played.  Coups Fourrés
+    that players without a policy could call are skipped, as it is no longer their
+    turn to decide once play goes on.
+    """
+    turns = 0
+    while not game.is_hand_completed and game.current_player_id in policies:
+        play_turn(game, policies)
+        turns += 1
+    return turns
+
+
+def heuristic_policy(game, player_id, moves):
+    """A fast rule-based bot.
+
+    It always calls Coups Fourrés, draws from the draw pile and calls extensions while
+    at least MIN_CARDS_TO_EXTEND cards are left.  Otherwise it plays, in order of
+    preference: remedies, hazards on players as far along as itself (the furthest
+    first), its biggest distance card, then other hazards.  Safeties are kept for Coups
+    Fourrés, unless the only other choice is to discard.  If it cannot play, it
+    discards a card it can never play (i.e. a remedy made useless by its own
+    safeties), or else the least useful one by card weight.
+    Only pile summaries are read, never get_state(), so decisions take microseconds.
+    """
+    if not moves:
+        return None
+    action = moves[0].action
+    if action is Actions.COUP_FOURRE or action is Actions.DRAW:
+        return moves[0]
+    if action is Actions.EXTENSION:
+        return moves[0 if game.cards_remaining >= MIN_CARDS_TO_EXTEND else 1]
+    cards = game.get_cards(player_id)
+    distance = game.get_summary(player_id).distance_total
+    distances = {}  # Of targets, by id.
+    best_move = None
+    best_priority = 0
+    discards = []
+    for move in moves:
+        if move.action is Actions.DISCARD:
+            discards.append(move)
+            continue
+        if move.action is not Actions.PLAY:
+            continue
+        card = cards[move.card_index]
+        category = deck.CATEGORY[card]
+        if category == deck.REMEDY:
+            priority = 5
+        elif category == deck.DISTANCE:
+            priority = 3 + deck.VALUES[card] / 1000
+        elif category == deck.HAZARD:
+            target_id = move.target_id
+            if target_id not in distances:
+                distances[target_id] = game.get_summary(target_id).distance_total
+            target_distance = distances[target_id]
+            priority = (4 if target_distance >= distance else 2) + target_distance / 1e4
+        else:  # Safeties are kept for Coups Fourrés, if there is anything else.
+            priority = 1
+        if priority > best_priority:
+            best_move, best_priority = move, priority
+    if best_move is not None:
+        return best_move
+    if discards:
+        return _least_useful(game, player_id, cards, discards)
+    return moves[0]
+
+
+def _least_useful(game, player_id, cards, discards):
+    """Returns the discard of the least useful card."""
+    summary = game.get_summary(player_id)
+    safeties = summary.safeties_mask
+    weights = game.rules.weights
+
+    def usefulness(move):
+        card = cards[move.card_index]
+        if card == deck.D200:
+            useless = summary.d200_count >= 2
+        else:
+            needed = _REMEDY_SAFETIES[card]
+            useless = needed and safeties & needed == needed
+        return (not useless, weights[card])
+
+    return min(discards, key=usefulness)
@@ -18,7 +18,13 @@
 """Common/utility code for the core package."""
 
 
+import dataclasses
 import enum
+import functools
+import random
+import sys
+
+_SYSTEM_RANDOM = random.SystemRandom()
 
 
 class _Enum(enum.Enum):
@@ -39,4 +45,86 @@ class _Enum(enum.Enum):
 
 def Enum(*args, **kwargs):  # pylint: disable=invalid-name
     """Creates an Enum class with member values and str outputs as only their names."""
+    # NOTE: Enum() can only find the calling module by itself when it is called
+    #       directly, which it is not here.  Without the right module, members cannot
+    #       be pickled, i.e. to send them to other processes.
+    # pylint: disable=protected-access
+    kwargs.setdefault("module", sys._getframe(1).f_globals.get("__name__"))
     return enum.unique(_Enum(*args, **kwargs))
+
+
+def slotted(cls):
+    """Class decorator that rebuilds a dataclass to use __slots__ instead of __dict__.
+
+    Use it above @dataclasses.dataclass.  The same as dataclass(slots=True) in Python
+    3.10+, which is not available on older versions.
+    """
+    inherited = set()
+    for base in cls.__mro__[1:]:
+        inherited.update(getattr(base, "__slots__", ()))
+    names = [field.name for field in dataclasses.fields(cls)]
+    namespace = dict(cls.__dict__)
+    for name in names:
+        namespace.pop(name, None)  # Defaults are kept by the generated __init__.
+    namespace.pop("__dict__", None)
+    namespace.pop("__weakref__", None)
+    namespace["__slots__"] = tuple(name for name in names if name not in inherited)
+    if cls.__dataclass_params__.frozen:
+        # NOTE: copy and pickle restore slots with setattr(), which frozen dataclasses
+        #       forbid, so give them state methods that bypass it.
+        namespace["__getstate__"] = _frozen_getstate
+        namespace["__setstate__"] = _frozen_setstate
+    return type(cls)(cls.__name__, cls.__bases__, namespace)
+
+
+def _frozen_getstate(self):
+    """Returns the field values of a frozen, slotted dataclass for copy and pickle."""
+    return [getattr(self, field.name) for field in dataclasses.fields(self)]
+
+
+def _frozen_setstate(self, state):
+    """Restores the field values of a frozen, slotted dataclass for copy and pickle."""
+    for field, value in zip(dataclasses.fields(self), state):
+        object.__setattr__(self, field.name, value)
+
+
+@functools.lru_cache(maxsize=None)
+def _slot_names(cls):
+    """Returns the names of all __slots__ of cls, including inherited ones."""
+    names = []
+    for klass in reversed(cls.__mro__):
+        slots = klass.__dict__.get("__slots__", ())
+        names.extend([slots] if isinstance(slots, str) else slots)
+    return tuple(name for name in names if name not in ("__dict__", "__weakref__"))
+
+
+def shallow_copy(obj):
+    """Returns a shallow copy of obj.  Several times faster than copy.copy()."""
+    cls = type(obj)
+    clone = object.__new__(cls)
+    for name in _slot_names(cls):
+        try:
+            setattr(clone, name, getattr(obj, name))
+        except AttributeError:
+            pass  # Unset slot.
+    if hasattr(obj, "__dict__"):
+        clone.__dict__.update(obj.__dict__)
+    return clone
+
+
+def make_seed():
+    """Returns a new 64 bit seed from the operating system.
+
+    The global random generator is not used, as forked processes all start with the
+    same copy of it and so would make the same seeds.
+    """
+    return _SYSTEM_RANDOM.getrandbits(64)
+
+
+def make_rng(seed, *keys):
+    """Returns a new random.Random for the stream of seed named by keys.
+
+    Each different seed and keys gives an independent stream, so i.e. each hand of a
+    game can have its own without depending on how much earlier hands used theirs.
+    """
+    return random.Random(":".join([str(seed), *map(str, keys)]))
@@ -15,295 +15,257 @@
 #    along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
 
-"""Define all card types and create decks from which to draw."""
+"""Define all card kinds and create decks from which to draw.
 
+Cards are represented by small integers called card kinds.  Everything else about a
+card (name, categories, weight, value, etc.) is looked up by indexing the tables below
+with its kind, so piles of cards can be stored as compact bytearrays.
+"""
 
-import abc
-import random
-
-from . import config
-
-# Base Classes
-
-
-class Card(abc.ABC):  # pylint: disable=too-few-public-methods
-
-    """Base class for all cards."""
-
-    @property
-    @abc.abstractmethod
-    def name(self):
-        """The name of the card."""
-
-    @property
-    @abc.abstractmethod
-    def weight(self):
-        """A weight number of the card when sorting a hand. Higher = more top/left."""
-
-    def __str__(self):
-        return self.name
-
-    def is_a(self, type_):
-        """Returns True if the card is an instance of the given type."""
-        return isinstance(self, type_)
-
-
-class SafetyCard(Card):  # pylint: disable=too-few-public-methods,abstract-method
-    """Safety cards both recover, prevent and even interrupt the playing of hazards."""
 
+import queue
+import random
+import threading
 
-class BattleCard(Card):  # pylint: disable=too-few-public-methods,abstract-method
-    """Cards that go on the battle pile."""
-
-
-class SpeedCard(Card):  # pylint: disable=too-few-public-methods,abstract-method
-    """Cards that go on the speed pile."""
-
-
-class RemedyCard(Card):  # pylint: disable=too-few-public-methods,abstract-method
-    """Remedy cards recover from hazards."""
-
-
-class HazardCard(Card):  # pylint: disable=too-few-public-methods
-    """Hazard cards are for attacking opponents."""
-
-    @property
-    @abc.abstractmethod
-    def remedied_by(self):
-        """Can be remedied by this card type."""
-
-    @property
-    @abc.abstractmethod
-    def prevented_by(self):
-        """Can be prevented by this card type."""
-
+from . import common, config
 
-class DistanceCard(Card):  # pylint: disable=too-few-public-methods
-    """Distance cards increase player scores."""
+# Card Categories
 
-    @property
-    @abc.abstractmethod
-    def value(self):
-        """The numeric value of the card."""
+# NOTE: These are bit flags, so one card kind can be in several categories.  I.e. Spare
+#       Tire is both a BATTLE card and a REMEDY card.
+SAFETY = 1  # Safety cards both recover, prevent and even interrupt hazards.
+BATTLE = 2  # Cards that go on the battle pile.
+SPEED = 4  # Cards that go on the speed pile.
+REMEDY = 8  # Remedy cards recover from hazards.
+HAZARD = 16  # Hazard cards are for attacking opponents.
+DISTANCE = 32  # Distance cards increase player scores.
 
-    @property
-    def name(self):
-        return str(self.value)
+# Every card is in exactly one of these, which decides how it is played.
+MAIN_CATEGORIES = (SAFETY, REMEDY, HAZARD, DISTANCE)
 
+# Card Kinds
 
 # Safety Cards
-
-
-class DrivingAceCard(SafetyCard):  # pylint: disable=too-few-public-methods
-    """Driving Ace recovers and prevents Accident.  It is also an interrupt."""
-
-    name = "Driving Ace"
-    weight = config.DRIVING_ACE_WEIGHT
-
-
-class ExtraTankCard(SafetyCard):  # pylint: disable=too-few-public-methods
-    """Extra Tank recovers and prevents Out of Gass.  It is also an interrupt."""
-
-    name = "Extra Tank"
-    weight = config.EXTRA_TANK_WEIGHT
-
-
-class PunctureProofCard(SafetyCard):  # pylint: disable=too-few-public-methods
-    """Puncture Proof recovers and prevents Flat Tire.  It is also an interrupt."""
-
-    name = "Puncture Proof"
-    weight = config.PUNCTURE_PROOF_WEIGHT
-
-
-class RightOfWayCard(SafetyCard):  # pylint: disable=too-few-public-methods
-    """Right of Way recovers and prevents Stop and Speed Limit. It is also an interrupt.
-
-    It also negates the need to play Roll cards completely.
-    """
-
-    name = "Right of Way"
-    weight = config.RIGHT_OF_WAY_WEIGHT
-
+DRIVING_ACE = 0  # Recovers and prevents Accident.
+EXTRA_TANK = 1  # Recovers and prevents Out of Gas.
+PUNCTURE_PROOF = 2  # Recovers and prevents Flat Tire.
+RIGHT_OF_WAY = 3  # Recovers and prevents Stop and Speed Limit.  Also negates Roll.
 
 # Remedy Cards
-
-
-class EndOfLimitCard(SpeedCard, RemedyCard):  # pylint: disable=too-few-public-methods
-    """End of Limit recovers from Speed Limit and is superceeded by Right of Way."""
-
-    name = "End of Limit"
-    weight = config.END_OF_LIMIT_WEIGHT
-
-
-class SpareTireCard(BattleCard, RemedyCard):  # pylint: disable=too-few-public-methods
-    """Spare Tire recovers from Flat Tire and is superceeded by Puncture Proof."""
-
-    name = "Spare Tire"
-    weight = config.SPARE_TIRE_WEIGHT
-
-
-class RepairsCard(BattleCard, RemedyCard):  # pylint: disable=too-few-public-methods
-    """Repairs recovers from Accident and is superceeded by Driving Ace."""
-
-    name = "Repairs"
-    weight = config.REPAIRS_WEIGHT
-
-
-class GasolineCard(BattleCard, RemedyCard):  # pylint: disable=too-few-public-methods
-    """Gasoline recovers from Out of Gas and is superceeded by Extra Tank."""
-
-    name = "Gasoline"
-    weight = config.GASOLINE_WEIGHT
-
-
-class RollCard(BattleCard, RemedyCard):  # pylint: disable=too-few-public-methods
-    """Roll recovers from Stop and is superceeded by Right of Way.
-
-    It is also needed after all remedied hazards except Speed Limit/End of Limit.
-    """
-
-    name = "Roll"
-    weight = config.ROLL_WEIGHT
-
+END_OF_LIMIT = 4  # Recovers from Speed Limit and is superceeded by Right of Way.
+SPARE_TIRE = 5  # Recovers from Flat Tire and is superceeded by Puncture Proof.
+REPAIRS = 6  # Recovers from Accident and is superceeded by Driving Ace.
+GASOLINE = 7  # Recovers from Out of Gas and is superceeded by Extra Tank.
+ROLL = 8  # Recovers from Stop and all other battle hazards once remedied.
 
 # Hazard Cards
-
-
-class SpeedLimitCard(SpeedCard, HazardCard):  # pylint: disable=too-few-public-methods
-    """Speed Limit slows an opponent by restricting distance cards use.
-
-    They need End of Limit to recover.
-    """
-
-    name = "Speed Limit"
-    weight = config.SPEED_LIMIT_WEIGHT
-    remedied_by = EndOfLimitCard
-    prevented_by = RightOfWayCard
-    max_speed = config.SPEED_LIMIT_LIMIT
-
-
-class StopCard(BattleCard, HazardCard):  # pylint: disable=too-few-public-methods
-    """Stop stops an opponent. They need Roll to recover."""
-
-    name = "Stop"
-    weight = config.STOP_WEIGHT
-    remedied_by = RollCard
-    prevented_by = RightOfWayCard
-
-
-class OutOfGasCard(BattleCard, HazardCard):  # pylint: disable=too-few-public-methods
-    """Out of Gas stops an opponent. They need Gasoline and Roll to recover."""
-
-    name = "Out of Gas"
-    weight = config.OUT_OF_GASS_WEIGHT
-    remedied_by = GasolineCard
-    prevented_by = ExtraTankCard
-
-
-class FlatTireCard(BattleCard, HazardCard):  # pylint: disable=too-few-public-methods
-    """Flat Tire stops an opponent. They need Spare Tire and Roll to recover."""
-
-    name = "Flat Tire"
-    weight = config.FLAT_TIRE_WEIGHT
-    remedied_by = SpareTireCard
-    prevented_by = PunctureProofCard
-
-
-class AccidentCard(BattleCard, HazardCard):  # pylint: disable=too-few-public-methods
-    """Accident stops an opponent. They need Repairs and Roll to recover."""
-
-    name = "Accident"
-    weight = config.ACCIDENT_WEIGHT
-    remedied_by = RepairsCard
-    prevented_by = DrivingAceCard
-
+SPEED_LIMIT = 9  # Restricts distance cards use until End of Limit.
+STOP = 10  # Stops an opponent until Roll.
+OUT_OF_GAS = 11  # Stops an opponent until Gasoline and Roll.
+FLAT_TIRE = 12  # Stops an opponent until Spare Tire and Roll.
+ACCIDENT = 13  # Stops an opponent until Repairs and Roll.
 
 # Distance Cards
+D25 = 14
+D50 = 15
+D75 = 16
+D100 = 17
+D200 = 18  # Also loses the Safe Trip score bonus.
+
+# Lookup Tables
+
+# fmt: off
+_CARD_KINDS = (
+    # (kind, name, categories, weight, value, remedied_by, prevented_by)
+    (DRIVING_ACE, "Driving Ace", SAFETY, config.DRIVING_ACE_WEIGHT, 0, None, None),
+    (EXTRA_TANK, "Extra Tank", SAFETY, config.EXTRA_TANK_WEIGHT, 0, None, None),
+    (PUNCTURE_PROOF, "Puncture Proof", SAFETY, config.PUNCTURE_PROOF_WEIGHT, 0,
+        None, None),
+    (RIGHT_OF_WAY, "Right of Way", SAFETY, config.RIGHT_OF_WAY_WEIGHT, 0, None, None),
+    (END_OF_LIMIT, "End of Limit", SPEED | REMEDY, config.END_OF_LIMIT_WEIGHT, 0,
+        None, None),
+    (SPARE_TIRE, "Spare Tire", BATTLE | REMEDY, config.SPARE_TIRE_WEIGHT, 0,
+        None, None),
+    (REPAIRS, "Repairs", BATTLE | REMEDY, config.REPAIRS_WEIGHT, 0, None, None),
+    (GASOLINE, "Gasoline", BATTLE | REMEDY, config.GASOLINE_WEIGHT, 0, None, None),
+    (ROLL, "Roll", BATTLE | REMEDY, config.ROLL_WEIGHT, 0, None, None),
+    (SPEED_LIMIT, "Speed Limit", SPEED | HAZARD, config.SPEED_LIMIT_WEIGHT, 0,
+        END_OF_LIMIT, RIGHT_OF_WAY),
+    (STOP, "Stop", BATTLE | HAZARD, config.STOP_WEIGHT, 0, ROLL, RIGHT_OF_WAY),
+    (OUT_OF_GAS, "Out of Gas", BATTLE | HAZARD, config.OUT_OF_GASS_WEIGHT, 0,
+        GASOLINE, EXTRA_TANK),
+    (FLAT_TIRE, "Flat Tire", BATTLE | HAZARD, config.FLAT_TIRE_WEIGHT, 0,
+        SPARE_TIRE, PUNCTURE_PROOF),
+    (ACCIDENT, "Accident", BATTLE | HAZARD, config.ACCIDENT_WEIGHT, 0,
+        REPAIRS, DRIVING_ACE),
+    (D25, "25", DISTANCE, config.D25_WEIGHT, 25, None, None),
+    (D50, "50", DISTANCE, config.D50_WEIGHT, 50, None, None),
+    (D75, "75", DISTANCE, config.D75_WEIGHT, 75, None, None),
+    (D100, "100", DISTANCE, config.D100_WEIGHT, 100, None, None),
+    (D200, "200", DISTANCE, config.D200_WEIGHT, 200, None, None),
+)
+# fmt: on
+
+NUM_KINDS = len(_CARD_KINDS)
+NAMES = tuple(entry[1] for entry in _CARD_KINDS)
+CATEGORIES = tuple(entry[2] for entry in _CARD_KINDS)
+# The single main category of each card kind.  See MAIN_CATEGORIES.
+CATEGORY = tuple(
+    [category for category in MAIN_CATEGORIES if categories & category][0]
+    for categories in CATEGORIES
+)
+WEIGHTS = tuple(entry[3] for entry in _CARD_KINDS)
+VALUES = tuple(entry[4] for entry in _CARD_KINDS)
+REMEDIED_BY = tuple(entry[5] for entry in _CARD_KINDS)
+PREVENTED_BY = tuple(entry[6] for entry in _CARD_KINDS)
+
+# Decks
+
+DEFAULT_POOL_SIZE = 64
+
+_BASE_DECK = bytes(
+    [
+        *([REPAIRS] * 6),
+        *([GASOLINE] * 6),
+        *([SPARE_TIRE] * 6),
+        *([ROLL] * 14),
+        *([END_OF_LIMIT] * 6),
+        DRIVING_ACE,
+        EXTRA_TANK,
+        PUNCTURE_PROOF,
+        RIGHT_OF_WAY,
+        *([D25] * 10),
+        *([D50] * 10),
+        *([D75] * 10),
+        *([D100] * 12),
+        *([D200] * 4),
+    ]
+)
 
 
-class D25Card(DistanceCard):  # pylint: disable=too-few-public-methods
-    """Travel 25 km."""
-
-    value = 25
-    weight = config.D25_WEIGHT
-
+# Functions
 
-class D50Card(DistanceCard):  # pylint: disable=too-few-public-methods
-    """Travel 50 km."""
 
-    value = 50
-    weight = config.D50_WEIGHT
+def _add_hazards(deck, small):
+    """Adds hazards to a deck.  Large decks get extra hazards."""
+    extra = 0 if small else 1
+    deck.extend(
+        [
+            *([ACCIDENT] * (2 + extra)),
+            *([OUT_OF_GAS] * (2 + extra)),
+            *([FLAT_TIRE] * (2 + extra)),
+            *([STOP] * (4 + extra)),
+            *([SPEED_LIMIT] * (3 + extra)),
+        ]
+    )
 
 
-class D75Card(DistanceCard):  # pylint: disable=too-few-public-methods
-    """Travel 75 km."""
+def _make_template(small):
+    """Returns an unshuffled deck as bytes."""
+    template = bytearray(_BASE_DECK)
+    _add_hazards(template, small)
+    return bytes(template)
 
-    value = 75
-    weight = config.D75_WEIGHT
 
+# Unshuffled large and small decks, by the small flag.  Built once, at import time.
+_TEMPLATES = (_make_template(False), _make_template(True))
 
-class D100Card(DistanceCard):  # pylint: disable=too-few-public-methods
-    """Travel 100 km."""
 
-    value = 100
-    weight = config.D100_WEIGHT
+def make_unshuffled_deck(small=False):
+    """Make a new deck in a fixed order and return it as a bytearray of card kinds."""
+    return bytearray(_TEMPLATES[small])
 
 
-class D200Card(DistanceCard):  # pylint: disable=too-few-public-methods
-    """Travel 200 km.
+def shuffle_deck(template, rng=None):
+    """Returns a shuffled copy of an unshuffled deck, as a bytearray of card kinds.
 
-    Also lose the Safe Trip score bonus.
+    rng is the random.Random instance to shuffle with.  Defaults to the random module.
+    One shuffle is enough, as random.shuffle() already makes every order equally likely.
     """
+    rng = random if rng is None else rng
+    new_deck = bytearray(template)
+    rng.shuffle(new_deck)
+    return new_deck
 
-    value = 200
-    weight = config.D200_WEIGHT
-
-
-# Constants 2
-
-# NOTE: We are using multiple references to single instances for our deck's contents.
-#       I.e. All AccidentCards are the same instance.  When removing a card from the
-#       deck, or moving a card to another list, it is the specific reference we want to
-#       (re)move, not the whole instance.
-_BASE_DECK = [
-    *([RepairsCard()] * 6),
-    *([GasolineCard()] * 6),
-    *([SpareTireCard()] * 6),
-    *([RollCard()] * 14),
-    *([EndOfLimitCard()] * 6),
-    DrivingAceCard(),
-    ExtraTankCard(),
-    PunctureProofCard(),
-    RightOfWayCard(),
-    *([D25Card()] * 10),
-    *([D50Card()] * 10),
-    *([D75Card()] * 10),
-    *([D100Card()] * 12),
-    *([D200Card()] * 4),
-]
 
+def make_deck(small=False, rng=None):
+    """Make a new standard deck, shuffle it and return it as a bytearray of card kinds.
 
-# Functions
+    rng is as for shuffle_deck().
+    """
+    return shuffle_deck(_TEMPLATES[small], rng)
 
 
-def _add_hazards(deck, small):
-    """Adds hazards to a deck.  Large decks get extra hazards."""
-    extra = 0 if small else 1
-    deck.extend(
-        [
-            *([AccidentCard()] * (2 + extra)),
-            *([OutOfGasCard()] * (2 + extra)),
-            *([FlatTireCard()] * (2 + extra)),
-            *([StopCard()] * (4 + extra)),
-            *([SpeedLimitCard()] * (3 + extra)),
-        ]
-    )
+class DeckPool:
+    """Shuffles decks ahead of time on a background thread.
 
+    Decks are shuffled from a template for a given seed and keys, exactly as
+    shuffle_deck(template, common.make_rng(seed, *keys)) would, so games stay
+    reproducible.  Call prefetch() as soon as the seed of a later deck is known, then
+    take() it when needed.  If it is not ready yet, take() makes it right away instead.
+    See Game.
+    """
 
-def make_deck(small=False):
-    """Make a new deck, shuffle it and return it."""
-    new_deck = _BASE_DECK.copy()
-    _add_hazards(new_deck, small)
-    for _ in range(config.NUM_SHUFFLES):
-        random.shuffle(new_deck)
-    return new_deck
+    def __init__(self, max_size=DEFAULT_POOL_SIZE):
+        """max_size is the most decks to keep.  The oldest are dropped to make room.
+
+        Games prefetch a deck for a hand that may never come, i.e. after their last
+        hand, so such decks must not fill up the pool.
+        """
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._pending = {}  # Keys prefetched but not yet taken, oldest first.
+        self._ready = {}  # Shuffled decks, by key.
+        self._requests = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def __reduce__(self):
+        # Threads cannot be copied, so copies start with a new, empty pool.
+        return (DeckPool, (self.max_size,))
+
+    def _run(self):
+        """Shuffles the prefetched decks, in order, until close() is called."""
+        while True:
+            key = self._requests.get()
+            if key is None:
+                return
+            new_deck = shuffle_deck(key[0], common.make_rng(*key[1:]))
+            with self._lock:
+                if key in self._pending:
+                    self._ready[key] = new_deck
+
+    def prefetch(self, template, seed, *keys):
+        """Starts shuffling the deck for seed and keys in the background.
+
+        template is the unshuffled deck, as bytes of card kinds.  See RuleSet.decks.
+        """
+        key = (template, seed, *keys)
+        with self._lock:
+            if key in self._pending:
+                return
+            if len(self._pending) >= self.max_size:
+                oldest = next(iter(self._pending))
+                del self._pending[oldest]
+                self._ready.pop(oldest, None)
+            self._pending[key] = None
+        self._requests.put(key)
+
+    def take(self, template, seed, *keys):
+        """Returns the deck for seed and keys, as a bytearray of card kinds.
+
+        The same as shuffle_deck(template, common.make_rng(seed, *keys)), but faster if
+        it was prefetched.
+        """
+        key = (template, seed, *keys)
+        with self._lock:
+            self._pending.pop(key, None)
+            new_deck = self._ready.pop(key, None)
+        if new_deck is None:
+            new_deck = shuffle_deck(template, common.make_rng(seed, *keys))
+        return new_deck
+
+    def close(self):
+        """Stops the background thread.  The pool can still be used, without it."""
+        self._requests.put(None)
+        self._thread.join()
@@ -0,0 +1,325 @@
+#    Race Card - An implementation of the card game Mille Bornes
+#    Copyright (C) 2020  Krys Lawrence <krys AT krys DOT ca>
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU Affero General Public License as published
+#    by the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU Affero General Public License for more details.
+#
+#    You should have received a copy of the GNU Affero General Public License
+#    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+"""Compact descriptions of how each action changed a hand, and mirrors to apply them.
+
+A Hand that is tracking deltas (see Hand.track_deltas()) records one Delta per action.
+A Delta lists the cards that moved and where, the players whose state changed, and the
+new turn.  Applying each Delta in order to a Mirror keeps it the same as the hand,
+which is far cheaper to send and to process than every player's full state after
+every action.
+
+Players are given by their index in the hand's turn order.  See Hand.player_ids.
+"""
+
+
+import dataclasses
+import struct
+import typing
+
+from . import common, deck, player
+
+Piles = common.Enum(  # pylint: disable=invalid-name
+    "Piles", "HAND SAFETIES BATTLE SPEED DISTANCE DRAW DISCARD"
+)
+
+# The piles each player has, in the order returned by Player.get_piles().
+PLAYER_PILES = (Piles.HAND, Piles.SAFETIES, Piles.BATTLE, Piles.SPEED, Piles.DISTANCE)
+
+# The player pile each card kind goes to when it is played, by card kind.
+PLAY_PILES = tuple(
+    Piles.SAFETIES
+    if categories & deck.SAFETY
+    else Piles.BATTLE
+    if categories & deck.BATTLE
+    else Piles.SPEED
+    if categories & deck.SPEED
+    else Piles.DISTANCE
+    for categories in deck.CATEGORIES
+)
+
+NONE = 255  # Stored in place of None.
+
+_PILES = tuple(Piles)
+_PILE_CODES = {pile: code for code, pile in enumerate(_PILES)}
+_STATES = tuple(player._States)  # pylint: disable=protected-access
+_STATE_CODES = {state: code for code, state in enumerate(_STATES)}
+_HEADER = struct.Struct("<BHBBBB")
+_MOVE = struct.Struct("<7B")
+_PLAYER = struct.Struct("<5B")
+
+
+def _none(value):
+    return NONE if value is None else value
+
+
+def _from_none(value):
+    return None if value == NONE else value
+
+
+class CardMove(typing.NamedTuple):
+    """One card moving from one pile to another.
+
+    from_player and to_player are None for the draw and discard piles.  from_index and
+    to_index are the card's position in a player's hand, and None for the top of any
+    other pile.  from_pile is None when the card was already there, i.e. in snapshots.
+    See Hand.get_snapshot().
+    """
+
+    card: int  # Deck card kind.
+    from_pile: typing.Any  # One of Piles, or None.
+    from_player: typing.Optional[int]
+    from_index: typing.Optional[int]
+    to_pile: typing.Any  # One of Piles.
+    to_player: typing.Optional[int]
+    to_index: typing.Optional[int]
+
+
+class PlayerChange(typing.NamedTuple):
+    """The new state of a player that was changed by an action."""
+
+    player: int
+    state: typing.Any  # The player's state, i.e. "ROLLING".
+    winner: bool
+    sort_hand: bool
+    coups_fourres: int
+
+
+@common.slotted
+@dataclasses.dataclass(frozen=True)
+class Delta:
+    """How one action changed a hand.
+
+    hands has a (player, cards) pair for each hand that was reordered as a whole, i.e.
+    when sorting is turned on.  cards is a bytes of deck card kinds.
+    """
+
+    moves: typing.Tuple[CardMove, ...] = ()
+    players: typing.Tuple[PlayerChange, ...] = ()
+    hands: typing.Tuple[typing.Tuple[int, bytes], ...] = ()
+    turn_index: int = 0
+    round_number: int = 1
+    cards_remaining: int = 0
+
+    @property
+    def changed_piles(self):
+        """Returns a set of (player, pile) pairs for every pile that changed."""
+        changed = set()
+        for move in self.moves:
+            if move.from_pile is not None:
+                changed.add((move.from_player, move.from_pile))
+            changed.add((move.to_player, move.to_pile))
+        changed.update((player_index, Piles.HAND) for player_index, _ in self.hands)
+        return changed
+
+    def to_bytes(self):
+        """Returns the delta packed into a few bytes.  See from_bytes()."""
+        data = bytearray(
+            _HEADER.pack(
+                self.turn_index,
+                self.round_number,
+                self.cards_remaining,
+                len(self.moves),
+                len(self.players),
+                len(self.hands),
+            )
+        )
+        for move in self.moves:
+            data += _MOVE.pack(
+                move.card,
+                _none(_PILE_CODES.get(move.from_pile)),
+                _none(move.from_player),
+                _none(move.from_index),
+                _PILE_CODES[move.to_pile],
+                _none(move.to_player),
+                _none(move.to_index),
+            )
+        for change in self.players:
+            data += _PLAYER.pack(
+                change.player,
+                _STATE_CODES[change.state],
+                change.winner,
+                change.sort_hand,
+                change.coups_fourres,
+            )
+        for player_index, cards in self.hands:
+            data += bytes((player_index, len(cards)))
+            data += cards
+        return bytes(data)
+
+    @classmethod
+    def from_bytes(cls, data):
+        """Returns the delta packed by to_bytes()."""
+        (
+            turn_index,
+            round_number,
+            cards_remaining,
+            num_moves,
+            num_players,
+            num_hands,
+        ) = _HEADER.unpack_from(data)
+        offset = _HEADER.size
+        moves = []
+        for _ in range(num_moves):
+            fields = [_from_none(field) for field in _MOVE.unpack_from(data, offset)]
+            card, from_pile, from_player, from_index, to_pile, to_player, to_index = (
+                fields
+            )
+            moves.append(
+                CardMove(
+                    card,
+                    None if from_pile is None else _PILES[from_pile],
+                    from_player,
+                    from_index,
+                    _PILES[to_pile],
+                    to_player,
+                    to_index,
+                )
+            )
+            offset += _MOVE.size
+        players = []
+        for _ in range(num_players):
+            player_index, state, winner, sort_hand, coups_fourres = _PLAYER.unpack_from(
+                data, offset
+            )
+            players.append(
+                PlayerChange(
+                    player_index,
+                    _STATES[state],
+                    bool(winner),
+                    bool(sort_hand),
+                    coups_fourres,
+                )
+            )
+            offset += _PLAYER.size
+        hands = []
+        for _ in range(num_hands):
+            player_index, length = data[offset : offset + 2]
+            offset += 2
+            hands.append((player_index, bytes(data[offset : offset + length])))
+            offset += length
+        return cls(
+            tuple(moves),
+            tuple(players),
+            tuple(hands),
+            turn_index,
+            round_number,
+            cards_remaining,
+        )
+
+
+class Mirror:
+    """A copy of the state of a hand, kept up to date by applying its Deltas.
+
+    Start with a hand's snapshot.  See Hand.get_snapshot() and Hand.get_mirror().
+    The draw pile is only mirrored as its number of cards.
+    """
+
+    # pylint: disable=too-many-instance-attributes
+
+    __slots__ = (
+        "player_ids",
+        "piles",
+        "states",
+        "winners",
+        "sort_hands",
+        "coups_fourres",
+        "discard_pile",
+        "cards_remaining",
+        "turn_index",
+        "round_number",
+    )
+
+    def __init__(self, player_ids):
+        """player_ids are the ids of the hand's players, in turn order."""
+        num_players = len(player_ids)
+        self.player_ids = tuple(player_ids)
+        # Each player's piles by Piles.  All piles are bytearrays of deck card kinds.
+        self.piles = [
+            {pile: bytearray() for pile in PLAYER_PILES} for _ in range(num_players)
+        ]
+        self.states = [None] * num_players
+        self.winners = [False] * num_players
+        self.sort_hands = [False] * num_players
+        self.coups_fourres = [0] * num_players
+        self.discard_pile = bytearray()
+        self.cards_remaining = 0
+        self.turn_index = 0
+        self.round_number = 1
+
+    # Internal Attributes
+
+    def _pile(self, pile, player_index):
+        if pile is Piles.DISCARD:
+            return self.discard_pile
+        return self.piles[player_index][pile]
+
+    # Public Attributes
+
+    @property
+    def current_player_id(self):
+        """Returns the id of the current player."""
+        return self.player_ids[self.turn_index]
+
+    def apply(self, delta):
+        """Applies a Delta.  Deltas must be applied in the order they were recorded.
+
+        Moves are applied in order, so each hand index is the card's position just
+        before or after that move.
+        """
+        for move in delta.moves:
+            if move.from_pile is not None and move.from_pile is not Piles.DRAW:
+                source = self._pile(move.from_pile, move.from_player)
+                del source[-1 if move.from_index is None else move.from_index]
+            destination = self._pile(move.to_pile, move.to_player)
+            if move.to_index is None:
+                destination.append(move.card)
+            else:
+                destination.insert(move.to_index, move.card)
+        for player_index, cards in delta.hands:
+            self.piles[player_index][Piles.HAND][:] = cards
+        for change in delta.players:
+            index = change.player
+            self.states[index] = change.state
+            self.winners[index] = change.winner
+            self.sort_hands[index] = change.sort_hand
+            self.coups_fourres[index] = change.coups_fourres
+        self.turn_index = delta.turn_index
+        self.round_number = delta.round_number
+        self.cards_remaining = delta.cards_remaining
+
+    def get_player_state(self, player_id):
+        """Returns the mirrored state of a player, like Hand.get_player_state().
+
+        Score cards are not mirrored, so score_card is always None.
+        """
+        index = self.player_ids.index(player_id)
+        piles = self.piles[index]
+        names = deck.NAMES.__getitem__
+        return player._PlayerState(  # pylint: disable=protected-access
+            state=self.states[index],
+            winner=self.winners[index],
+            coups_fourres=self.coups_fourres[index],
+            sort_hand=self.sort_hands[index],
+            running_total=sum(map(deck.VALUES.__getitem__, piles[Piles.DISTANCE])),
+            hand=tuple(map(names, piles[Piles.HAND])),
+            score_card=None,
+            safeties_pile=tuple(map(names, piles[Piles.SAFETIES])),
+            battle_pile=tuple(map(names, piles[Piles.BATTLE])),
+            speed_pile=tuple(map(names, piles[Piles.SPEED])),
+            distance_pile=tuple(map(names, piles[Piles.DISTANCE])),
+        )
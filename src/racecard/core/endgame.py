@@ -0,0 +1,128 @@
+#    Race Card - An implementation of the card game Mille Bornes
+#    Copyright (C) 2020  Krys Lawrence <krys AT krys DOT ca>
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU Affero General Public License as published
+#    by the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU Affero General Public License for more details.
+#
+#    You should have received a copy of the GNU Affero General Public License
+#    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+"""Exact solver for the end of a hand, once the draw pile is empty.
+
+With nothing left to draw, every move uses up a card, so the rest of the hand is a
+small finite game.  solve() searches all of it with max^n: each player picks the move
+that gets them the highest hand score, with ties going to the move that leaves them
+furthest ahead of their best opponent.  Positions that can be reached in several ways
+are only searched once, using a transposition table keyed by Hand.get_position_key().
+
+The search sees every player's cards, so it is exact for callers that know them all,
+i.e. servers, or bots that have guessed them.  See Hand.determinize().
+"""
+
+
+import typing
+
+from . import exceptions
+from .hand import apply_move, move_key, next_decision
+
+DEFAULT_MAX_POSITIONS = 20_000  # About one or two seconds.
+
+
+class Solution(typing.NamedTuple):
+    """The result of solve()."""
+
+    scores: typing.Dict[typing.Any, int]  # Final hand score totals, by player id.
+    # The best line of play, as (player id, Move) pairs.  A None Move declines a Coup
+    # Fourré.  See hand.next_decision().
+    moves: typing.List[typing.Tuple[typing.Any, typing.Any]]
+    positions: int  # Number of positions searched.
+
+
+class _Search:
+    """One search, with its transposition table."""
+
+    __slots__ = ("player_ids", "max_positions", "table")
+
+    def __init__(self, player_ids, max_positions):
+        self.player_ids = player_ids
+        self.max_positions = max_positions
+        # (scores by turn index, best move key) by position key.
+        self.table = {}
+
+    def solve(self, hand, pending_id):
+        """Returns the scores and the best move key for the position.
+
+        hand is used up.  See _solve_moves().
+        """
+        key = hand.get_position_key(pending_id)
+        entry = self.table.get(key)
+        if entry is not None:
+            return entry
+        if hand.is_completed:
+            score_cards = hand.get_score_cards()
+            entry = (tuple(score_cards[id_].total for id_ in self.player_ids), None)
+        else:
+            if len(self.table) >= self.max_positions:
+                raise exceptions.SearchLimitError()
+            entry = self._solve_moves(hand, pending_id)
+        self.table[key] = entry
+        return entry
+
+    def _solve_moves(self, hand, pending_id):
+        """Tries every different move of the deciding player and returns the best.
+
+        hand is used up, as the last move is made on it instead of on a copy.
+        """
+        player_id, moves = next_decision(hand, pending_id)
+        seat = self.player_ids.index(player_id)
+        cards = hand.get_cards(player_id)
+        keyed = {}
+        for move in moves:
+            keyed.setdefault(move_key(cards, move), move)
+        last_key = list(keyed)[-1]
+        best = None
+        best_rank = None
+        for key, move in keyed.items():
+            child = hand if key == last_key else hand.clone()
+            scores, _ = self.solve(child, apply_move(child, player_id, move))
+            own = scores[seat]
+            rank = (own, own - max(scores[:seat] + scores[seat + 1 :]))
+            if best_rank is None or rank > best_rank:
+                best, best_rank = (scores, key), rank
+        return best
+
+
+def solve(hand, player_id=None, max_positions=DEFAULT_MAX_POSITIONS):
+    """Searches the rest of a hand with an empty draw pile and returns a Solution.
+
+    hand is not changed.  player_id is who decides first, if they are deciding whether
+    to Coup Fourré when it is not their turn.  Otherwise it is the current player.
+    Raises CardsRemainingError if there are still cards to draw, or SearchLimitError
+    if more than max_positions positions would need to be searched.
+    """
+    if hand.cards_remaining:
+        raise exceptions.CardsRemainingError()
+    pending_id = None
+    if player_id is not None and player_id != hand.current_player_id:
+        pending_id = player_id
+    player_ids = hand.player_ids
+    search = _Search(player_ids, max_positions)
+    scores, _ = search.solve(hand.clone(), pending_id)
+    line = []
+    hand = hand.clone()
+    while not hand.is_completed:
+        _, key = search.solve(hand.clone(), pending_id)
+        player_id, moves = next_decision(hand, pending_id)
+        cards = hand.get_cards(player_id)
+        move = [move for move in moves if move_key(cards, move) == key][0]
+        line.append((player_id, move))
+        pending_id = apply_move(hand, player_id, move)
+    return Solution(dict(zip(player_ids, scores)), line, len(search.table))
@@ -0,0 +1,167 @@
+#    Race Card - An implementation of the card game Mille Bornes
+#    Copyright (C) 2020  Krys Lawrence <krys AT krys DOT ca>
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU Affero General Public License as published
+#    by the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU Affero General Public License for more details.
+#
+#    You should have received a copy of the GNU Affero General Public License
+#    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+"""Typed events published by hands and games as they are played.
+
+Subscribe callbacks to an EventBus, then pass it to Game.set_event_bus() or
+Hand.set_event_bus().  Each callback gets the events of the types it subscribed to, in
+order, once the action that caused them is done, so it can query the new state.  Hands
+and games without a bus do not even create events, so they pay nothing.
+
+Cards are deck card kinds.  See deck.NAMES.
+"""
+
+
+import dataclasses
+import typing
+
+from . import common, player
+
+
+@common.slotted
+@dataclasses.dataclass(frozen=True)
+class CardDrawn:
+    """A player drew a card from the draw or discard pile."""
+
+    player_id: typing.Any
+    card: int
+    from_discard: bool
+
+
+@common.slotted
+@dataclasses.dataclass(frozen=True)
+class CardPlayed:
+    """A player played a card from their hand.  target_id is only set for hazards."""
+
+    player_id: typing.Any
+    card: int
+    target_id: typing.Any = None
+
+
+@common.slotted
+@dataclasses.dataclass(frozen=True)
+class HazardReceived:
+    """A player received a hazard.  Follows its CardPlayed."""
+
+    player_id: typing.Any
+    card: int
+    from_id: typing.Any
+    can_coup_fourre: bool
+
+
+@common.slotted
+@dataclasses.dataclass(frozen=True)
+class CoupFourre:
+    """A player called a Coup Fourré with the given safety card."""
+
+    player_id: typing.Any
+    card: int
+
+
+@common.slotted
+@dataclasses.dataclass(frozen=True)
+class ExtensionCalled:
+    """A player called an extension of the hand."""
+
+    player_id: typing.Any
+
+
+@common.slotted
+@dataclasses.dataclass(frozen=True)
+class HandCompleted:
+    """The hand is over.  Follows the events of the action that ended it."""
+
+    winner_id: typing.Any  # None if the cards ran out first.
+    score_cards: typing.Dict[typing.Any, player.ScoreCard]  # By player id.
+
+
+@common.slotted
+@dataclasses.dataclass(frozen=True)
+class GameCompleted:
+    """The game is over.  Follows the HandCompleted of its last hand."""
+
+    winner_id: typing.Any
+    game_totals: typing.Dict[typing.Any, int]  # By player id.
+
+
+EVENT_TYPES = (
+    CardDrawn,
+    CardPlayed,
+    HazardReceived,
+    CoupFourre,
+    ExtensionCalled,
+    HandCompleted,
+    GameCompleted,
+)
+
+
+class EventQueue:
+    """Holds events until they are passed on to a bus by flush().
+
+    Games give one to their hands, so that events are only emitted once the game has
+    finished the action too, i.e. logged it.  See Game.set_event_bus().
+    """
+
+    __slots__ = ("_events",)
+
+    def __init__(self):
+        self._events = []
+
+    def emit(self, event):
+        """Holds the event until the next flush()."""
+        self._events.append(event)
+
+    def flush(self, bus):
+        """Emits all the held events to bus, in order."""
+        held, self._events = self._events, []
+        for event in held:
+            bus.emit(event)
+
+
+class EventBus:
+    """Passes events on to the callbacks subscribed to their types.
+
+    One bus can be shared by many games and hands.  Exceptions raised by callbacks are
+    not caught, so they reach whoever made the action.
+    """
+
+    __slots__ = ("_callbacks",)
+
+    def __init__(self):
+        self._callbacks = {}  # Lists of callbacks, by event type.
+
+    def subscribe(self, callback, *event_types):
+        """Calls callback(event) for every event of the given types.
+
+        Defaults to all EVENT_TYPES.
+        """
+        for event_type in event_types or EVENT_TYPES:
+            self._callbacks.setdefault(event_type, []).append(callback)
+
+    def unsubscribe(self, callback, *event_types):
+        """Undoes subscribe() with the same arguments."""
+        for event_type in event_types or EVENT_TYPES:
+            callbacks = self._callbacks.get(event_type, [])
+            if callback in callbacks:
+                callbacks.remove(callback)
+            if not callbacks:
+                self._callbacks.pop(event_type, None)
+
+    def emit(self, event):
+        """Calls every callback subscribed to the event's type."""
+        for callback in self._callbacks.get(type(event), ()):
+            callback(event)
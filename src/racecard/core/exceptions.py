@@ -20,6 +20,8 @@
 
 import typing
 
+from . import common
+
 # Base Classes
 
 
@@ -118,6 +120,21 @@ class CannotExtendError(CoreException):
     """Cannot call an extension!"""
 
 
+class CardsRemainingError(CoreException):
+    """There are still cards to draw!"""
+
+
+class SearchLimitError(CoreException):
+    """Too many positions to search!"""
+
+
+# Bot Exceptions
+
+
+class NoMoveError(CoreException):
+    """Bot did not choose a move that must be made!"""
+
+
 # Game Exceptions
 
 
@@ -143,3 +160,36 @@ class InsufficientPlayersError(CoreException):
 
 class TooManyPlayers(CoreException):
     """Too many players!  Max player count already met."""
+
+
+# Reasons
+
+# Reason codes returned by the non-raising check_* methods of Player and Hand.
+Reasons = common.Enum(  # pylint: disable=invalid-name
+    "Reasons",
+    "OK HAND_COMPLETED CANNOT_COUP_FOURRE INVALID_CARD_INDEX INVALID_CARD INVALID_PLAY "
+    "DISCARD_SAFETY EMPTY_PILE INVALID_PLAYER INVALID_TARGET OUT_OF_TURN MUST_DRAW "
+    "CANNOT_DRAW CANNOT_EXTEND",
+)
+
+_REASON_ERRORS = {
+    Reasons.HAND_COMPLETED: HandCompletedError,
+    Reasons.CANNOT_COUP_FOURRE: CannotCoupFourreError,
+    Reasons.INVALID_CARD_INDEX: InvalidCardIndexError,
+    Reasons.INVALID_CARD: InvalidCardError,
+    Reasons.INVALID_PLAY: InvalidPlayError,
+    Reasons.DISCARD_SAFETY: DiscardSafetyWarning,
+    Reasons.EMPTY_PILE: EmptyPileError,
+    Reasons.INVALID_PLAYER: InvalidPlayerError,
+    Reasons.INVALID_TARGET: InvalidTargetError,
+    Reasons.OUT_OF_TURN: OutOfTurnError,
+    Reasons.MUST_DRAW: MustDrawError,
+    Reasons.CANNOT_DRAW: CannotDrawError,
+    Reasons.CANNOT_EXTEND: CannotExtendError,
+}
+
+
+def raise_for(reason):
+    """Raises the exception that matches the given reason, unless it is Reasons.OK."""
+    if reason is not Reasons.OK:
+        raise _REASON_ERRORS[reason]()
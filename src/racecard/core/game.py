@@ -18,26 +18,35 @@
 """Top-level of core.  The Game class runs a whole game."""
 
 
+import copy
 import dataclasses
-import random
-import typing
 import uuid
 
-from . import common, config, exceptions, hand, player
+from . import actionlog, common, config, events, exceptions, hand, player, ruleset
+from .actionlog import Ops
 
 GameStates = common.Enum(  # pylint: disable=invalid-name
     "GameStates", "NOTBEGUN RUNNING COMPLETED"
 )
 
 
+_SCORE_FIELDS = tuple(field.name for field in dataclasses.fields(player.ScoreCard))
+_NO_SCORES = player.ScoreCard()  # Shared by all players until a hand is scored.
+
+
+@common.slotted
 @dataclasses.dataclass
 class _PlayerData:
     """Stores game-level player data."""
 
+    log_index: int  # Index of the player id in the action log.
     sort_hand: bool = False  # Remembers toggle_sort() choice between hands.
-    score_card: typing.Optional[player.ScoreCard] = None
+    # The sum of the player's score cards from all completed hands.  It is replaced,
+    # never changed, so it can be shared with clones.  Callers get copies.
+    score_card: player.ScoreCard = dataclasses.field(default_factory=lambda: _NO_SCORES)
 
 
+@common.slotted
 @dataclasses.dataclass
 class _GameScoreCard(player.ScoreCard):
 
@@ -58,12 +67,52 @@ class Game:
     Servers/applications should instantiate this class.
     """
 
-    def __init__(self):
+    __slots__ = (
+        "_players",
+        "_turn_order",
+        "_hands",
+        "_scored_hands",
+        "_seed",
+        "_log",
+        "winner_id",
+        "state",
+        "_instrument",
+        "_deck_pool",
+        "rng",
+        "_rules",
+        "_events",
+        "_event_queue",
+    )
+
+    def __init__(self, seed=None, deck_pool=None, rules=None):
+        """seed is for the game's random number generators.  Defaults to a random seed.
+
+        Games with the same seed, players and actions always play out the same.  The
+        turn order and each hand's deck get their own generator.  See common.make_rng().
+        deck_pool is a deck.DeckPool to shuffle the next hand's deck ahead of time, so
+        that next_hand() is faster.  It can be shared by many games.
+        rules is the ruleset.RuleSet to play by.  Defaults to the standard rules.
+        """
+        if seed is None:
+            seed = common.make_seed()
         self._players = {}  # Stores player ids and game-level player data.
         self._turn_order = []
+        # A hand.HandSummary of each earlier hand, then the current Hand.
         self._hands = []
+        self._scored_hands = 0  # Number of hands added to the players' score cards.
+        self._seed = seed
+        self._rules = ruleset.DEFAULT if rules is None else rules
+        self._log = actionlog.ActionLog(seed, rules=rules)
         self.winner_id = None
         self.state = GameStates.NOTBEGUN
+        self._instrument = None  # Only used while instrumented.  See instrument.py.
+        self._deck_pool = deck_pool
+        # A generator for the players' own use, i.e. bots breaking ties.  It is apart
+        # from the ones used for shuffling, so using it never changes the cards.
+        self.rng = common.make_rng(seed, "players")
+        self._events = None  # The events.EventBus, or None if not publishing events.
+        # Holds the events of each action until it is logged.  None without a bus.
+        self._event_queue = None
 
     # Internal Attributes
 
@@ -88,31 +137,112 @@ class Game:
         if self.state == GameStates.COMPLETED:
             raise exceptions.GameAlreadyCompleted()
 
-    def _get_game_total(self, player_id):
-        """Calculates and returns the current game total for the given player."""
-        self._ensure_begun()
-        game_total = 0
-        for hand_ in self._hands:
-            score_card = hand_.get_player_state(player_id).score_card
-            if score_card:
-                game_total += score_card.total
-        return game_total
+    def _update_score_cards(self):
+        """Adds the current hand's scores to the players' game score cards, once."""
+        if (
+            self._scored_hands == len(self._hands)
+            or not self._current_hand.is_completed
+        ):
+            return
+        self._scored_hands = len(self._hands)
+        for id_, hand_card in self._current_hand.get_score_cards().items():
+            data = self._players[id_]
+            game_card = data.score_card
+            data.score_card = player.ScoreCard(
+                *[
+                    getattr(game_card, name) + getattr(hand_card, name)
+                    for name in _SCORE_FIELDS
+                ]
+            )
+
+    def _add_player(self, player_id):
+        self._players[player_id] = _PlayerData(len(self._log.player_ids))
+        self._log.player_ids.append(player_id)
+
+    def _archive_hand(self):
+        """Replaces the completed current hand with a HandSummary, freeing the Hand."""
+        self._update_score_cards()
+        hand_number = len(self._hands)
+        actions = self._log.get_hand_actions(hand_number)
+        self._hands[-1] = self._hands[-1].summarize(actions)
+
+    def _start_hand(self):
+        if self._hands:
+            self._archive_hand()
+        self._turn_order.append(self._turn_order.pop(0))
+        # Each hand gets its own generator, so nothing depends on earlier hands' state.
+        number = len(self._hands)
+        cards = None
+        if self._deck_pool is not None:
+            rules = self._rules
+            template = rules.decks[rules.is_small_deck(len(self._players))]
+            cards = self._deck_pool.take(template, self._seed, number)
+            self._deck_pool.prefetch(template, self._seed, number + 1)
+        rng = common.make_rng(self._seed, number)
+        next_hand = hand.Hand(self._turn_order, rng, cards, self._rules)
+        next_hand.set_event_bus(self._event_queue)
+        # Preserve toggle_sort() setting between hands.
+        for id_, data in self._players.items():
+            if data.sort_hand:
+                next_hand.toggle_sort(id_)
+        self._hands.append(next_hand)
+
+    def _record(self, op, player_id=None, card_index=None, target_id=None):
+        """Appends an action to the action log."""
+        players = self._players
+        self._log.append(
+            op,
+            None if player_id is None else players[player_id].log_index,
+            card_index,
+            None if target_id is None else players[target_id].log_index,
+        )
+
+    def _replay_action(self, op, player_id, card_index, target_id, trusted):
+        # pylint: disable=too-many-arguments,too-many-return-statements
+        if op is Ops.PLAY:
+            return self.play(player_id, card_index, target_id, _trusted=trusted)
+        if op is Ops.DRAW:
+            return self.draw(player_id, _trusted=trusted)
+        if op is Ops.DRAW_DISCARD:
+            return self.draw(player_id, discard=True, _trusted=trusted)
+        if op is Ops.DISCARD:
+            return self.discard(player_id, card_index, _trusted=trusted)
+        if op is Ops.FORCED_DISCARD:
+            return self.discard(player_id, card_index, force=True, _trusted=trusted)
+        if op is Ops.COUP_FOURRE:
+            return self.coup_fourre(player_id, _trusted=trusted)
+        if op is Ops.EXTENSION:
+            return self.extension(player_id, _trusted=trusted)
+        if op is Ops.NO_EXTENSION:
+            return self.no_extension(player_id, _trusted=trusted)
+        if op is Ops.TOGGLE_SORT:
+            return self.toggle_sort(player_id, _trusted=trusted)
+        if op is Ops.NEXT_HAND:
+            return self.next_hand(_trusted=trusted)
+        return self.begin(_trusted=trusted)
+
+    def _publish(self):
+        """Emits the events of the action just made, now that it is logged."""
+        if self._event_queue is not None:
+            self._event_queue.flush(self._events)
 
     def _check_game_complete(self):
         """Checks if the game is completed and updates status accordingly."""
         self._ensure_begun()
         if self.is_completed or not self.is_hand_completed:
             return
-        game_totals = {
-            player_id: self._get_game_total(player_id) for player_id in self._players
-        }
+        game_totals = self.get_game_totals()
         if any(
-            True for total in game_totals.values() if total >= config.GAME_WIN_SCORE
+            True
+            for total in game_totals.values()
+            if total >= self._rules.game_win_score
         ):
             self.state = GameStates.COMPLETED
-            self.winner_id = max(
-                game_totals, key=lambda player_id: game_totals[player_id]
-            )
+            self.winner_id = self.leader_id
+            if self._event_queue is not None:
+                self._event_queue.emit(
+                    events.GameCompleted(self.winner_id, game_totals)
+                )
 
     @staticmethod
     def _make_player_id():
@@ -125,6 +255,43 @@ class Game:
         return uuid.uuid4()
 
     # Public Attributes
+    # NOTE: With _trusted=True, actions skip the _ensure_* checks and the hand's rule
+    #       checks.  This is only for replaying actions already known to be valid.
+
+    @classmethod
+    def replay(cls, log, trusted=False):
+        """Returns a new game rebuilt exactly from an action log.  See action_log.
+
+        With trusted=True, actions are not validated again, which is faster.  Only use
+        it for logs recorded by a real game.
+        """
+        game = cls(log.seed, rules=log.rules)
+        player_ids = log.player_ids
+        for player_id in player_ids:
+            game._add_player(player_id)  # pylint: disable=protected-access
+        for op, player_index, card_index, target_index in log:
+            # pylint: disable=protected-access
+            game._replay_action(
+                op,
+                None if player_index is None else player_ids[player_index],
+                card_index,
+                None if target_index is None else player_ids[target_index],
+                trusted,
+            )
+        return game
+
+    @property
+    def rules(self):
+        """Returns the ruleset.RuleSet the game is played by."""
+        return self._rules
+
+    @property
+    def action_log(self):
+        """Returns the log of every action so far, for Game.replay().
+
+        The log is live and must not be changed.  See actionlog.ActionLog.
+        """
+        return self._log
 
     @property
     def hand_number(self):
@@ -132,6 +299,20 @@ class Game:
         self._ensure_begun()
         return len(self._hands)
 
+    @property
+    def hand_summaries(self):
+        """Returns a hand.HandSummary of every completed hand, in order.
+
+        Only the current hand is kept whole.  Earlier ones are summarized as soon as the
+        next one starts.
+        """
+        self._ensure_begun()
+        summaries = self._hands[:-1]
+        if self._current_hand.is_completed:
+            actions = self._log.get_hand_actions(len(self._hands))
+            summaries.append(self._current_hand.summarize(actions))
+        return summaries
+
     @property
     def is_completed(self):
         """Returns True if the game is completed/finished/done."""
@@ -140,36 +321,35 @@ class Game:
     def add_player(self):
         """Adds a new player to the game and retruns their id."""
         self._ensure_not_begun()
-        if len(self._players) > config.MAX_PLAYERS:
+        if len(self._players) > self._rules.max_players:
             raise exceptions.TooManyPlayers()
         new_id = self._make_player_id()
-        self._players[new_id] = _PlayerData()
+        self._add_player(new_id)
         return new_id
 
-    def begin(self):
+    def begin(self, *, _trusted=False):
         """Begin the game or raise InsufficientPlayersError if not enough players."""
-        self._ensure_not_begun()
-        if len(self._players) < 2:
-            raise exceptions.InsufficientPlayersError()
+        if not _trusted:
+            self._ensure_not_begun()
+            if len(self._players) < 2:
+                raise exceptions.InsufficientPlayersError()
         self._turn_order = list(self._players)
+        rng = common.make_rng(self._seed)
         for _ in range(config.NUM_SHUFFLES):
-            random.shuffle(self._turn_order)
+            rng.shuffle(self._turn_order)
         self.state = GameStates.RUNNING
-        self.next_hand()
+        self._record(Ops.BEGIN)
+        self._start_hand()
 
-    def next_hand(self):
+    def next_hand(self, *, _trusted=False):
         """Creates a new hand or HandInProgressError if current one is still going."""
-        self._ensure_begun()
-        self._ensure_not_completed()
-        if self._hands and not self._current_hand.is_completed:
-            raise exceptions.HandInProgressError()
-        self._turn_order.append(self._turn_order.pop(0))
-        next_hand = hand.Hand(self._turn_order)
-        # Preserve toggle_sort() setting between hands.
-        for id_, data in self._players.items():
-            if data.sort_hand:
-                next_hand.toggle_sort(id_)
-        self._hands.append(next_hand)
+        if not _trusted:
+            self._ensure_begun()
+            self._ensure_not_completed()
+            if self._hands and not self._current_hand.is_completed:
+                raise exceptions.HandInProgressError()
+        self._record(Ops.NEXT_HAND)
+        self._start_hand()
 
     def get_hand_scores(self):
         """Returns the current hand score cards for all players.
@@ -180,32 +360,78 @@ class Game:
         self._ensure_begun()
         if not self.is_hand_completed:
             raise exceptions.HandInProgressError()
-        score_cards = {}
-        for player_id in self._players:
-            # score_card always exists because hand is guraranteed completed by check
-            # above.
-            score_card = self.get_player_state(player_id).score_card
-            # game_total includes current hand because it is guraranteed completed by
-            # check above.
-            game_total = self._get_game_total(player_id)
-            score_card = _GameScoreCard.from_score_card(score_card, game_total)
-            score_cards[player_id] = score_card
-        return score_cards
+        # game_total includes current hand because it is guraranteed completed by check
+        # above.
+        game_totals = self.get_game_totals()
+        return {
+            id_: _GameScoreCard.from_score_card(score_card, game_totals[id_])
+            for id_, score_card in self._current_hand.get_score_cards().items()
+        }
 
     def get_game_scores(self):
-        """Returns game-total score cards for all players once the game is completed."""
+        """Returns game-total score cards for all players once the game is completed.
+
+        They are copies, so changing them does not change the game.
+        """
         if not self.is_completed:
             raise exceptions.GameNotCompleted()
-        for id_, data in self._players.items():
-            if data.score_card is not None:
-                continue  # Already calculated
-            game_card = data.score_card = player.ScoreCard()
-            for hand_ in self._hands:
-                hand_card = hand_.get_player_state(id_).score_card
-                for point_type, hand_score in dataclasses.asdict(hand_card).items():
-                    current_score = getattr(game_card, point_type)
-                    setattr(game_card, point_type, current_score + hand_score)
-        return {id_: data.score_card for id_, data in self._players.items()}
+        return {
+            id_: dataclasses.replace(data.score_card)
+            for id_, data in self._players.items()
+        }
+
+    def get_game_totals(self):
+        """Returns the game total of every player, by id, from all completed hands."""
+        self._ensure_begun()
+        self._update_score_cards()
+        return {id_: data.score_card.total for id_, data in self._players.items()}
+
+    @property
+    def leader_id(self):
+        """Returns the id of the player with the highest game total so far."""
+        game_totals = self.get_game_totals()
+        return max(game_totals, key=game_totals.__getitem__)
+
+    def clone(self):
+        """Returns an independent copy of the game, i.e. for searching ahead.
+
+        Summaries of completed hands never change, so they are shared with the clone.
+        Only the current hand is copied, so the cost does not grow with the number of
+        hands.
+        """
+        clone = common.shallow_copy(self)
+        clone._players = {
+            id_: common.shallow_copy(data) for id_, data in self._players.items()
+        }
+        clone._log = self._log.clone()
+        clone.rng = copy.copy(self.rng)
+        clone._turn_order = self._turn_order[:]
+        clone._hands = self._hands[:]
+        if self._hands:
+            clone._hands[-1] = self._hands[-1].clone()
+        if self._instrument is not None:
+            # Searching ahead on the clone must not count towards this game's stats.
+            clone.__class__ = Game
+            clone._instrument = None
+        clone._events = None
+        clone._event_queue = None
+        return clone
+
+    def set_event_bus(self, bus):
+        """Publishes the events of the game and all its hands to bus from now on.
+
+        bus is an events.EventBus, or None to stop publishing.  Clones never publish.
+        The events of each action are emitted once the game has logged it.
+        """
+        self._events = bus
+        self._event_queue = None if bus is None else events.EventQueue()
+        if self._hands:
+            self._current_hand.set_event_bus(self._event_queue)
+
+    def clone_hand(self):
+        """Returns an independent copy of the current hand, i.e. for searching ahead."""
+        self._ensure_begun()
+        return self._current_hand.clone()
 
     # Overridden Hand attributes
 
@@ -223,7 +449,7 @@ class Game:
         self._ensure_begun()
         return self._current_hand.winner_id
 
-    def play(self, player_id, card_index, targed_id=None):
+    def play(self, player_id, card_index, targed_id=None, *, _trusted=False):
         """Passes a play to the current hand and returns the result.
 
         Also updates game state when necessary (i.e. winning the whole game).
@@ -233,40 +459,79 @@ class Game:
         automatically selected as the target.
         """
         # This overrides Hand.play to include extra game-level logic.
-        self._ensure_begun()
-        self._ensure_not_completed()
-        result = self._current_hand.play(player_id, card_index, targed_id)
-        if result == hand.PlayResults.WIN_CANNOT_EXTEND:
-            self._check_game_complete()
+        if not _trusted:
+            self._ensure_begun()
+            self._ensure_not_completed()
+        if card_index < 0:
+            # The log only holds indexes from the start of the hand.
+            card_index = self._current_hand.resolve_card_index(player_id, card_index)
+        result = self._current_hand.play(
+            player_id, card_index, targed_id, _trusted=_trusted
+        )
+        self._record(Ops.PLAY, player_id, card_index, targed_id)
+        self._check_game_complete()
+        self._publish()
         return result
 
-    def toggle_sort(self, player_id):
+    def coup_fourre(self, player_id, *, _trusted=False):
+        """Triggers a Coup Fourré if possible."""
+        # This overrides Hand.coup_fourre to include extra game-level logic.
+        if not _trusted:
+            self._ensure_begun()
+            self._ensure_not_completed()
+        result = self._current_hand.coup_fourre(player_id, _trusted=_trusted)
+        self._record(Ops.COUP_FOURRE, player_id)
+        self._check_game_complete()
+        self._publish()
+        return result
+
+    def make_move(self, player_id, move):
+        """Makes the given Move, as returned by legal_moves(), and returns any result.
+
+        DISCARD moves are forced, so they can discard Safety cards.
+        """
+        # This overrides Hand.make_move so that the game-level logic above also runs.
+        return hand.make_move(self, player_id, move)
+
+    def toggle_sort(self, player_id, *, _trusted=False):
         """Toggles whether or not a player's hand should always be sorted."""
         # This overrides Hand.play to include extra game-level logic.
-        self._ensure_begun()
-        self._ensure_not_completed()
+        if not _trusted:
+            self._ensure_begun()
+            self._ensure_not_completed()
         self._current_hand.toggle_sort(player_id)
         self._players[player_id].sort_hand = not self._players[player_id].sort_hand
+        self._record(Ops.TOGGLE_SORT, player_id)
 
-    def discard(self, player_id, card_index, force=False):
+    def discard(self, player_id, card_index, force=False, *, _trusted=False):
         """Discards a card from the player's hand.
 
         Attempting to discard a Safety will raise DiscardSafetyWarning unless force is
         set to True.
         """
         # This overrides Hand.play to include extra game-level logic.
-        self._ensure_begun()
-        self._ensure_not_completed()
-        self._current_hand.discard(player_id, card_index, force)
+        if not _trusted:
+            self._ensure_begun()
+            self._ensure_not_completed()
+        if card_index < 0:
+            # The log only holds indexes from the start of the hand.
+            card_index = self._current_hand.resolve_card_index(player_id, card_index)
+        self._current_hand.discard(player_id, card_index, force, _trusted=_trusted)
+        op = Ops.FORCED_DISCARD if force else Ops.DISCARD
+        self._record(op, player_id, card_index)
         self._check_game_complete()
+        self._publish()
 
-    def no_extension(self, player_id):
+    def no_extension(self, player_id, *, _trusted=False):
         """Signal that an extension was declined and the hand should complete."""
         # This overrides Hand.play to include extra game-level logic.
-        self._ensure_begun()
-        self._ensure_not_completed()
-        self._current_hand.no_extension(player_id)
+        if not _trusted:
+            self._ensure_begun()
+            self._ensure_not_completed()
+        self._current_hand.no_extension(player_id, _trusted=_trusted)
+        self._record(Ops.NO_EXTENSION, player_id)
         self._check_game_complete()
+        self._publish()
 
     # Non-overridden Hand attributes
 
@@ -297,25 +562,49 @@ class Game:
         self._ensure_begun()
         return self._current_hand.top_discarded_card
 
-    def draw(self, player_id, discard=False):
-        """Draw a card from either the draw or discard pile."""
-        self._ensure_begun()
-        self._ensure_not_completed()
-        self._current_hand.draw(player_id, discard)
-
-    def coup_fourre(self, player_id):
-        """Triggers a Coup Fourré if possible."""
+    def legal_moves(self, player_id):
+        """Returns a list of every Move the given player can legally make right now."""
         self._ensure_begun()
-        self._ensure_not_completed()
-        self._current_hand.coup_fourre(player_id)
+        return self._current_hand.legal_moves(player_id)
 
-    def extension(self, player_id):
+    def draw(self, player_id, discard=False, *, _trusted=False):
+        """Draw a card from either the draw or discard pile."""
+        if not _trusted:
+            self._ensure_begun()
+            self._ensure_not_completed()
+        self._current_hand.draw(player_id, discard, _trusted=_trusted)
+        self._record(Ops.DRAW_DISCARD if discard else Ops.DRAW, player_id)
+        self._publish()
+
+    def extension(self, player_id, *, _trusted=False):
         """Call an extension to the game."""
-        self._ensure_begun()
-        self._ensure_not_completed()
-        self._current_hand.extension(player_id)
+        if not _trusted:
+            self._ensure_begun()
+            self._ensure_not_completed()
+        self._current_hand.extension(player_id, _trusted=_trusted)
+        self._record(Ops.EXTENSION, player_id)
+        self._publish()
 
     def get_player_state(self, player_id):
         """Returns the state of the given player."""
         self._ensure_begun()
         return self._current_hand.get_player_state(player_id)
+
+    def get_cards(self, player_id):
+        """Returns the deck card kinds in the given player's hand, in hand order."""
+        self._ensure_begun()
+        return self._current_hand.get_cards(player_id)
+
+    def get_summary(self, player_id):
+        """Returns the player.PileSummary of the given player."""
+        self._ensure_begun()
+        return self._current_hand.get_summary(player_id)
+
+    def get_view(self, viewer_id=None):
+        """Returns a hand.View of the current hand as viewer_id can see it.
+
+        Use this rather than get_player_state() to show players what their opponents
+        have, as it leaves out the opponents' hands.
+        """
+        self._ensure_begun()
+        return self._current_hand.get_view(viewer_id)
@@ -18,18 +18,113 @@
 """Code to run/handle one hand of Race Card.  This is the heart of the game."""
 
 
-from . import common, config, deck, exceptions, player, tray
+import dataclasses
+import typing
+
+from . import common, deck, delta, events, exceptions, player, ruleset, tray
+from .exceptions import Reasons
 
 PlayResults = common.Enum(  # pylint: disable=invalid-name
     "PlayResults",
     "OK CAN_COUP_FOURRE WIN_CAN_EXTEND WIN_CANNOT_EXTEND COMPLETED_NO_WINNER",
 )
 
+Actions = common.Enum(  # pylint: disable=invalid-name
+    "Actions", "DRAW DRAW_DISCARD PLAY DISCARD COUP_FOURRE EXTENSION NO_EXTENSION"
+)
+
+
+class Move(typing.NamedTuple):
+    """A legal move, as returned by Hand.legal_moves().
+
+    card_index is only used by PLAY and DISCARD, and target_id only by hazard PLAYs.
+    """
+
+    action: typing.Any  # One of Actions.
+    card_index: typing.Optional[int] = None
+    target_id: typing.Any = None
+
+
+@common.slotted
+@dataclasses.dataclass(frozen=True)
+class HandSummary:
+    """What is kept of a completed hand once its Hand is freed.  See Hand.summarize().
+
+    Piles are bytes of deck card kinds, from bottom to top.  piles holds each player's
+    hand, safeties, battle, speed and distance piles, as in Player.get_piles().
+    """
+
+    player_ids: tuple  # In turn order.
+    winner_id: typing.Any
+    rounds: int
+    extended: bool
+    score_cards: typing.Dict[typing.Any, player.ScoreCard]  # By player id.
+    piles: typing.Dict[typing.Any, typing.Tuple[bytes, ...]]  # By player id.
+    draw_pile: bytes
+    discard_pile: bytes
+    actions: typing.Optional[bytes] = None  # See actionlog.iter_actions().
+
+    def get_score_cards(self):
+        """Returns the ScoreCard of every player, by id, as Hand.get_score_cards()."""
+        return dict(self.score_cards)
+
+
+class PublicView(typing.NamedTuple):
+    """What everyone can see of a hand.  Shared by all viewers.  See Hand.get_view().
+
+    players holds each player's state, by id, as Player.get_public_state().
+    """
+
+    players: typing.Dict[typing.Any, typing.Any]
+    hand_sizes: typing.Dict[typing.Any, int]  # By player id.
+    current_player_id: typing.Any
+    round_number: int
+    cards_remaining: int
+    top_discarded_card: typing.Optional[str]  # None if the discard pile is empty.
+    is_completed: bool
+    winner_id: typing.Any
+
+
+class View(typing.NamedTuple):
+    """What one viewer can see of a hand: the public part and their own hand."""
+
+    public: PublicView
+    viewer_id: typing.Any  # None for spectators.
+    hand: typing.Tuple[str, ...] = ()  # Card names, in hand order.
+
 
 class Hand:
     """Represents and runs one hand of the game, consisting of several rounds."""
 
-    def __init__(self, player_ids_in_turn_order):
+    __slots__ = (
+        "round_number",
+        "winner_id",
+        "is_completed",
+        "_turn_index",
+        "_extended",
+        "_last_target",
+        "_players",
+        "_turn_order",
+        "_small_deck",
+        "_tray",
+        "_win_score",
+        "_deltas",
+        "_delta_players",
+        "_instrument",
+        "_rules",
+        "_events",
+        "_version",
+        "_views",
+    )
+
+    def __init__(self, player_ids_in_turn_order, rng=None, cards=None, rules=None):
+        """rng is the random number generator for the deck.  See deck.shuffle_deck().
+
+        cards is an already shuffled deck to use instead, i.e. from a deck.DeckPool.
+        rules is the ruleset.RuleSet to play by.  Defaults to the standard rules.
+        """
+        rules = ruleset.DEFAULT if rules is None else rules
+        self._rules = rules
         self.round_number = 1
         self.winner_id = None
         self.is_completed = False
@@ -37,14 +132,25 @@ class Hand:
         self._extended = False
         self._last_target = None
         self._players = {
-            player_id: player.Player() for player_id in player_ids_in_turn_order
+            player_id: player.Player(rules) for player_id in player_ids_in_turn_order
         }
-        self._small_deck = len(self._players) < config.LARGE_DECK_PLAYERS
-        self._tray = tray.Tray(deck.make_deck(self._small_deck))
-        self._win_score = (
-            config.SMALL_WIN_SCORE if self._small_deck else config.LARGE_WIN_SCORE
-        )
+        # NOTE: The turn order is fixed for the whole hand, so it is never changed or
+        #       copied.
+        self._turn_order = tuple(self._players)  # Player ids by turn index.
+        self._small_deck = rules.is_small_deck(len(self._players))
+        if cards is None:
+            cards = deck.shuffle_deck(rules.decks[self._small_deck], rng)
+        self._tray = tray.Tray(cards)
+        self._win_score = rules.win_scores[self._small_deck]
         self._deal_cards()
+        self._deltas = None  # The recorded Deltas, or None if not tracking them.
+        self._delta_players = None  # (version, status) of each player, by turn index.
+        self._instrument = None  # Only used while instrumented.  See instrument.py.
+        self._events = None  # The events.EventBus, or None if not publishing events.
+        # NOTE: The version changes with every action, so get_view() can reuse the
+        #       views it made while it is unchanged.
+        self._version = 0
+        self._views = None  # (version, PublicView, Views by viewer id) or None.
 
     # Internal Attributes
 
@@ -65,10 +171,12 @@ class Hand:
         )
 
     def _deal_cards(self):
+        """Deals every hand at once, as if dealt one card at a time in turn order."""
         self._ensure_not_completed()
-        for _ in range(config.MAX_CARDS_IN_HAND - 1):
-            for id_ in self._players:
-                self._players[id_].recieve_card(self._tray.draw())
+        num_players = len(self._turn_order)
+        cards = self._tray.deal((self._rules.max_cards_in_hand - 1) * num_players)
+        for index, player_ in enumerate(self._players.values()):
+            player_.replace_hand(cards[index::num_players])
 
     def _ensure_completed(self):
         if not self.is_completed:
@@ -78,73 +186,76 @@ class Hand:
         if self.is_completed:
             raise exceptions.HandCompletedError()
 
-    def _ensure_player_turn(self, player_id):
-        if not player_id == self.current_player_id:
-            raise exceptions.OutOfTurnError()
-
-    def _ensure_hand_full(self, player_):
-        """Checks that the player's hand is full or there are no more cards to draw."""
-        if not player_.is_hand_full and self.cards_remaining > 0:
-            raise exceptions.MustDrawError()
-
-    def _ensure_can_draw(self, player_):
-        """Checks that the player can draw a card unless there are no more to draw."""
-        if player_.is_hand_full or not self.cards_remaining:
-            raise exceptions.CannotDrawError()
-
     def _get_player(self, player_id):
         """Validates the given player id and returns the corresponding player."""
         if player_id not in self._players:
             raise exceptions.InvalidPlayerError()
         return self._players[player_id]
 
-    def _resolve_target(self, player_id, target_id, card_type):
-        """Returns the targed player or None if not applicable."""
-        if card_type is deck.HazardCard:
-            if target_id is None and len(self._players) == 2:
-                target_id = [id_ for id_ in self._players if id_ != player_id][0]
-            if target_id not in self._players:
-                raise exceptions.InvalidTargetError()
-            return self._players[target_id]
-        return None
+    def _check_turn(self, player_id):
+        """Checks that the hand is not completed and that it is the player's turn."""
+        if self.is_completed:
+            return Reasons.HAND_COMPLETED
+        if player_id not in self._players:
+            return Reasons.INVALID_PLAYER
+        if player_id != self.current_player_id:
+            return Reasons.OUT_OF_TURN
+        return Reasons.OK
+
+    def _check_hand_full(self, player_):
+        """Checks that the player's hand is full or there are no more cards to draw."""
+        if not player_.is_hand_full and self._tray.cards_remaining > 0:
+            return Reasons.MUST_DRAW
+        return Reasons.OK
+
+    def _resolve_target_id(self, player_id, target_id):
+        """Returns the target id, or the opponent in 2-player games if it is None."""
+        if target_id is None and len(self._players) == 2:
+            target_id = [id_ for id_ in self._players if id_ != player_id][0]
+        return target_id
 
     def _next_turn(self):
-        """Advances to the next turn and increments the round if necessary."""
-        turn_index = self._turn_index
-        turn_index += 1
-        if turn_index >= len(self._players):
-            self.round_number += 1
-            turn_index = 0
-        self._turn_index = turn_index
-
-    @staticmethod
-    def _play_safetycard(player_, card_index, _):
+        """Advances to the next turn and increments the round if necessary.
+
+        Once the draw pile is empty, players with no cards left cannot do anything, so
+        their turns are skipped.
+        """
+        turn_order = self._turn_order
+        for _ in turn_order:
+            turn_index = self._turn_index
+            turn_index += 1
+            if turn_index >= len(turn_order):
+                self.round_number += 1
+                turn_index = 0
+            self._turn_index = turn_index
+            if (
+                self._tray.cards_remaining
+                or not self._players[turn_order[turn_index]].is_hand_empty
+            ):
+                break
+
+    def _play_safety(self, player_, card_index, _):  # pylint: disable=no-self-use
         """Handler for playing Safety cards."""
-        player_.play_safety(card_index)
+        player_.play_safety(card_index, _trusted=True)
         return PlayResults.OK
 
-    @staticmethod
-    def _play_remedycard(player_, card_index, _):
+    def _play_remedy(self, player_, card_index, _):  # pylint: disable=no-self-use
         """Handler for playing Remedy cards."""
-        player_.play_remedy(card_index)
+        player_.play_remedy(card_index, _trusted=True)
         return PlayResults.OK
 
-    def _play_hazardcard(self, player_, card_index, target):
+    def _play_hazard(self, player_, card_index, target):
         """Handler for playing Hazard cards."""
-        card = player_.play_hazard(card_index)
-        try:
-            target.recieve_hazard(card)
-        except exceptions.InvalidPlayError:
-            player_.recieve_card(card)
-            raise
+        card = player_.play_hazard(card_index, _trusted=True)
+        target.recieve_hazard(card, _trusted=True)
         if target.can_coup_fourre:
             self._last_target = target
             return PlayResults.CAN_COUP_FOURRE
         return PlayResults.OK
 
-    def _play_distancecard(self, player_, card_index, _):
+    def _play_distance(self, player_, card_index, _):
         """Handler for playing Distance cards."""
-        is_winner = player_.play_distance(card_index, self._win_score)
+        is_winner = player_.play_distance(card_index, self._win_score, _trusted=True)
         if not is_winner:
             return PlayResults.OK
         if is_winner and self._can_extend:
@@ -178,12 +289,78 @@ class Hand:
             self._next_turn()
         return result
 
+    def _make_public_view(self):
+        states = {}
+        hand_sizes = {}
+        for id_, player_ in self._players.items():
+            states[id_] = player_.get_public_state()
+            hand_sizes[id_] = len(player_.get_state().hand)
+        tray_ = self._tray
+        return PublicView(
+            states,
+            hand_sizes,
+            self.current_player_id,
+            self.round_number,
+            tray_.cards_remaining,
+            deck.NAMES[tray_.top_discarded_card] if tray_.cards_discarded else None,
+            self.is_completed,
+            self.winner_id,
+        )
+
+    def _publish(self, *new_events):
+        """Emits the events of the action just made.  Only used with an event bus.
+
+        Also emits HandCompleted if the action ended the hand.
+        """
+        bus = self._events
+        for event in new_events:
+            bus.emit(event)
+        if self.is_completed:
+            bus.emit(events.HandCompleted(self.winner_id, self.get_score_cards()))
+
+    def _add_delta(self, moves=(), hands=()):
+        """Records the Delta of the action just made.  Only used when tracking deltas.
+
+        Player versions tell which players might have changed, so only those have
+        their status compared.
+        """
+        changes = []
+        last = self._delta_players
+        for index, player_id in enumerate(self._turn_order):
+            player_ = self._players[player_id]
+            version = player_.version
+            if version != last[index][0]:
+                status = player_.status
+                if status != last[index][1]:
+                    changes.append(delta.PlayerChange(index, *status))
+                last[index] = (version, status)
+        self._deltas.append(
+            delta.Delta(
+                tuple(moves),
+                tuple(changes),
+                tuple(hands),
+                self._turn_index,
+                self.round_number,
+                self._tray.cards_remaining,
+            )
+        )
+
     # Public Attributes
 
+    @property
+    def player_ids(self):
+        """Returns the ids of the players, in turn order."""
+        return self._turn_order
+
+    @property
+    def rules(self):
+        """Returns the ruleset.RuleSet the hand is played by."""
+        return self._rules
+
     @property
     def current_player_id(self):
         """Returns the id of the current player."""
-        return tuple(self._players)[self._turn_index]
+        return self._turn_order[self._turn_index]
 
     @property
     def cards_remaining(self):
@@ -192,98 +369,620 @@ class Hand:
 
     @property
     def top_discarded_card(self):
-        """Returns the top card on the discarded pile.
+        """Returns the name of the top card on the discarded pile.
 
         Note: It does not remove the card from the pile. It just peeks at it.
         """
-        return self._tray.top_discarded_card
+        return deck.NAMES[self._tray.top_discarded_card]
+
+    def get_score_cards(self):
+        """Returns the ScoreCard of every player, by id, once the hand is completed."""
+        self._ensure_completed()
+        return {id_: player_.score_card for id_, player_ in self._players.items()}
 
     def get_player_state(self, player_id):
         """Returns the state of the given player."""
         return self._get_player(player_id).get_state()
 
-    def draw(self, player_id, discard=False):
-        """Draw a card from either the draw or discard pile."""
-        self._ensure_not_completed()
+    def summarize(self, actions=None):
+        """Returns a HandSummary of the completed hand.
+
+        actions is the hand's part of the game's action log, as bytes, if it is to be
+        kept.  See actionlog.ActionLog.get_hand_actions().
+        """
+        self._ensure_completed()
+        return HandSummary(
+            self._turn_order,
+            self.winner_id,
+            self.round_number,
+            self._extended,
+            self.get_score_cards(),
+            {id_: player_.get_piles() for id_, player_ in self._players.items()},
+            self._tray.draw_pile,
+            self._tray.discard_pile,
+            actions,
+        )
+
+    def get_cards(self, player_id):
+        """Returns the deck card kinds in the given player's hand, in hand order."""
+        return self._get_player(player_id).hand
+
+    def get_summary(self, player_id):
+        """Returns the player.PileSummary of the given player."""
+        return self._get_player(player_id).summary
+
+    def resolve_card_index(self, player_id, card_index):
+        """Returns card_index as an index from the start of the given player's hand.
+
+        See Player.resolve_card_index().
+        """
+        return self._get_player(player_id).resolve_card_index(card_index)
+
+    def track_deltas(self):
+        """Starts recording a delta.Delta for every action.  See pop_deltas().
+
+        Clients can mirror the hand by applying get_snapshot() and then every Delta
+        to a new delta.Mirror.  See get_mirror().
+        """
+        if self._deltas is None:
+            self._deltas = []
+            self._delta_players = [
+                (player_.version, player_.status) for player_ in self._players.values()
+            ]
+
+    def pop_deltas(self):
+        """Returns the Deltas recorded since the last call, oldest first."""
+        deltas = self._deltas
+        if deltas is None:
+            return []
+        self._deltas = []
+        return deltas
+
+    def get_snapshot(self):
+        """Returns a Delta that turns a new delta.Mirror into a copy of the hand."""
+        moves = []
+        for index, player_id in enumerate(self._turn_order):
+            player_ = self._players[player_id]
+            for pile, cards in zip(delta.PLAYER_PILES, player_.get_piles()):
+                moves.extend(
+                    delta.CardMove(card, None, None, None, pile, index, None)
+                    for card in cards
+                )
+        moves.extend(
+            delta.CardMove(card, None, None, None, delta.Piles.DISCARD, None, None)
+            for card in self._tray.discard_pile
+        )
+        changes = [
+            delta.PlayerChange(index, *self._players[player_id].status)
+            for index, player_id in enumerate(self._turn_order)
+        ]
+        return delta.Delta(
+            tuple(moves),
+            tuple(changes),
+            (),
+            self._turn_index,
+            self.round_number,
+            self._tray.cards_remaining,
+        )
+
+    def get_position_key(self, pending_id=None):
+        """Returns a hashable summary of everything that decides how the hand can go on.
+
+        Hands with equal keys have the same moves and final scores from now on.  The
+        draw and discard piles are left out, so only compare hands with the same draw
+        pile.
+        pending_id is as for next_decision().
+        """
+        last_target_index = None
+        if self._last_target is not None:
+            last_target_index = list(self._players.values()).index(self._last_target)
+        return (
+            self._turn_index,
+            self._extended,
+            self.is_completed,
+            last_target_index,
+            pending_id,
+            tuple(player_.get_position_key() for player_ in self._players.values()),
+        )
+
+    def get_view(self, viewer_id=None):
+        """Returns a View of the hand as viewer_id can see it.
+
+        Opponents' hands are left out.  viewer_id None is for spectators, who see no
+        hand at all.  The public part is only built once per action and shared, and each
+        View is reused until the next action.
+        """
+        views = self._views
+        if views is None or views[0] != self._version:
+            views = self._views = (self._version, self._make_public_view(), {})
+        view = views[2].get(viewer_id)
+        if view is None:
+            cards = ()
+            if viewer_id is not None:
+                cards = self._get_player(viewer_id).get_state().hand
+            view = views[2][viewer_id] = View(views[1], viewer_id, cards)
+        return view
+
+    def set_event_bus(self, bus):
+        """Publishes events to bus, an events.EventBus, from now on.
+
+        None stops publishing.  Clones never publish.
+        """
+        self._events = bus
+
+    def get_mirror(self):
+        """Returns a new delta.Mirror of the hand.  See track_deltas()."""
+        mirror = delta.Mirror(self._turn_order)
+        mirror.apply(self.get_snapshot())
+        return mirror
+
+    def legal_moves(self, player_id):
+        """Returns a list of every Move the given player can legally make right now.
+
+        Moves are worked out from the current state without trying them, so nothing
+        is played and no exceptions are raised for invalid plays.
+        Hazards are only offered against opponents.  DISCARD moves of Safety cards
+        need force=True.  See discard().
+        """
         player_ = self._get_player(player_id)
-        self._ensure_player_turn(player_id)
-        self._ensure_can_draw(player_)
-        player_.recieve_card(self._tray.draw(discard))
+        if self.is_completed:
+            return []
+        moves = []
+        if player_ is self._last_target and player_.can_coup_fourre:
+            moves.append(Move(Actions.COUP_FOURRE))
+        if player_id != self.current_player_id:
+            return moves
+        if player_.is_winner:
+            # The hand is waiting for an extension to be called or declined.
+            if self._can_extend:
+                moves.append(Move(Actions.EXTENSION))
+                moves.append(Move(Actions.NO_EXTENSION))
+            return moves
+        if not player_.is_hand_full and self.cards_remaining:
+            moves.append(Move(Actions.DRAW))
+            if self._tray.cards_discarded:
+                moves.append(Move(Actions.DRAW_DISCARD))
+            return moves
+        opponents = [
+            (id_, opponent)
+            for id_, opponent in self._players.items()
+            if id_ != player_id
+        ]
+        targets_by_card = {}  # Each card kind is only checked once.
+        hand_cards = player_.hand
+        for card_index, card in enumerate(hand_cards):
+            targets = targets_by_card.get(card)
+            if targets is None:
+                if deck.CATEGORY[card] == deck.HAZARD:
+                    targets = [
+                        id_
+                        for id_, opponent in opponents
+                        if opponent.can_recieve_hazard(card)
+                    ]
+                elif player_.can_play(card, self._win_score):
+                    targets = [None]
+                else:
+                    targets = []
+                targets_by_card[card] = targets
+            for target_id in targets:
+                moves.append(Move(Actions.PLAY, card_index, target_id))
+        for card_index in range(len(hand_cards)):
+            moves.append(Move(Actions.DISCARD, card_index))
+        return moves
+
+    def clone(self):
+        """Returns an independent copy of the hand, i.e. for searching ahead.
+
+        Costs about the same at any point in the hand.  See Player.clone().
+        """
+        clone = Hand.__new__(Hand)
+        clone.round_number = self.round_number
+        clone.winner_id = self.winner_id
+        clone.is_completed = self.is_completed
+        clone._turn_index = self._turn_index
+        clone._extended = self._extended
+        clone._last_target = None
+        clone._players = {}
+        for player_id, player_ in self._players.items():
+            clone._players[player_id] = player_clone = player_.clone()
+            if player_ is self._last_target:
+                clone._last_target = player_clone
+        clone._turn_order = self._turn_order
+        clone._small_deck = self._small_deck
+        clone._tray = self._tray.clone()
+        clone._win_score = self._win_score
+        clone._deltas = None
+        clone._delta_players = None
+        clone._instrument = None
+        clone._rules = self._rules
+        clone._events = None
+        clone._version = self._version
+        clone._views = None
+        return clone
+
+    def determinize(self, viewer_id, rng):
+        """Returns a copy of the hand with everything viewer_id cannot see reshuffled.
+
+        The cards that viewer_id has not seen (the opponents' hands and the draw pile)
+        are shuffled with rng, the random.Random to use, and dealt back out in the same
+        numbers.  This gives one possible version of the hand for searching ahead.
+        """
+        clone = self.clone()
+        unseen = [0] * deck.NUM_KINDS
+        for card in self._rules.decks[self._small_deck]:
+            unseen[card] += 1
+        seen = [self._players[viewer_id].hand, self._tray.discard_pile]
+        for player_ in self._players.values():
+            seen.extend(player_.get_piles()[1:])
+        for pile in seen:
+            for card in pile:
+                unseen[card] -= 1
+        cards = bytearray()
+        for card, count in enumerate(unseen):
+            cards.extend([card] * count)
+        rng.shuffle(cards)
+        for player_id, player_ in clone._players.items():
+            if player_id != viewer_id:
+                count = len(player_.hand)
+                player_.replace_hand(cards[:count])
+                del cards[:count]
+        clone._tray.replace_draw_pile(cards)
+        return clone
+
+    # Rule Checks
+    # NOTE: These never raise exceptions or change anything.  They return Reasons.OK if
+    #       the matching action would succeed, or else the reason it would fail.
+
+    def check_draw(self, player_id, discard=False):
+        """Checks draw()."""
+        reason = self._check_turn(player_id)
+        if reason is not Reasons.OK:
+            return reason
+        player_ = self._players[player_id]
+        if player_.is_hand_full or not self._tray.cards_remaining:
+            return Reasons.CANNOT_DRAW
+        if discard and not self._tray.cards_discarded:
+            return Reasons.EMPTY_PILE
+        return player_.check_recieve_card()
+
+    def check_discard(self, player_id, card_index, force=False):
+        """Checks discard()."""
+        reason = self._check_turn(player_id)
+        if reason is not Reasons.OK:
+            return reason
+        player_ = self._players[player_id]
+        reason = self._check_hand_full(player_)
+        if reason is not Reasons.OK:
+            return reason
+        return player_.check_discard(card_index, force)
+
+    def check_play(self, player_id, card_index, target_id=None):
+        """Checks play()."""
+        reason = self._check_turn(player_id)
+        if reason is not Reasons.OK:
+            return reason
+        player_ = self._players[player_id]
+        reason = self._check_hand_full(player_)
+        if reason is not Reasons.OK:
+            return reason
+        reason = player_.check_card_index(card_index)
+        if reason is not Reasons.OK:
+            return reason
+        card = player_.card(card_index)
+        category = deck.CATEGORY[card]
+        if category == deck.HAZARD:
+            target_id = self._resolve_target_id(player_id, target_id)
+            if target_id not in self._players:
+                return Reasons.INVALID_TARGET
+            return self._players[target_id].check_recieve_hazard(card)
+        if category == deck.REMEDY:
+            return player_.check_remedy(card_index)
+        if category == deck.DISTANCE:
+            return player_.check_distance(card_index, self._win_score)
+        return player_.check_safety(card_index)
+
+    def check_coup_fourre(self, player_id):
+        """Checks coup_fourre()."""
+        if self.is_completed:
+            return Reasons.HAND_COMPLETED
+        if player_id not in self._players:
+            return Reasons.INVALID_PLAYER
+        player_ = self._players[player_id]
+        # Even if multiple players think they can Coup Fourré, only the player that last
+        # recieved a hazard card is allowed to Coup Fourré.
+        if player_ is not self._last_target:
+            return Reasons.CANNOT_COUP_FOURRE
+        return player_.check_coup_fourre()
 
-    def discard(self, player_id, card_index, force=False):
+    def check_extension(self, player_id):
+        """Checks extension() and no_extension()."""
+        reason = self._check_turn(player_id)
+        if reason is not Reasons.OK:
+            return reason
+        if not self._can_extend or not self._players[player_id].is_winner:
+            return Reasons.CANNOT_EXTEND
+        return Reasons.OK
+
+    # Actions
+
+    # NOTE: With _trusted=True, the rule checks are skipped.  This is only for replaying
+    #       actions that are already known to be valid.  See Game.replay().
+
+    def draw(self, player_id, discard=False, *, _trusted=False):
+        """Draw a card from either the draw or discard pile."""
+        if not _trusted:
+            exceptions.raise_for(self.check_draw(player_id, discard))
+        self._version += 1
+        card = self._tray.draw(discard)
+        hand_index = self._players[player_id].recieve_card(card, _trusted=True)
+        if self._deltas is not None:
+            source = delta.Piles.DISCARD if discard else delta.Piles.DRAW
+            index = self._turn_order.index(player_id)
+            self._add_delta(
+                (
+                    delta.CardMove(
+                        card, source, None, None, delta.Piles.HAND, index, hand_index
+                    ),
+                )
+            )
+        if self._events is not None:
+            self._publish(events.CardDrawn(player_id, card, discard))
+
+    def discard(self, player_id, card_index, force=False, *, _trusted=False):
         """Discards a card from the player's hand.
 
         Attempting to discard a Safety will raise DiscardSafetyWarning unless force is
         set to True.
         """
-        self._ensure_not_completed()
-        player_ = self._get_player(player_id)
-        self._ensure_player_turn(player_id)
-        self._ensure_hand_full(player_)
-        card = player_.discard(card_index, force)
+        if not _trusted:
+            exceptions.raise_for(self.check_discard(player_id, card_index, force))
+        self._version += 1
+        player_ = self._players[player_id]
+        if card_index < 0:
+            # Deltas only hold indexes from the start of the hand.
+            card_index = player_.resolve_card_index(card_index)
+        card = player_.discard(card_index, force, _trusted=True)
         self._tray.discard(card)
-        return self._check_no_more_cards()
+        result = self._check_no_more_cards()
+        if self._deltas is not None:
+            index = self._turn_order.index(player_id)
+            self._add_delta(
+                (
+                    delta.CardMove(
+                        card,
+                        delta.Piles.HAND,
+                        index,
+                        card_index,
+                        delta.Piles.DISCARD,
+                        None,
+                        None,
+                    ),
+                )
+            )
+        if self._events is not None:
+            self._publish()
+        return result
 
-    def play(self, player_id, card_index, target_id=None):
+    def play(self, player_id, card_index, target_id=None, *, _trusted=False):
         """Dispatches a card play to the appropriate handler and returns any result.
 
         target_id is only used for hazards.
         If target_id is None, and this is a 2-player game, then the other player is
         automatically selected as the target.
         """
-        self._ensure_not_completed()
-        player_ = self._get_player(player_id)
-        self._ensure_player_turn(player_id)
-        self._ensure_hand_full(player_)
-        card_type = player_.card_type(card_index)
-        target = self._resolve_target(player_id, target_id, card_type)
+        if not _trusted:
+            exceptions.raise_for(self.check_play(player_id, card_index, target_id))
+        self._version += 1
+        player_ = self._players[player_id]
+        if card_index < 0:
+            # Deltas only hold indexes from the start of the hand.
+            card_index = player_.resolve_card_index(card_index)
+        card = player_.card(card_index)
+        card_type, handler = _PLAY_DISPATCH[card]
+        target = None
+        if card_type == deck.HAZARD:
+            target_id = self._resolve_target_id(player_id, target_id)
+            target = self._players[target_id]
+        else:
+            target_id = player_id
+        move = None
+        if self._deltas is not None:
+            move = delta.CardMove(
+                card,
+                delta.Piles.HAND,
+                self._turn_order.index(player_id),
+                card_index,
+                delta.PLAY_PILES[card],
+                self._turn_order.index(target_id),
+                None,
+            )
         self._last_target = None
-        handler_name = "_play_" + card_type.__name__.lower()
-        result = getattr(self, handler_name)(player_, card_index, target)
+        result = handler(self, player_, card_index, target)
         # No exceptions raised so far so play was successful.
-        next_turn = (
-            card_type is not deck.SafetyCard and result != PlayResults.WIN_CAN_EXTEND
-        )
-        return self._check_no_more_cards(result, next_turn=next_turn)
+        next_turn = card_type != deck.SAFETY and result != PlayResults.WIN_CAN_EXTEND
+        if not self._tray.cards_remaining and player_.is_hand_empty:
+            # A safety was the player's last card, so they cannot take the extra turn.
+            next_turn = result != PlayResults.WIN_CAN_EXTEND
+        result = self._check_no_more_cards(result, next_turn=next_turn)
+        if move is not None:
+            self._add_delta((move,))
+        if self._events is not None:
+            if target is None:
+                self._publish(events.CardPlayed(player_id, card))
+            else:
+                self._publish(
+                    events.CardPlayed(player_id, card, target_id),
+                    events.HazardReceived(
+                        target_id,
+                        card,
+                        player_id,
+                        result is PlayResults.CAN_COUP_FOURRE,
+                    ),
+                )
+        return result
 
-    def coup_fourre(self, player_id):
-        """Triggers a Coup Fourré if possible."""
-        self._ensure_not_completed()
-        player_ = self._get_player(player_id)
-        # Even if multiple players think they can Coup Fourré, only the player that last
-        # recieved a hazard card is allowed to Coup Fourré.
-        if player_ != self._last_target:
-            raise exceptions.CannotCoupFourreError()
-        discards = player_.coup_fourre()
-        # No exception raised, so the coup was successful.
+    def coup_fourre(self, player_id, *, _trusted=False):
+        """Triggers a Coup Fourré if possible.
+
+        Returns COMPLETED_NO_WINNER if that was the last card left to play.
+        """
+        if not _trusted:
+            exceptions.raise_for(self.check_coup_fourre(player_id))
+        self._version += 1
+        player_ = self._players[player_id]
+        index = self._turn_order.index(player_id)
+        safety = deck.PREVENTED_BY[player_.last_hazard]
+        moves = None
+        if self._deltas is not None:
+            moves = [
+                delta.CardMove(
+                    safety,
+                    delta.Piles.HAND,
+                    index,
+                    player_.hand.find(safety),
+                    delta.Piles.SAFETIES,
+                    index,
+                    None,
+                )
+            ]
+        discards = player_.coup_fourre(_trusted=True)
         for card in discards:
             self._tray.discard(card)
         self._last_target = None
-        self._turn_index = tuple(self._players).index(player_id)
+        self._turn_index = index
+        result = None
+        if not self._tray.cards_remaining and player_.is_hand_empty:
+            # The Coup Fourré used up the player's last card, so they cannot take
+            # their turn.
+            result = self._check_no_more_cards()
+        if moves is not None:
+            moves.extend(
+                delta.CardMove(
+                    card,
+                    delta.PLAY_PILES[card],
+                    index,
+                    None,
+                    delta.Piles.DISCARD,
+                    None,
+                    None,
+                )
+                for card in discards
+            )
+            self._add_delta(moves)
+        if self._events is not None:
+            self._publish(events.CoupFourre(player_id, safety))
+        return result
 
-    def extension(self, player_id):
+    def extension(self, player_id, *, _trusted=False):
         """Call an extension to the game."""
-        self._ensure_not_completed()
-        player_ = self._get_player(player_id)
-        self._ensure_player_turn(player_id)
-        if not self._can_extend or not player_.is_winner:
-            raise exceptions.CannotExtendError()
-        player_.extension()
-        self._win_score = config.LARGE_WIN_SCORE
+        if not _trusted:
+            exceptions.raise_for(self.check_extension(player_id))
+        self._version += 1
+        self._players[player_id].extension()
+        self._win_score = self._rules.large_win_score
         self._extended = True
         self._next_turn()
+        if self._deltas is not None:
+            self._add_delta()
+        if self._events is not None:
+            self._publish(events.ExtensionCalled(player_id))
 
-    def no_extension(self, player_id):
+    def no_extension(self, player_id, *, _trusted=False):
         """Signal that an extension was declined and the hand should complete."""
-        self._ensure_not_completed()
-        player_ = self._get_player(player_id)
-        self._ensure_player_turn(player_id)
-        if not self._can_extend or not player_.is_winner:
-            raise exceptions.CannotExtendError()
+        if not _trusted:
+            exceptions.raise_for(self.check_extension(player_id))
+        self._version += 1
         self._complete()
+        if self._deltas is not None:
+            self._add_delta()
+        if self._events is not None:
+            self._publish()
 
     def toggle_sort(self, player_id):
         """Toggles whether or not a player's hand should always be sorted."""
         self._ensure_not_completed()
         player_ = self._get_player(player_id)
+        self._version += 1
         player_.toggle_sort()
+        if self._deltas is not None:
+            index = self._turn_order.index(player_id)
+            self._add_delta(hands=((index, player_.hand),))
+
+    def make_move(self, player_id, move, *, _trusted=False):
+        """Makes the given Move, as returned by legal_moves(), and returns any result.
+
+        DISCARD moves are forced, so they can discard Safety cards.
+        """
+        return make_move(self, player_id, move, _trusted=_trusted)
+
+
+def make_move(runner, player_id, move, *, _trusted=False):
+    """Makes the given Move on runner (a Hand or a Game) and returns any result."""
+    action = move.action
+    if action is Actions.PLAY:
+        return runner.play(
+            player_id, move.card_index, move.target_id, _trusted=_trusted
+        )
+    if action is Actions.DRAW:
+        return runner.draw(player_id, _trusted=_trusted)
+    if action is Actions.DRAW_DISCARD:
+        return runner.draw(player_id, discard=True, _trusted=_trusted)
+    if action is Actions.DISCARD:
+        return runner.discard(
+            player_id, move.card_index, force=True, _trusted=_trusted
+        )
+    if action is Actions.COUP_FOURRE:
+        return runner.coup_fourre(player_id, _trusted=_trusted)
+    if action is Actions.EXTENSION:
+        return runner.extension(player_id, _trusted=_trusted)
+    return runner.no_extension(player_id, _trusted=_trusted)
+
+
+def move_key(cards, move):
+    """Returns a key for move that ignores where the card is in the hand.
+
+    cards are the card kinds in the hand of the player making the move.  Moves of the
+    same kind of card have the same key, as do equal positions with hands in different
+    orders, so searches only try them once.
+    """
+    if move is None:
+        return None
+    card = None if move.card_index is None else cards[move.card_index]
+    return (move.action, card, move.target_id)
+
+
+def next_decision(hand, pending_id=None):
+    """Returns the id of the player that decides next in hand and their moves.
+
+    For bots and solvers that search ahead.  pending_id is the player that can Coup
+    Fourré the hazard just played, if any.  If it is not their turn, their only moves
+    are a COUP_FOURRE Move and None, to decline it.  See apply_move().
+    """
+    current_id = hand.current_player_id
+    if pending_id is not None and pending_id != current_id:
+        return pending_id, [Move(Actions.COUP_FOURRE), None]
+    return current_id, hand.legal_moves(current_id)
+
+
+def apply_move(hand, player_id, move):
+    """Makes a move from next_decision() and returns the next pending_id.
+
+    The move is not checked again.
+    """
+    if move is None:
+        return None
+    result = make_move(hand, player_id, move, _trusted=True)
+    return move.target_id if result is PlayResults.CAN_COUP_FOURRE else None
+
+
+# Maps each card kind to its main category and the Hand method that plays it.  Built
+# once at import time so that Hand.play() dispatches with a single lookup.
+# pylint: disable=protected-access
+_HANDLERS = {
+    deck.SAFETY: Hand._play_safety,
+    deck.REMEDY: Hand._play_remedy,
+    deck.HAZARD: Hand._play_hazard,
+    deck.DISTANCE: Hand._play_distance,
+}
+# pylint: enable=protected-access
+_PLAY_DISPATCH = tuple((category, _HANDLERS[category]) for category in deck.CATEGORY)
@@ -0,0 +1,232 @@
+#    Race Card - An implementation of the card game Mille Bornes
+#    Copyright (C) 2020  Krys Lawrence <krys AT krys DOT ca>
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU Affero General Public License as published
+#    by the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU Affero General Public License for more details.
+#
+#    You should have received a copy of the GNU Affero General Public License
+#    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+"""Opt-in instrumentation of games and hands, i.e. to find hot paths in production.
+
+attach() switches a Game or Hand over to an instrumented subclass that counts and times
+every public method call, counts each CoreException raised to callers and keeps
+per-hand stats.  Nothing is wrapped until then, so uninstrumented games pay nothing.
+Read the results with Stats.snapshot().
+
+NOTE: Calls are counted at every level, so a Game.play() also counts a Hand.play() and
+      a Hand.check_play().  Exceptions are only counted once, where they leave the
+      outermost instrumented call.
+"""
+
+
+import collections
+import dataclasses
+import functools
+import inspect
+import time
+import typing
+
+from . import common, exceptions, game, hand
+
+
+@common.slotted
+@dataclasses.dataclass
+class HandStats:
+    """Counts of what happened in one hand."""
+
+    rounds: int = 1
+    cards_drawn: int = 0  # Draws after the deal, from either pile.
+    discards: int = 0
+    coups_fourres: int = 0
+    is_completed: bool = False
+
+
+@common.slotted
+@dataclasses.dataclass(frozen=True)
+class Snapshot:
+    """A copy of Stats at one point in time.  Methods are named "Class.method"."""
+
+    calls: typing.Dict[str, int]
+    seconds: typing.Dict[str, float]  # Total time spent in each method.
+    errors: typing.Dict[str, int]  # By exception class name.
+    hands: typing.Tuple[HandStats, ...]  # In the order they were instrumented.
+
+
+class Stats:
+    """Collects the measurements of one or more instrumented games and hands."""
+
+    __slots__ = ("calls", "seconds", "errors", "hands", "_depth")
+
+    def __init__(self):
+        self.calls = collections.Counter()
+        self.seconds = collections.defaultdict(float)
+        self.errors = collections.Counter()
+        self.hands = []
+        self._depth = 0  # Number of instrumented calls in progress.
+
+    def snapshot(self):
+        """Returns a Snapshot of the stats so far."""
+        return Snapshot(
+            calls=dict(self.calls),
+            seconds=dict(self.seconds),
+            errors=dict(self.errors),
+            hands=tuple(dataclasses.replace(stats) for stats in self.hands),
+        )
+
+    def reset(self):
+        """Forgets everything counted so far, along with the completed hands."""
+        self.calls.clear()
+        self.seconds.clear()
+        self.errors.clear()
+        self.hands = [stats for stats in self.hands if not stats.is_completed]
+        for stats in self.hands:
+            stats.cards_drawn = stats.discards = stats.coups_fourres = 0
+
+
+class _Probe:
+    """What an instrumented object records to.  hand is only set for Hands."""
+
+    __slots__ = ("stats", "hand")
+
+    def __init__(self, stats, hand_stats=None):
+        self.stats = stats
+        self.hand = hand_stats
+
+
+def _timed(name, method):
+    """Returns a wrapper of method that records its calls, time and exceptions."""
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        stats = self._instrument.stats  # pylint: disable=protected-access
+        stats._depth += 1  # pylint: disable=protected-access
+        start = time.perf_counter()
+        try:
+            return method(self, *args, **kwargs)
+        except exceptions.CoreException as exc:
+            if stats._depth == 1:  # pylint: disable=protected-access
+                stats.errors[type(exc).__name__] += 1
+            raise
+        finally:
+            stats._depth -= 1  # pylint: disable=protected-access
+            stats.calls[name] += 1
+            stats.seconds[name] += time.perf_counter() - start
+
+    return wrapper
+
+
+def _instrumented(cls):
+    """Class decorator that wraps all public methods with _timed().
+
+    cls must be a subclass without any new slots, so that instances of its base can
+    be switched over to it by assigning __class__.
+    """
+    base = cls.__bases__[0]
+    for name, attribute in inspect.getmembers(cls):
+        if name.startswith("_") or not inspect.isfunction(attribute):
+            continue
+        if isinstance(inspect.getattr_static(cls, name), staticmethod):
+            continue
+        setattr(cls, name, _timed(f"{base.__name__}.{name}", attribute))
+    return cls
+
+
+@_instrumented
+class InstrumentedHand(hand.Hand):
+    """A Hand that records to its _instrument.  See attach()."""
+
+    __slots__ = ()
+
+    def _update(self):
+        """Copies the round number and completion of the hand to its HandStats."""
+        hand_stats = self._instrument.hand
+        hand_stats.rounds = self.round_number
+        hand_stats.is_completed = self.is_completed
+
+    def draw(self, player_id, discard=False, *, _trusted=False):
+        super().draw(player_id, discard, _trusted=_trusted)
+        self._instrument.hand.cards_drawn += 1
+        self._update()
+
+    def discard(self, player_id, card_index, force=False, *, _trusted=False):
+        result = super().discard(player_id, card_index, force, _trusted=_trusted)
+        self._instrument.hand.discards += 1
+        self._update()
+        return result
+
+    def play(self, player_id, card_index, target_id=None, *, _trusted=False):
+        result = super().play(player_id, card_index, target_id, _trusted=_trusted)
+        self._update()
+        return result
+
+    def coup_fourre(self, player_id, *, _trusted=False):
+        result = super().coup_fourre(player_id, _trusted=_trusted)
+        self._instrument.hand.coups_fourres += 1
+        self._update()
+        return result
+
+    def extension(self, player_id, *, _trusted=False):
+        super().extension(player_id, _trusted=_trusted)
+        self._update()
+
+    def no_extension(self, player_id, *, _trusted=False):
+        super().no_extension(player_id, _trusted=_trusted)
+        self._update()
+
+
+@_instrumented
+class InstrumentedGame(game.Game):
+    """A Game that records to its _instrument, as do all of its hands from now on."""
+
+    __slots__ = ()
+
+    def _start_hand(self):
+        super()._start_hand()
+        attach(self._hands[-1], self._instrument.stats)
+
+
+_INSTRUMENTED = {hand.Hand: InstrumentedHand, game.Game: InstrumentedGame}
+
+
+def attach(obj, stats=None):
+    """Instruments a Game or Hand and returns the Stats it records to.
+
+    stats can be shared between several games.  Defaults to a new Stats.  A Game's
+    current and future hands are instrumented with it too.  Clones are never
+    instrumented, so searching ahead does not count.
+    """
+    if stats is None:
+        stats = Stats()
+    # pylint: disable=protected-access
+    if obj._instrument is not None:
+        detach(obj)
+    if isinstance(obj, hand.Hand):
+        hand_stats = HandStats(obj.round_number, is_completed=obj.is_completed)
+        stats.hands.append(hand_stats)
+        obj._instrument = _Probe(stats, hand_stats)
+    else:
+        obj._instrument = _Probe(stats)
+        if obj._hands and not obj._hands[-1].is_completed:
+            attach(obj._hands[-1], stats)
+    obj.__class__ = _INSTRUMENTED[type(obj)]
+    return stats
+
+
+def detach(obj):
+    """Stops instrumenting a Game, and its current hand, or a Hand."""
+    # pylint: disable=protected-access
+    if obj._instrument is None:
+        return
+    if isinstance(obj, game.Game) and obj._hands:
+        detach(obj._hands[-1])
+    obj.__class__ = type(obj).__bases__[0]
+    obj._instrument = None
@@ -0,0 +1,510 @@
+#    Race Card - An implementation of the card game Mille Bornes
+#    Copyright (C) 2020  Krys Lawrence <krys AT krys DOT ca>
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU Affero General Public License as published
+#    by the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU Affero General Public License for more details.
+#
+#    You should have received a copy of the GNU Affero General Public License
+#    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+"""Vectorized engine that runs thousands of hands in lockstep with NumPy.
+
+This is an alternative to hand.Hand for Monte Carlo rollouts, where per-object Python
+overhead is the bottleneck.  A LockstepHands object holds K hands as arrays, and every
+call to step() makes one move in each of them at once.
+
+The rules mirror hand.Hand and player.Player, with these differences:
+ - All hands in a batch have the same number of players, and hands are never sorted.
+ - A Coup Fourré is called (or declined) in the same step as the hazard allowing it.
+ - Only the top two cards of the battle pile, and whether a Speed Limit is in place,
+   are kept.  (A Coup Fourré can uncover the second card, but never the third.)
+ - Only the standard rules are supported, i.e. ruleset.DEFAULT.
+
+Actions are small integers.  For P players, and S = config.MAX_CARDS_IN_HAND slots:
+    DRAW, DRAW_DISCARD
+    PLAY + card_index                                   (non-hazard cards)
+    hazard_base + card_index * P + target_seat          (hazard cards)
+    discard_base + card_index
+    extension, no_extension
+See LockstepHands.legal_mask() for which are legal.
+
+Requires the optional numpy dependency: pip install racecard[SIM]
+"""
+
+
+import numpy as np
+
+from . import config, deck
+from .hand import PlayResults
+
+EMPTY = 255  # Marks an unused entry in hands and piles, or no card at all.
+NO_RESULT = -1  # Result code of actions that do not return a PlayResults.
+RESULTS = tuple(PlayResults)  # Result codes are indexes into this.
+
+# Player states.  These mirror player._States.
+STOPPED, ROLLING, BROKEN, COMPLETED = range(4)
+
+# Actions
+DRAW = 0
+DRAW_DISCARD = 1
+PLAY = 2
+
+_SLOTS = config.MAX_CARDS_IN_HAND
+_OK = RESULTS.index(PlayResults.OK)
+_CAN_COUP_FOURRE = RESULTS.index(PlayResults.CAN_COUP_FOURRE)
+_WIN_CAN_EXTEND = RESULTS.index(PlayResults.WIN_CAN_EXTEND)
+_WIN_CANNOT_EXTEND = RESULTS.index(PlayResults.WIN_CANNOT_EXTEND)
+_COMPLETED_NO_WINNER = RESULTS.index(PlayResults.COMPLETED_NO_WINNER)
+_RIGHT_OF_WAY_BIT = 1 << deck.RIGHT_OF_WAY
+
+
+def _table(values, dtype, default=0):
+    """Returns a lookup table of all 256 possible uint8 card values.
+
+    Entries past the last card kind, i.e. EMPTY, and None values get default.
+    """
+    table = np.full(256, default, dtype=dtype)
+    table[: len(values)] = [default if value is None else value for value in values]
+    return table
+
+
+# Lookup tables, indexed by card kind.
+_CATEGORY = _table(deck.CATEGORY, np.uint8)
+_CATEGORIES = _table(deck.CATEGORIES, np.uint8)
+_VALUES = _table(deck.VALUES, np.int16)
+_REMEDIED_BY = _table(deck.REMEDIED_BY, np.uint8, EMPTY)
+_PREVENTED_BY = _table(deck.PREVENTED_BY, np.uint8, EMPTY)
+_PREVENTED_BIT = _table(
+    [None if safety is None else 1 << safety for safety in deck.PREVENTED_BY], np.uint8
+)
+_SAFETY_BIT = _table(
+    [
+        1 << card if category == deck.SAFETY else 0
+        for card, category in enumerate(deck.CATEGORY)
+    ],
+    np.uint8,
+)
+_BIT_COUNT = _table([bin(mask).count("1") for mask in range(256)], np.int16)
+
+
+def random_actions(mask, rng):
+    """A vectorized policy that picks a random legal action in every hand.
+
+    mask is as returned by LockstepHands.legal_mask() and rng is a NumPy Generator.
+    Hands with no legal action get -1.
+    """
+    scores = rng.random(mask.shape)
+    scores[~mask] = -1.0
+    actions = scores.argmax(axis=1)
+    actions[~mask.any(axis=1)] = -1
+    return actions
+
+
+class LockstepHands:  # pylint: disable=too-many-instance-attributes
+    """K hands of the same number of players, all stored as NumPy arrays.
+
+    Arrays are indexed by hand (K), and then by seat (P) for per-player data.  Piles and
+    hands hold deck card kinds, with their top/last card at index length - 1.
+    """
+
+    def __init__(self, decks, num_players):
+        """decks is a (K, deck size) array of shuffled decks, i.e. from deck.make_deck.
+
+        Cards are dealt exactly like hand.Hand deals them, so the same decks give the
+        same starting hands.
+        """
+        decks = np.array(decks, dtype=np.uint8)
+        count, deck_size = decks.shape
+        players = num_players
+        dealt = (_SLOTS - 1) * players
+        self.num_hands = count
+        self.num_players = players
+        self.hazard_base = PLAY + _SLOTS
+        self.discard_base = self.hazard_base + _SLOTS * players
+        self.extension = self.discard_base + _SLOTS
+        self.no_extension = self.extension + 1
+        self.num_actions = self.no_extension + 1
+        self._small_deck = players < config.LARGE_DECK_PLAYERS
+        # Tray
+        self.draw_pile = decks
+        self.draw_len = np.full(count, deck_size - dealt, np.int16)
+        self.discard_pile = np.full((count, deck_size), EMPTY, np.uint8)
+        self.discard_len = np.zeros(count, np.int16)
+        # Deal one card at a time to each player in turn, from the top of the deck.
+        positions = deck_size - 1 - (
+            np.arange(_SLOTS - 1)[:, np.newaxis] * players + np.arange(players)
+        )
+        self.hands = np.full((count, players, _SLOTS), EMPTY, np.uint8)
+        self.hands[:, :, : _SLOTS - 1] = decks[:, positions].transpose(0, 2, 1)
+        self.hand_len = np.full((count, players), _SLOTS - 1, np.int16)
+        decks[:, deck_size - dealt :] = EMPTY
+        # Players
+        self.states = np.full((count, players), STOPPED, np.int8)
+        self.battle_top = np.full((count, players), EMPTY, np.uint8)
+        self.battle_under = np.full((count, players), EMPTY, np.uint8)
+        self.limited = np.zeros((count, players), bool)
+        self.safeties = np.zeros((count, players), np.uint8)  # Bit (1 << card) each.
+        self.distance = np.zeros((count, players), np.int16)
+        self.distance_count = np.zeros((count, players), np.int16)
+        self.d200_count = np.zeros((count, players), np.int16)
+        self.coups_fourres = np.zeros((count, players), np.int16)
+        self.winners = np.zeros((count, players), bool)
+        self.scores = np.zeros((count, players), np.int16)
+        # Hands
+        self.turn = np.zeros(count, np.int16)
+        self.round_number = np.ones(count, np.int16)
+        self.win_score = np.full(
+            count,
+            config.SMALL_WIN_SCORE if self._small_deck else config.LARGE_WIN_SCORE,
+            np.int16,
+        )
+        self.extended = np.zeros(count, bool)
+        self.completed = np.zeros(count, bool)
+        self.winner_seat = np.full(count, -1, np.int16)
+
+    @classmethod
+    def new(cls, count, num_players, rng):
+        """Returns count new hands, with decks shuffled by the NumPy Generator rng."""
+        small = num_players < config.LARGE_DECK_PLAYERS
+        template = np.frombuffer(bytes(deck.make_unshuffled_deck(small)), np.uint8)
+        decks = rng.permuted(np.tile(template, (count, 1)), axis=1)
+        return cls(decks, num_players)
+
+    # Internal Attributes
+
+    def _remove_from_hands(self, rows, seats, slots):
+        """Removes and returns the cards in the given slots, closing up the gaps."""
+        cards = self.hands[rows, seats, slots]
+        index = np.arange(_SLOTS)
+        source = np.minimum(index + (index >= slots[:, np.newaxis]), _SLOTS - 1)
+        held = np.take_along_axis(self.hands[rows, seats], source, axis=1)
+        self.hand_len[rows, seats] -= 1
+        held[np.arange(len(rows)), self.hand_len[rows, seats]] = EMPTY
+        self.hands[rows, seats] = held
+        return cards
+
+    def _add_to_hands(self, rows, seats, cards):
+        self.hands[rows, seats, self.hand_len[rows, seats]] = cards
+        self.hand_len[rows, seats] += 1
+
+    def _discard(self, rows, cards):
+        self.discard_pile[rows, self.discard_len[rows]] = cards
+        self.discard_len[rows] += 1
+
+    def _draw(self, rows, seats, pile, pile_len):
+        tops = pile_len[rows] - 1
+        self._add_to_hands(rows, seats, pile[rows, tops])
+        pile[rows, tops] = EMPTY
+        pile_len[rows] -= 1
+
+    def _push_battle(self, rows, seats, cards):
+        self.battle_under[rows, seats] = self.battle_top[rows, seats]
+        self.battle_top[rows, seats] = cards
+
+    def _next_turn(self, rows):
+        """Advances to the next turn, skipping players who cannot do anything."""
+        for _ in range(self.num_players):
+            if not rows.size:
+                break
+            turn = self.turn[rows] + 1
+            wrapped = turn >= self.num_players
+            self.round_number[rows] += wrapped
+            turn[wrapped] = 0
+            self.turn[rows] = turn
+            stuck = (self.draw_len[rows] == 0) & (self.hand_len[rows, turn] == 0)
+            rows = rows[stuck]
+
+    def _complete(self, rows, winner_seats):
+        """Completes the given hands and scores them.  Seat -1 means no winner."""
+        self.completed[rows] = True
+        self.winner_seat[rows] = winner_seats
+        is_winner = np.arange(self.num_players) == winner_seats[:, np.newaxis]
+        self.winners[rows] = is_winner
+        self.states[rows] = COMPLETED
+        shutout = ((self.distance_count[rows] == 0) | is_winner).all(axis=1)
+        safeties = _BIT_COUNT[self.safeties[rows]]
+        scores = (
+            self.distance[rows]
+            + config.SAFETY_SCORE * safeties
+            + config.ALL_SAFETIES_SCORE * (safeties == config.TOTAL_SAFETIES)
+            + config.COUP_FOURRE_SCORE * self.coups_fourres[rows]
+        )
+        bonus = (
+            config.TRIP_COMPLETED_SCORE
+            + config.DELAYED_ACTION_SCORE * (self.draw_len[rows] == 0)[:, np.newaxis]
+            + config.SAFE_TRIP_SCORE * (self.d200_count[rows] == 0)
+            + config.SHUT_OUT_SCORE * shutout[:, np.newaxis]
+            + config.EXTENSION_SCORE * self.extended[rows][:, np.newaxis]
+        )
+        self.scores[rows] = scores + np.where(is_winner, bonus, 0)
+
+    def _finish_turn(self, rows, next_turn, results):
+        """Completes hands with no cards left to play, otherwise maybe next turn.
+
+        Mirrors Hand._check_no_more_cards().
+        """
+        live = ~self.completed[rows]
+        no_more_cards = (
+            live & (self.draw_len[rows] == 0) & (self.hand_len[rows].sum(axis=1) == 0)
+        )
+        done = rows[no_more_cards]
+        self._complete(done, np.full(len(done), -1))
+        results[done] = _COMPLETED_NO_WINNER
+        self._next_turn(rows[~no_more_cards & next_turn])
+
+    def _play_safeties(self, rows, seats, cards):
+        self.safeties[rows, seats] |= _SAFETY_BIT[cards]
+        self.limited[rows, seats] &= cards != deck.RIGHT_OF_WAY
+        has_right_of_way = (self.safeties[rows, seats] & _RIGHT_OF_WAY_BIT) != 0
+        states = self.states[rows, seats]
+        recovered = (states == BROKEN) & (
+            cards == _PREVENTED_BY[self.battle_top[rows, seats]]
+        )
+        states = np.where(
+            recovered, np.where(has_right_of_way, ROLLING, STOPPED), states
+        )
+        rolling = (self.states[rows, seats] == STOPPED) & (cards == deck.RIGHT_OF_WAY)
+        self.states[rows, seats] = np.where(rolling, ROLLING, states)
+
+    def _play_remedies(self, rows, seats, cards):
+        states = self.states[rows, seats]
+        roll = (states == STOPPED) & (cards == deck.ROLL)
+        battle = (_CATEGORIES[cards] & deck.BATTLE) != 0
+        has_right_of_way = (self.safeties[rows, seats] & _RIGHT_OF_WAY_BIT) != 0
+        self._push_battle(rows[battle], seats[battle], cards[battle])
+        self.limited[rows, seats] &= battle  # End of Limit
+        states = np.where(battle, np.where(has_right_of_way, ROLLING, STOPPED), states)
+        self.states[rows, seats] = np.where(roll, ROLLING, states)
+
+    def _play_distances(self, rows, seats, cards, results):
+        """Plays distance cards and returns which hands should go to the next turn."""
+        self.distance[rows, seats] += _VALUES[cards]
+        self.distance_count[rows, seats] += 1
+        self.d200_count[rows, seats] += cards == deck.D200
+        won = self.distance[rows, seats] == self.win_score[rows]
+        self.states[rows[won], seats[won]] = COMPLETED
+        self.winners[rows[won], seats[won]] = True
+        can_extend = won & self._small_deck & ~self.extended[rows]
+        cannot_extend = won & ~can_extend
+        results[rows[can_extend]] = _WIN_CAN_EXTEND
+        results[rows[cannot_extend]] = _WIN_CANNOT_EXTEND
+        self._complete(rows[cannot_extend], seats[cannot_extend])
+        return ~can_extend
+
+    def _recieve_hazards(self, rows, targets, cards):
+        """Plays hazards on targets and returns which targets can now Coup Fourré."""
+        battle = (_CATEGORIES[cards] & deck.BATTLE) != 0
+        self._push_battle(rows[battle], targets[battle], cards[battle])
+        self.states[rows, targets] = np.where(
+            battle,
+            np.where(cards == deck.STOP, STOPPED, BROKEN),
+            self.states[rows, targets],
+        )
+        self.limited[rows, targets] |= ~battle
+        safeties = _PREVENTED_BY[cards]
+        return (self.hands[rows, targets] == safeties[:, np.newaxis]).any(axis=1)
+
+    def _coup_fourre(self, rows, seats, safeties, results):
+        """Mirrors Player.coup_fourre() and Hand.coup_fourre()."""
+        tops = self.battle_top[rows, seats]
+        on_battle = _PREVENTED_BY[tops] == safeties
+        self._discard(rows[on_battle], tops[on_battle])
+        self.battle_top[rows[on_battle], seats[on_battle]] = self.battle_under[
+            rows[on_battle], seats[on_battle]
+        ]
+        self.states[rows[on_battle], seats[on_battle]] = ROLLING
+        on_speed = self.limited[rows, seats] & (safeties == deck.RIGHT_OF_WAY)
+        self._discard(rows[on_speed], np.full(on_speed.sum(), deck.SPEED_LIMIT))
+        slots = (self.hands[rows, seats] == safeties[:, np.newaxis]).argmax(axis=1)
+        self._remove_from_hands(rows, seats, slots)
+        self.safeties[rows, seats] |= _SAFETY_BIT[safeties]
+        self.limited[rows, seats] &= safeties != deck.RIGHT_OF_WAY
+        self.coups_fourres[rows, seats] += 1
+        self.turn[rows] = seats
+        stuck = (self.draw_len[rows] == 0) & (self.hand_len[rows, seats] == 0)
+        self._finish_turn(rows[stuck], np.ones(stuck.sum(), bool), results)
+
+    # Public Attributes
+
+    def legal_mask(self):
+        """Returns a (K, num_actions) bool array of the legal actions in every hand.
+
+        Mirrors Hand.legal_moves() for the current player of each hand, except for Coup
+        Fourrés.  See step().
+        """
+        count, players = self.num_hands, self.num_players
+        rows = np.arange(count)
+        turn = self.turn
+        hand = self.hands[rows, turn]
+        states = self.states[rows, turn][:, np.newaxis]
+        limited = self.limited[rows, turn][:, np.newaxis]
+        active = ~self.completed
+        waiting = active & self.winners[rows, turn]  # For an extension decision.
+        acting = active & ~waiting
+        must_draw = (self.hand_len[rows, turn] < _SLOTS) & (self.draw_len > 0)
+        mask = np.zeros((count, self.num_actions), bool)
+        mask[:, DRAW] = acting & must_draw
+        mask[:, DRAW_DISCARD] = acting & must_draw & (self.discard_len > 0)
+        in_hand = (np.arange(_SLOTS) < self.hand_len[rows, turn][:, np.newaxis]) & (
+            acting & ~must_draw
+        )[:, np.newaxis]
+        category = _CATEGORY[hand]
+        battle = (_CATEGORIES[hand] & deck.BATTLE) != 0
+        values = _VALUES[hand]
+        remedy_ok = (
+            ((states == STOPPED) & (hand == deck.ROLL))
+            | (
+                battle
+                & (states == BROKEN)
+                & (hand == _REMEDIED_BY[self.battle_top[rows, turn]][:, np.newaxis])
+            )
+            | ((hand == deck.END_OF_LIMIT) & limited)
+        )
+        distance_ok = (
+            (states == ROLLING)
+            & ~(limited & (values > config.SPEED_LIMIT_LIMIT))
+            & (
+                self.distance[rows, turn][:, np.newaxis] + values
+                <= self.win_score[:, np.newaxis]
+            )
+            & ~((hand == deck.D200) & (self.d200_count[rows, turn] >= 2)[:, np.newaxis])
+        )
+        mask[:, PLAY : PLAY + _SLOTS] = in_hand & (
+            (category == deck.SAFETY)
+            | ((category == deck.REMEDY) & remedy_ok)
+            | ((category == deck.DISTANCE) & distance_ok)
+        )
+        hazards = in_hand & (category == deck.HAZARD)
+        for target in range(players):
+            target_states = self.states[:, target][:, np.newaxis]
+            columns = slice(self.hazard_base + target, self.discard_base, players)
+            mask[:, columns] = (
+                hazards
+                & (turn != target)[:, np.newaxis]
+                & (target_states != COMPLETED)
+                & (
+                    (self.safeties[:, target][:, np.newaxis] & _PREVENTED_BIT[hand])
+                    == 0
+                )
+                & np.where(
+                    battle,
+                    target_states == ROLLING,
+                    ~self.limited[:, target][:, np.newaxis],
+                )
+            )
+        mask[:, self.discard_base : self.extension] = in_hand
+        can_extend = waiting & self._small_deck & ~self.extended
+        mask[:, self.extension] = can_extend
+        mask[:, self.no_extension] = can_extend
+        return mask
+
+    def step(self, actions, coup_fourre=True):
+        """Makes one action in every hand and returns a (K,) array of result codes.
+
+        actions is a (K,) int array of legal actions, as given by legal_mask().  They
+        are not checked again.  Hands with action -1, or that are completed, are left
+        as they are.
+        coup_fourre is a bool, or a (K,) bool array, of whether a hazard target that
+        can Coup Fourré does so straight away.  Otherwise the chance is lost.
+        Result codes are indexes into RESULTS, or NO_RESULT.
+        """
+        actions = np.asarray(actions)
+        coup_fourre = np.broadcast_to(coup_fourre, (self.num_hands,))
+        results = np.full(self.num_hands, NO_RESULT, np.int8)
+        rows = np.flatnonzero((actions >= 0) & ~self.completed)
+        actions = actions[rows]
+        seats = self.turn[rows]
+        next_turn = np.ones(len(rows), bool)
+
+        draws = actions == DRAW
+        self._draw(rows[draws], seats[draws], self.draw_pile, self.draw_len)
+        from_discards = actions == DRAW_DISCARD
+        self._draw(
+            rows[from_discards],
+            seats[from_discards],
+            self.discard_pile,
+            self.discard_len,
+        )
+        next_turn[draws | from_discards] = False
+
+        plays = (actions >= PLAY) & (actions < self.hazard_base)
+        play_rows, play_seats = rows[plays], seats[plays]
+        cards = self._remove_from_hands(play_rows, play_seats, actions[plays] - PLAY)
+        results[play_rows] = _OK
+        category = _CATEGORY[cards]
+        safety = category == deck.SAFETY
+        self._play_safeties(play_rows[safety], play_seats[safety], cards[safety])
+        remedy = category == deck.REMEDY
+        self._play_remedies(play_rows[remedy], play_seats[remedy], cards[remedy])
+        distance = category == deck.DISTANCE
+        # A safety gives another turn, unless it was the player's last card.
+        last_card = (self.draw_len[play_rows] == 0) & (
+            self.hand_len[play_rows, play_seats] == 0
+        )
+        play_next_turn = ~safety | last_card
+        play_next_turn[distance] = self._play_distances(
+            play_rows[distance], play_seats[distance], cards[distance], results
+        )
+        next_turn[plays] = play_next_turn
+
+        hazards = (actions >= self.hazard_base) & (actions < self.discard_base)
+        hazard_rows, offsets = rows[hazards], actions[hazards] - self.hazard_base
+        targets = offsets % self.num_players
+        hazard_cards = self._remove_from_hands(
+            hazard_rows, seats[hazards], offsets // self.num_players
+        )
+        can_coup = self._recieve_hazards(hazard_rows, targets, hazard_cards)
+        results[hazard_rows] = np.where(can_coup, _CAN_COUP_FOURRE, _OK)
+
+        discards = (actions >= self.discard_base) & (actions < self.extension)
+        discard_rows = rows[discards]
+        self._discard(
+            discard_rows,
+            self._remove_from_hands(
+                discard_rows, seats[discards], actions[discards] - self.discard_base
+            ),
+        )
+
+        extensions = actions == self.extension
+        extension_rows = rows[extensions]
+        self.states[extension_rows, seats[extensions]] = ROLLING
+        self.winners[extension_rows, seats[extensions]] = False
+        self.win_score[extension_rows] = config.LARGE_WIN_SCORE
+        self.extended[extension_rows] = True
+        next_turn[extensions] = False
+        self._next_turn(extension_rows)
+
+        no_extensions = actions == self.no_extension
+        self._complete(rows[no_extensions], seats[no_extensions])
+        next_turn[no_extensions] = False
+
+        finished = ~(draws | from_discards | extensions | no_extensions)
+        self._finish_turn(rows[finished], next_turn[finished], results)
+
+        coups = can_coup & coup_fourre[hazard_rows]
+        self._coup_fourre(
+            hazard_rows[coups],
+            targets[coups],
+            _PREVENTED_BY[hazard_cards[coups]],
+            results,
+        )
+        return results
+
+    def run(self, policy, max_steps=10000):
+        """Steps all hands with policy until they are all completed or stuck.
+
+        policy is called as policy(self, mask) and returns actions for step().
+        """
+        for _ in range(max_steps):
+            mask = self.legal_mask()
+            if not mask.any():
+                break
+            self.step(policy(self, mask))
@@ -0,0 +1,329 @@
+#    Race Card - An implementation of the card game Mille Bornes
+#    Copyright (C) 2020  Krys Lawrence <krys AT krys DOT ca>
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU Affero General Public License as published
+#    by the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU Affero General Public License for more details.
+#
+#    You should have received a copy of the GNU Affero General Public License
+#    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+"""A Monte Carlo Tree Search bot that plays without seeing hidden cards.
+
+Moves are picked with Information Set MCTS.  Every iteration deals a new guess at the
+cards the bot cannot see (see Hand.determinize()), then walks one shared tree using
+only the moves that are possible in that guess.  Moves are keyed by card kind rather
+than card index, as indexes differ between guesses (see hand.move_key()).  Each walk
+ends with a quick, mostly greedy playout of the rest of the hand, or of the next
+rollout_depth moves.
+The playout policy's choice is also favoured while a node has few visits, as the
+short time budgets leave too few iterations to rank moves by playouts alone.
+
+Searches are root-parallel: each worker process grows its own tree until the time
+budget runs out, and the visit counts of their root moves are added up.
+"""
+
+
+import concurrent.futures
+import math
+import os
+import random
+import time
+
+from . import deck
+from .hand import Actions, Move, apply_move, move_key, next_decision
+
+DEFAULT_TIME_BUDGET = 0.1  # Seconds per decision.
+DEFAULT_EXPLORATION = 0.5
+DEFAULT_BIAS = 4.0  # Weight of the playout policy's choice while visits are few.
+DEFAULT_ROLLOUT_DEPTH = 48  # Moves per playout before the hand is estimated.
+
+# Seconds of the time budget kept for finishing the last iteration and for sending
+# work and results between processes.
+_TIME_MARGIN = 0.015
+_REWARD_SCALE = 400  # A lead of this many points counts as a sure win.
+_DECLINE = None  # The move for declining a Coup Fourré.  See next_decision().
+_ROLLOUT_RANDOMNESS = 0.1  # Chance of a random move in playouts.
+
+# The number of safeties played, by safeties mask.  See player.PileSummary.
+_SAFETY_COUNTS = tuple(
+    bin(mask).count("1") for mask in range(1 << (deck.RIGHT_OF_WAY + 1))
+)
+# How much playouts like to play each card kind.  Safeties are kept for Coups Fourrés.
+_PLAY_PRIORITY = tuple(
+    {deck.SAFETY: 1, deck.REMEDY: 4, deck.HAZARD: 5}.get(category, 3 + value / 1000)
+    for category, value in zip(deck.CATEGORY, deck.VALUES)
+)
+# How much playouts like to keep each card kind instead of discarding it.  Keeping
+# distance cards wins the most points against random play.
+_KEEP_PRIORITY = tuple(
+    {deck.SAFETY: 10, deck.REMEDY: 0.1, deck.HAZARD: 0.2}.get(category, value / 100)
+    for category, value in zip(deck.CATEGORY, deck.VALUES)
+)
+
+
+class _Node:
+    """A node of the search tree.  Its stats are for the move that leads to it."""
+
+    __slots__ = ("player_id", "children", "visits", "reward", "available")
+
+    def __init__(self, player_id=None):
+        self.player_id = player_id  # The player that made the move.
+        self.children = {}  # Child nodes by move key.
+        self.visits = 0
+        self.reward = 0.0  # Total reward of player_id over all visits.
+        self.available = 0  # Number of times the move was possible.  See search().
+
+
+def _rollout_priority(cards, move):
+    """Returns how much a playout likes move.  Plays come before any discards."""
+    action = move.action
+    if action is Actions.PLAY:
+        return _PLAY_PRIORITY[cards[move.card_index]]
+    if action is Actions.DISCARD:
+        return -_KEEP_PRIORITY[cards[move.card_index]]
+    if action is Actions.DRAW_DISCARD:
+        return -100  # Could go on forever.
+    return 5  # Always draw, Coup Fourré and take extensions.
+
+
+def _greedy_move(cards, moves):
+    """Returns the move the playout policy likes best.  Coups Fourrés are taken.
+
+    Returns None if there are no moves.
+    """
+    if not moves:
+        return None
+    if moves[-1] is _DECLINE:
+        return moves[0]
+    return max(moves, key=lambda move: _rollout_priority(cards, move))
+
+
+def _rollout(hand, pending_id, rng, depth):
+    """Plays up to depth quick moves, mostly greedy and sometimes random."""
+    for _ in range(depth):
+        if hand.is_completed:
+            return
+        player_id, moves = next_decision(hand, pending_id)
+        if rng.random() < _ROLLOUT_RANDOMNESS:
+            move = rng.choice(moves)
+        else:
+            move = _greedy_move(hand.get_cards(player_id), moves)
+        pending_id = apply_move(hand, player_id, move)
+
+
+def _values(hand):
+    """Returns the score of each player by id, or an estimate if not completed."""
+    if hand.is_completed:
+        return {id_: card.total for id_, card in hand.get_score_cards().items()}
+    rules = hand.rules
+    values = {}
+    for id_ in hand.player_ids:
+        summary = hand.get_summary(id_)
+        values[id_] = (
+            summary.distance_total
+            + rules.safety_score * _SAFETY_COUNTS[summary.safeties_mask]
+            + rules.coup_fourre_score * summary.coups_fourres
+        )
+    return values
+
+
+def _reward(values, player_id):
+    """Returns between 0 and 1 for how far player_id is ahead of the best opponent."""
+    best_other = max([value for id_, value in values.items() if id_ != player_id])
+    lead = (values[player_id] - best_other) / _REWARD_SCALE
+    return 0.5 + 0.5 * max(-1.0, min(1.0, lead))
+
+
+def _select(node, keys, greedy_key, exploration, bias):
+    """Returns the key of the child to visit next, out of those possible now.
+
+    Uses UCB1, plus a progressive bias towards the playout policy's move that fades
+    as it is visited.  Searches are too short for UCB1 alone to find plays that are
+    obviously better than discards.
+    """
+    log = math.log
+    best_key = None
+    best_score = -math.inf
+    for key in keys:
+        child = node.children[key]
+        visits = child.visits
+        score = child.reward / visits + exploration * math.sqrt(
+            log(child.available) / visits
+        )
+        if key == greedy_key:
+            score += bias / (visits + 1)
+        if score > best_score:
+            best_key, best_score = key, score
+    return best_key
+
+
+def search(
+    hand,
+    player_id,
+    time_budget,
+    seed=None,
+    exploration=DEFAULT_EXPLORATION,
+    bias=DEFAULT_BIAS,
+    rollout_depth=DEFAULT_ROLLOUT_DEPTH,
+):  # pylint: disable=too-many-arguments,too-many-locals
+    """Searches for player_id's next move for time_budget seconds.
+
+    player_id decides either their turn, or whether to Coup Fourré if it is not their
+    turn.  At least one iteration is always run.  hand is not changed.
+    Returns {move key: (visits, total reward)} for player_id's possible moves.
+    """
+    deadline = time.perf_counter() + time_budget
+    rng = random.Random(seed)
+    root = _Node()
+    root_pending_id = None if player_id == hand.current_player_id else player_id
+    iterations = 0
+    while not iterations or time.perf_counter() < deadline:
+        iterations += 1
+        world = hand.determinize(player_id, rng)
+        pending_id = root_pending_id
+        node = root
+        path = []
+        while not world.is_completed:
+            decider_id, moves = next_decision(world, pending_id)
+            cards = world.get_cards(decider_id)
+            keyed = {}
+            for move in moves:
+                keyed.setdefault(move_key(cards, move), move)
+            greedy_key = move_key(cards, _greedy_move(cards, moves))
+            untried = []
+            for key in keyed:
+                child = node.children.get(key)
+                if child is None:
+                    untried.append(key)
+                else:
+                    child.available += 1
+            if untried:
+                key = greedy_key if greedy_key in untried else rng.choice(untried)
+                node.children[key] = child = _Node(decider_id)
+                child.available = 1
+            else:
+                key = _select(node, keyed, greedy_key, exploration, bias)
+                child = node.children[key]
+            pending_id = apply_move(world, decider_id, keyed[key])
+            path.append(child)
+            node = child
+            if untried:
+                break
+        _rollout(world, pending_id, rng, rollout_depth)
+        values = _values(world)
+        for node in path:
+            node.visits += 1
+            node.reward += _reward(values, node.player_id)
+    return {key: (child.visits, child.reward) for key, child in root.children.items()}
+
+
+class MCTSPlayer:
+    """A bot that picks moves by searching for a fixed time per decision.
+
+    It can be used as a policy for simulation.simulate() (with workers=0, as
+    simulate() already runs in several processes), or called directly by servers.
+
+    workers is the number of processes to search in (default: one per CPU).  0
+    searches in this process.  The processes are started by the first decision and
+    kept until close() is called, so use it as a context manager.
+    seed makes the bot's choices reproducible when workers is 0.
+    """
+
+    def __init__(
+        self,
+        time_budget=DEFAULT_TIME_BUDGET,
+        workers=None,
+        exploration=DEFAULT_EXPLORATION,
+        bias=DEFAULT_BIAS,
+        rollout_depth=DEFAULT_ROLLOUT_DEPTH,
+        seed=None,
+    ):  # pylint: disable=too-many-arguments
+        self.time_budget = time_budget
+        self.workers = os.cpu_count() if workers is None else workers
+        self.exploration = exploration
+        self.bias = bias
+        self.rollout_depth = rollout_depth
+        self._rng = random.Random(seed)
+        self._executor = None
+
+    # Internal Attributes
+
+    def __getstate__(self):
+        # The worker processes cannot be pickled, and are started again if needed.
+        state = self.__dict__.copy()
+        state["_executor"] = None
+        return state
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+    def _search(self, hand, player_id):
+        """Runs the searches and returns the total visits of each move key."""
+        args = (self.exploration, self.bias, self.rollout_depth)
+        time_budget = max(0.0, self.time_budget - _TIME_MARGIN)
+        if not self.workers:
+            seed = self._rng.getrandbits(64)
+            results = [search(hand, player_id, time_budget, seed, *args)]
+        else:
+            if self._executor is None:
+                self._executor = concurrent.futures.ProcessPoolExecutor(self.workers)
+            futures = [
+                self._executor.submit(
+                    search,
+                    hand,
+                    player_id,
+                    time_budget,
+                    self._rng.getrandbits(64),
+                    *args,
+                )
+                for _ in range(self.workers)
+            ]
+            results = [future.result() for future in futures]
+        visits = {}
+        for result in results:
+            for key, (count, _) in result.items():
+                visits[key] = visits.get(key, 0) + count
+        return visits
+
+    # Public Attributes
+
+    def __call__(self, game, player_id, moves):
+        """The policy interface.  See simulation and choose()."""
+        return self.choose(game.clone_hand(), player_id, moves)
+
+    def choose(self, hand, player_id, moves):
+        """Returns the best of moves, or None to decline a Coup Fourré.
+
+        moves are player_id's legal moves, as returned by Hand.legal_moves().  If it
+        is not player_id's turn, only a Coup Fourré is considered.
+        hand can be shared, as it is not changed.  See Game.clone_hand().
+        """
+        is_turn = player_id == hand.current_player_id
+        if not is_turn and Move(Actions.COUP_FOURRE) not in moves:
+            return None
+        if is_turn and len(moves) == 1:
+            return moves[0]
+        visits = self._search(hand, player_id)
+        best_key = max(visits, key=visits.__getitem__)
+        cards = hand.get_cards(player_id)
+        for move in moves:
+            if move_key(cards, move) == best_key:
+                return move
+        return None
+
+    def close(self):
+        """Stops any worker processes."""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
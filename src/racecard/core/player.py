@@ -19,14 +19,121 @@
 
 
 import dataclasses
+import functools
+import itertools
+import typing
 
-from . import common, config, deck, exceptions
+from . import common, deck, exceptions, ruleset
+from .exceptions import Reasons
 
 _States = common.Enum(  # pylint: disable=invalid-name
     "_States", "STOPPED ROLLING BROKEN COMPLETED"
 )
 
+# Bit of the Right of Way card in the safeties mask.  See _transition().
+_RIGHT_OF_WAY_BIT = 1 << deck.RIGHT_OF_WAY
 
+# Transition Table
+
+# NOTE: Every rule about the player's state, apart from winning, is looked up in a
+#       table made once from _transition() below, rather than worked out on each play.
+#       The table is indexed by the player's situation (see Player._update_situation())
+#       plus the move, which is a card kind to play or recieve, or _COUP_FOURRE plus a
+#       safety.
+
+_STATES = tuple(_States)
+# Only hazards on top of the battle pile matter, so any other top card, or none, is
+# kept as None.
+_BATTLE_HAZARDS = (None, deck.STOP, deck.OUT_OF_GAS, deck.FLAT_TIRE, deck.ACCIDENT)
+_BATTLE_HAZARD_INDEXES = tuple(
+    _BATTLE_HAZARDS.index(card) if card in _BATTLE_HAZARDS else 0
+    for card in range(deck.NUM_KINDS)
+)
+_NUM_MASKS = 1 << (deck.RIGHT_OF_WAY + 1)  # Every set of safeties.
+_COUP_FOURRE = deck.NUM_KINDS
+_NUM_MOVES = _COUP_FOURRE + deck.RIGHT_OF_WAY + 1
+
+
+def _transition(
+    state, hazard, limited, mask, move, speed_limit_limit
+):  # pylint: disable=too-many-arguments,too-many-return-statements
+    """Returns (reason, next state, next limited) for a move in the given situation.
+
+    hazard is the top battle pile card if it is a hazard, or else None.  limited is True
+    if a Speed Limit is in place and mask has bit (1 << card) set for each safety
+    played.  The reason only covers the player's state.  Whether the card is in the
+    hand, and the distance totals, are checked by the Player.
+    """
+    if state == _States.COMPLETED:
+        return Reasons.HAND_COMPLETED, state, limited
+    right_of_way = bool(mask & _RIGHT_OF_WAY_BIT)
+    recovered = _States.ROLLING if right_of_way else _States.STOPPED
+    if move >= _COUP_FOURRE:
+        safety = move - _COUP_FOURRE
+        if hazard is not None and safety == deck.PREVENTED_BY[hazard]:
+            state = _States.ROLLING
+        return Reasons.OK, state, limited and safety != deck.RIGHT_OF_WAY
+    category = deck.CATEGORY[move]
+    if category == deck.SAFETY:
+        if state == _States.STOPPED and move == deck.RIGHT_OF_WAY:
+            state = _States.ROLLING
+        elif (
+            state == _States.BROKEN
+            and hazard is not None
+            and move == deck.PREVENTED_BY[hazard]
+        ):
+            # The safety is played before the player recovers.
+            state = _States.ROLLING if move == deck.RIGHT_OF_WAY else recovered
+        return Reasons.OK, state, limited and move != deck.RIGHT_OF_WAY
+    if category == deck.REMEDY:
+        if state == _States.STOPPED and move == deck.ROLL:
+            return Reasons.OK, _States.ROLLING, limited
+        if deck.CATEGORIES[move] & deck.BATTLE:
+            if state != _States.BROKEN or hazard is None:
+                return Reasons.INVALID_PLAY, state, limited
+            if move != deck.REMEDIED_BY[hazard]:
+                return Reasons.INVALID_PLAY, state, limited
+            return Reasons.OK, recovered, limited
+        if not limited:  # Speed card
+            return Reasons.INVALID_PLAY, state, limited
+        return Reasons.OK, state, False
+    if category == deck.HAZARD:  # Recieved from an opponent.
+        if mask & (1 << deck.PREVENTED_BY[move]):
+            return Reasons.INVALID_PLAY, state, limited
+        if deck.CATEGORIES[move] & deck.BATTLE:
+            if state != _States.ROLLING:
+                return Reasons.INVALID_PLAY, state, limited
+            if move == deck.STOP:
+                return Reasons.OK, _States.STOPPED, limited
+            return Reasons.OK, _States.BROKEN, limited
+        if limited:  # Must be a Speed Limit then.
+            return Reasons.INVALID_PLAY, state, limited
+        return Reasons.OK, state, True
+    if state != _States.ROLLING:  # Distance card
+        return Reasons.INVALID_PLAY, state, limited
+    if limited and deck.VALUES[move] > speed_limit_limit:
+        return Reasons.INVALID_PLAY, state, limited
+    return Reasons.OK, state, limited
+
+
+@functools.lru_cache(maxsize=None)
+def _make_transitions(speed_limit_limit):
+    """Returns the transition table for the given rules, as a tuple.
+
+    Each entry is a (reason, next state, next limited) from _transition().  Equal
+    entries are shared.
+    """
+    entries = {}
+    table = []
+    for situation in itertools.product(
+        _STATES, _BATTLE_HAZARDS, (False, True), range(_NUM_MASKS), range(_NUM_MOVES)
+    ):
+        entry = _transition(*situation, speed_limit_limit)
+        table.append(entries.setdefault(entry, entry))
+    return tuple(table)
+
+
+@common.slotted
 @dataclasses.dataclass
 class ScoreCard:
     """A player's score card once the hand is completed."""
@@ -43,9 +150,14 @@ class ScoreCard:
     total: int = 0
 
 
-@dataclasses.dataclass
+@common.slotted
+@dataclasses.dataclass(frozen=True)
 class _PlayerState:
-    """The state data for a player, including all cards and their positions."""
+    """The state data for a player, including all cards and their positions.
+
+    It is frozen because Player.get_state() hands out the same instance until the
+    player changes again.
+    """
 
     state: str
     winner: bool
@@ -60,58 +172,84 @@ class _PlayerState:
     distance_pile: tuple = dataclasses.field(default_factory=tuple)
 
 
-class Player:
+class PileSummary(typing.NamedTuple):
+    """Totals of a player's piles, kept up to date as cards are played.
+
+    Much cheaper than get_state(), i.e. for bots.  See Player.summary.
+    """
+
+    distance_total: int
+    d200_count: int
+    safeties_mask: int  # Has bit (1 << card) set for each safety played.
+    coups_fourres: int
+
+
+class Player:  # pylint: disable=too-many-instance-attributes
     """Represents a player and all their state."""
 
-    def __init__(self):
+    __slots__ = (
+        "_state",
+        "_hand",
+        "_safeties_pile",
+        "_battle_pile",
+        "_speed_pile",
+        "_distance_pile",
+        "_distance_total",
+        "_d200_count",
+        "_safeties_mask",
+        "_is_limited",
+        "_coup_fourre_count",
+        "_last_hazzard_played",
+        "_score_card",
+        "_winner",
+        "_should_sort_hand",
+        "_version",
+        "_cached_state",
+        "_cached_version",
+        "_cached_public_state",
+        "_rules",
+        "_transitions",
+        "_situation",
+    )
+
+    def __init__(self, rules=None):
+        """rules is the ruleset.RuleSet to play by.  Defaults to the standard rules."""
         self._state = _States.STOPPED
-        self._hand = []
-        self._safeties_pile = []
-        self._battle_pile = []
-        self._speed_pile = []
-        self._distance_pile = []
+        # NOTE: All hands and piles are bytearrays of deck card kinds.
+        self._hand = bytearray()
+        self._safeties_pile = bytearray()
+        self._battle_pile = bytearray()
+        self._speed_pile = bytearray()
+        self._distance_pile = bytearray()
+        # NOTE: The following aggregates are kept up to date as cards are played so
+        #       that rule checks never need to scan the piles.
+        self._distance_total = 0  # Total value of all distance cards played so far.
+        self._d200_count = 0
+        self._safeties_mask = 0  # Has bit (1 << card) set for each safety played.
+        self._is_limited = False  # True if a Speed Limit is in place.
         self._coup_fourre_count = 0
         self._last_hazzard_played = None
         self._score_card = None
         self._winner = False
         self._should_sort_hand = False
+        # NOTE: _version is bumped by every action that changes the player, so
+        #       get_state() can reuse the last snapshot while it is unchanged.
+        self._version = 0
+        self._cached_state = None
+        self._cached_version = -1
+        self._cached_public_state = None  # (state, public state) or None.
+        self._rules = ruleset.DEFAULT if rules is None else rules
+        self._transitions = _make_transitions(self._rules.speed_limit_limit)
+        self._situation = 0  # Index of the player's row in _transitions.
+        self._update_situation()
 
     # Internal Attributes
 
     @staticmethod
-    def _check_type(card, type_):
-        """Raises exception of the card is not of the specificed type."""
-        if not card.is_a(type_):
-            raise exceptions.InvalidCardError()
-
-    @staticmethod
-    def _find_card(pile, type_):
+    def _find_card(pile, card):
         """Returns the index of the first matching card or None if no card found."""
-        for index, card in enumerate(pile):
-            if card.is_a(type_):
-                return index
-        return None
-
-    @property
-    def _distance_total(self):
-        """Returns the total value of all the distance cards played so far."""
-        return sum([card.value for card in self._distance_pile])
-
-    @property
-    def _is_limited(self):
-        """Returns True if a Speed Limit is in place."""
-        if (
-            not self._has_right_of_way
-            and self._speed_pile
-            and self._speed_pile[-1].is_a(deck.SpeedLimitCard)
-        ):
-            return True
-        return False
-
-    @property
-    def _has_right_of_way(self):
-        """Returns True if deck.RightOfWay is in the safeties pile."""
-        return self._has_card(self._safeties_pile, deck.RightOfWayCard)
+        index = pile.find(card)
+        return index if index >= 0 else None
 
     def _ensure_not_completed(self):
         """Raises exception if hand is already completed."""
@@ -128,15 +266,54 @@ class Player:
         except IndexError:
             raise exceptions.InvalidCardIndexError()
 
-    def _has_card(self, pile, type_):
-        """Returns True if the pile contains a matching card."""
-        return self._find_card(pile, type_) is not None
-
     @staticmethod
     def _move_card(src_pile, dest_pile, card_index):
         """Moves a card from one pile to another."""
         dest_pile.append(src_pile.pop(card_index))
 
+    def _update_situation(self):
+        """Finds the player's row in _transitions.
+
+        This must be called whenever the state, speed limit, safeties or top battle card
+        change.
+        """
+        pile = self._battle_pile
+        hazard = _BATTLE_HAZARD_INDEXES[pile[-1]] if pile else 0
+        situation = _STATES.index(self._state) * len(_BATTLE_HAZARDS) + hazard
+        situation = (situation * 2 + self._is_limited) * _NUM_MASKS
+        self._situation = (situation + self._safeties_mask) * _NUM_MOVES
+
+    def _check_move(self, move):
+        """Returns the reason the move cannot be made, or OK.  See _transition()."""
+        return self._transitions[self._situation + move][0]
+
+    def _make_move(self, move):
+        """Changes the state and speed limit as the move does.  See _transition().
+
+        Call _update_situation() once the piles are changed too.
+        """
+        _, self._state, self._is_limited = self._transitions[self._situation + move]
+
+    def _add_safety(self, card_index):
+        """Moves a safety card from the hand to the safeties pile."""
+        card = self._hand.pop(card_index)
+        self._safeties_pile.append(card)
+        self._safeties_mask |= 1 << card
+
+    def _insert_card(self, card):
+        """Inserts a card into the already sorted hand, keeping it sorted.
+
+        Returns the index the card was inserted at.
+        """
+        weights = self._rules.weights
+        weight = weights[card]
+        for index, held in enumerate(self._hand):
+            if weights[held] < weight:
+                self._hand.insert(index, card)
+                return index
+        self._hand.append(card)
+        return len(self._hand) - 1
+
     def _clear_last_hazard(self):
         """Clear the last hazard played to prevent erroneous Coup Fourrés.
 
@@ -145,15 +322,50 @@ class Player:
         self._last_hazzard_played = None
 
     def _sort_hand(self):
+        """Sorts the whole hand by card weight, if sorting is turned on.
+
+        Only needed when sorting is turned on.  After that the hand is kept sorted by
+        _insert_card().
+        """
         if self._should_sort_hand:
-            self._hand.sort(reverse=True, key=lambda card: card.weight)
+            self._hand[:] = sorted(
+                self._hand, reverse=True, key=self._rules.weights.__getitem__
+            )
+
+    def _check_remedy_card(self, card):
+        """Returns the reason the given remedy card kind cannot be played, or OK."""
+        if not deck.CATEGORIES[card] & deck.REMEDY:
+            return Reasons.INVALID_CARD
+        return self._check_move(card)
+
+    def _check_distance_card(self, card, win_score):
+        """Returns the reason the given distance card kind cannot be played, or OK."""
+        if not deck.CATEGORIES[card] & deck.DISTANCE:
+            return Reasons.INVALID_CARD
+        reason = self._check_move(card)
+        if reason is not Reasons.OK:
+            return reason
+        if self._distance_total + deck.VALUES[card] > win_score:
+            return Reasons.INVALID_PLAY
+        if card == deck.D200 and self._d200_count >= 2:
+            return Reasons.INVALID_PLAY
+        return Reasons.OK
+
+    def _check_category(self, card_index, category):
+        """Returns the reason the indexed card is unplayable as category, or OK."""
+        reason = self.check_card_index(card_index)
+        if reason is not Reasons.OK:
+            return reason
+        if not deck.CATEGORIES[self._hand[card_index]] & category:
+            return Reasons.INVALID_CARD
+        return Reasons.OK
 
     # Public Attributes
 
     @property
     def is_hand_full(self):
         """Returns True if the player's hand is full."""
-        return len(self._hand) >= config.MAX_CARDS_IN_HAND
+        return len(self._hand) >= self._rules.max_cards_in_hand
 
     @property
     def is_hand_empty(self):
@@ -163,11 +375,7 @@ class Player:
     @property
     def can_coup_fourre(self):
         """Return True if a Coup Fourré is possible."""
-        try:
-            self.coup_fourre(_test_only=True)
-            return True
-        except exceptions.CannotCoupFourreError:
-            return False
+        return self.check_coup_fourre() is Reasons.OK
 
     @property
     def is_winner(self):
@@ -179,54 +387,263 @@ class Player:
         """Returns True if no distance cards have been played."""
         return len(self._distance_pile) == 0
 
+    @property
+    def score_card(self):
+        """Returns the player's ScoreCard, or None if the hand is not completed."""
+        return self._score_card
+
+    @property
+    def last_hazard(self):
+        """Returns the hazard card kind just recieved, or None.
+
+        This is the hazard a Coup Fourré would be against.  It is cleared as soon as the
+        player does anything else.
+        """
+        return self._last_hazzard_played
+
+    @property
+    def summary(self):
+        """Returns a PileSummary of the player's piles."""
+        return PileSummary(
+            self._distance_total,
+            self._d200_count,
+            self._safeties_mask,
+            self._coup_fourre_count,
+        )
+
+    @property
+    def status(self):
+        """Returns (state, winner, sort_hand, coups_fourres), as in get_state()."""
+        return (
+            self._state,
+            self._winner,
+            self._should_sort_hand,
+            self._coup_fourre_count,
+        )
+
+    @property
+    def version(self):
+        """Returns a number that changes every time the player's state changes."""
+        return self._version
+
+    @property
+    def hand(self):
+        """Returns the deck card kinds in the player's hand, in hand order."""
+        return bytes(self._hand)
+
+    def get_piles(self):
+        """Returns the hand, safeties, battle, speed and distance piles as bytes."""
+        return (
+            bytes(self._hand),
+            bytes(self._safeties_pile),
+            bytes(self._battle_pile),
+            bytes(self._speed_pile),
+            bytes(self._distance_pile),
+        )
+
+    def get_position_key(self):
+        """Returns a hashable summary of everything that decides how the player goes on.
+
+        Players with equal keys can make the same plays and get the same scores from now
+        on.  The order of the cards in the hand is ignored.  Only the top two battle and
+        speed cards are kept, as a Coup Fourré can only uncover one of them.
+        """
+        return (
+            bytes(sorted(self._hand)),
+            self._state,
+            bytes(self._battle_pile[-2:]),
+            bytes(self._speed_pile[-2:]),
+            self._distance_total,
+            self._d200_count,
+            self._safeties_mask,
+            self._coup_fourre_count,
+            self._last_hazzard_played,
+            self._winner,
+        )
+
+    def resolve_card_index(self, card_index):
+        """Returns card_index counted from the start of the hand, i.e. -1 is the last card.
+
+        Indexes that are not in the hand are returned unchanged, for check_card_index()
+        to reject.
+        """
+        if -len(self._hand) <= card_index < 0:
+            return card_index + len(self._hand)
+        return card_index
+
+    def card(self, card_index):
+        """Returns the deck card kind at the given index."""
+        self._ensure_not_completed()
+        return self._get_card(card_index)
+
     def card_type(self, card_index):
-        """Returns the type of card at the given index.
+        """Returns the main deck category of the card at the given index.
 
-        e.g. HazardCard, DistanceCard, RemedyCard or SafetyCard.
+        e.g. deck.HAZARD, deck.DISTANCE, deck.REMEDY or deck.SAFETY.
         """
         self._ensure_not_completed()
-        card = self._get_card(card_index)
-        types = (deck.SafetyCard, deck.RemedyCard, deck.HazardCard, deck.DistanceCard)
-        return [type_ for type_ in types if card.is_a(type_)][0]
+        return deck.CATEGORY[self._get_card(card_index)]
+
+    def clone(self):
+        """Returns an independent copy of the player.
+
+        Only the piles are copied.  Everything else is immutable, and the score card and
+        cached state are never changed once set, so they are shared.
+        """
+        # NOTE: Assigning every slot directly is much faster than common.shallow_copy().
+        clone = Player.__new__(Player)
+        clone._state = self._state
+        clone._hand = self._hand[:]
+        clone._safeties_pile = self._safeties_pile[:]
+        clone._battle_pile = self._battle_pile[:]
+        clone._speed_pile = self._speed_pile[:]
+        clone._distance_pile = self._distance_pile[:]
+        clone._distance_total = self._distance_total
+        clone._d200_count = self._d200_count
+        clone._safeties_mask = self._safeties_mask
+        clone._is_limited = self._is_limited
+        clone._coup_fourre_count = self._coup_fourre_count
+        clone._last_hazzard_played = self._last_hazzard_played
+        clone._score_card = self._score_card
+        clone._winner = self._winner
+        clone._should_sort_hand = self._should_sort_hand
+        clone._version = self._version
+        clone._cached_state = self._cached_state
+        clone._cached_version = self._cached_version
+        clone._cached_public_state = self._cached_public_state
+        clone._transitions = self._transitions
+        clone._situation = self._situation
+        clone._rules = self._rules
+        return clone
+
+    # Rule Checks
+    # NOTE: These never raise exceptions or change anything.  They return Reasons.OK if
+    #       the matching action would succeed, or else the reason it would fail.
+
+    def check_card_index(self, card_index):
+        """Checks that the hand is not completed and card_index is in the hand."""
+        if self._state == _States.COMPLETED:
+            return Reasons.HAND_COMPLETED
+        if not -len(self._hand) <= card_index < len(self._hand):
+            return Reasons.INVALID_CARD_INDEX
+        return Reasons.OK
 
-    def recieve_card(self, card):
+    def check_recieve_card(self):
+        """Checks recieve_card()."""
+        if self._state == _States.COMPLETED:
+            return Reasons.HAND_COMPLETED
+        return Reasons.OK
+
+    def check_distance(self, card_index, win_score):
+        """Checks play_distance()."""
+        reason = self.check_card_index(card_index)
+        if reason is not Reasons.OK:
+            return reason
+        return self._check_distance_card(self._hand[card_index], win_score)
+
+    def check_safety(self, card_index):
+        """Checks play_safety()."""
+        return self._check_category(card_index, deck.SAFETY)
+
+    def check_hazard(self, card_index):
+        """Checks play_hazard()."""
+        return self._check_category(card_index, deck.HAZARD)
+
+    def check_recieve_hazard(self, card):
+        """Checks recieve_hazard().  card is a deck card kind."""
+        if self._state == _States.COMPLETED:
+            return Reasons.HAND_COMPLETED
+        if not deck.CATEGORIES[card] & deck.HAZARD:
+            return Reasons.INVALID_CARD
+        return self._check_move(card)
+
+    def check_coup_fourre(self):
+        """Checks coup_fourre()."""
+        if self._state == _States.COMPLETED:
+            return Reasons.HAND_COMPLETED
+        if self._last_hazzard_played is None:
+            return Reasons.CANNOT_COUP_FOURRE
+        if deck.PREVENTED_BY[self._last_hazzard_played] not in self._hand:
+            return Reasons.CANNOT_COUP_FOURRE
+        return Reasons.OK
+
+    def check_remedy(self, card_index):
+        """Checks play_remedy()."""
+        reason = self.check_card_index(card_index)
+        if reason is not Reasons.OK:
+            return reason
+        return self._check_remedy_card(self._hand[card_index])
+
+    def check_discard(self, card_index, force=False):
+        """Checks discard()."""
+        reason = self.check_card_index(card_index)
+        if reason is not Reasons.OK:
+            return reason
+        if not force and deck.CATEGORIES[self._hand[card_index]] & deck.SAFETY:
+            return Reasons.DISCARD_SAFETY
+        return Reasons.OK
+
+    def can_play(self, card, win_score):
+        """Returns True if the given card could be played on the player's own piles.
+
+        card is a deck card kind.  Hazards are played on opponents instead.  See
+        check_recieve_hazard().
+        """
+        if self._state == _States.COMPLETED:
+            return False
+        category = deck.CATEGORY[card]
+        if category == deck.SAFETY:
+            return True
+        if category == deck.REMEDY:
+            return self._check_remedy_card(card) is Reasons.OK
+        if category == deck.DISTANCE:
+            return self._check_distance_card(card, win_score) is Reasons.OK
+        return False
+
+    def can_recieve_hazard(self, card):
+        """Returns True if the given hazard card could be played on this player."""
+        return self.check_recieve_hazard(card) is Reasons.OK
+
+    # Actions
+    # NOTE: _trusted=True skips the rule checks, for callers that have already made
+    #       them.
+
+    def recieve_card(self, card, *, _trusted=False):
         """Recieve the given card into the player's hand.
 
-        card will be a deck.Card drawn from either the draw or discard pile, or a
-        returned hazard card if the hazard play was invalid.
+        card will be a deck card kind drawn from either the draw or discard pile.
 
-        If self.sort_card is True, then the hand is also sorted by card weight.
+        If self._should_sort_hand is True, then the card is inserted so that the hand
+        stays sorted by card weight.  Returns the index of the card in the hand.
         """
-        self._ensure_not_completed()
+        if not _trusted:
+            exceptions.raise_for(self.check_recieve_card())
+        self._version += 1
         self._clear_last_hazard()
+        if self._should_sort_hand:
+            return self._insert_card(card)
         self._hand.append(card)
+        return len(self._hand) - 1
 
-    def play_distance(self, card_index, win_score):
+    def play_distance(self, card_index, win_score, *, _trusted=False):
         """Play a distance card and return True if player won.
 
         card_index is the index number of the card in the player's hand.
         win_score is the score total required to win the hand.
         """
-        self._ensure_not_completed()
-        card = self._get_card(card_index)
-        self._check_type(card, deck.DistanceCard)
-        if self._state != _States.ROLLING:
-            raise exceptions.InvalidPlayError()
-        if self._is_limited and card.value > deck.SpeedLimitCard.max_speed:
-            raise exceptions.InvalidPlayError()
-        if self._distance_total + card.value > win_score:
-            raise exceptions.InvalidPlayError()
-        if (
-            card.is_a(deck.D200Card)
-            and len([c for c in self._distance_pile if c.is_a(deck.D200Card)]) >= 2
-        ):
-            raise exceptions.InvalidPlayError()
+        if not _trusted:
+            exceptions.raise_for(self.check_distance(card_index, win_score))
+        self._version += 1
+        card = self._hand[card_index]
         self._clear_last_hazard()
         self._move_card(self._hand, self._distance_pile, card_index)
-        self._sort_hand()
+        self._distance_total += deck.VALUES[card]
+        if card == deck.D200:
+            self._d200_count += 1
         if self._distance_total == win_score:
             self._state = _States.COMPLETED
             self._winner = True
+            self._update_situation()
             return True
         return False
 
@@ -235,138 +652,99 @@ class Player:
         if self._winner:
             self._state = _States.ROLLING
             self._winner = False
+            self._version += 1
+            self._update_situation()
 
-    def play_safety(self, card_index):
+    def play_safety(self, card_index, *, _trusted=False):
         """Play a safety card."""
-        self._ensure_not_completed()
-        card = self._get_card(card_index)
-        self._check_type(card, deck.SafetyCard)
+        if not _trusted:
+            exceptions.raise_for(self.check_safety(card_index))
+        self._version += 1
         self._clear_last_hazard()
-        self._move_card(self._hand, self._safeties_pile, card_index)
-        if self._state == _States.STOPPED and card.is_a(deck.RightOfWayCard):
-            self._state = _States.ROLLING
-        elif self._state == _States.BROKEN and card.is_a(
-            self._battle_pile[-1].prevented_by
-        ):
-            self._state = _States.STOPPED
-            if self._has_right_of_way:
-                self._state = _States.ROLLING
-        self._sort_hand()
+        self._make_move(self._hand[card_index])
+        self._add_safety(card_index)
+        self._update_situation()
 
-    def play_hazard(self, card_index):
+    def play_hazard(self, card_index, *, _trusted=False):
         """Returns the requested hazard card so it can be played on an opponent.
 
         The card is removed from the hand.
         card_index is the index number of the card in the player's hand.
         """
-        self._ensure_not_completed()
-        card = self._get_card(card_index)
-        self._check_type(card, deck.HazardCard)
+        if not _trusted:
+            exceptions.raise_for(self.check_hazard(card_index))
+        self._version += 1
         self._clear_last_hazard()
-        self._hand.pop(card_index)
-        self._sort_hand()
-        return card
+        return self._hand.pop(card_index)
 
-    def recieve_hazard(self, card):
+    def recieve_hazard(self, card, *, _trusted=False):
         """Recieve a hazard card played by an opponent."""
-        self._ensure_not_completed()
-        self._check_type(card, deck.HazardCard)
-        if self._has_card(self._safeties_pile, card.prevented_by):
-            raise exceptions.InvalidPlayError()
-        if card.is_a(deck.BattleCard):
-            if self._state != _States.ROLLING:
-                raise exceptions.InvalidPlayError()
+        if not _trusted:
+            exceptions.raise_for(self.check_recieve_hazard(card))
+        self._version += 1
+        self._make_move(card)
+        if deck.CATEGORIES[card] & deck.BATTLE:
             self._battle_pile.append(card)
-            if card.is_a(deck.StopCard):
-                self._state = _States.STOPPED
-            else:
-                self._state = _States.BROKEN
         else:  # Must be a Speed Limit then.
-            if self._is_limited:
-                raise exceptions.InvalidPlayError()
             self._speed_pile.append(card)
         self._last_hazzard_played = card
+        self._update_situation()
 
-    def coup_fourre(self, *, _test_only=False):
+    def coup_fourre(self, *, _trusted=False):
         """Triggers a Coup Fourré if possible.
 
         Returns an iterable of cards to discard if Coup Fourré was successful.
         """
-        self._ensure_not_completed()
-        if self._last_hazzard_played is None:
-            raise exceptions.CannotCoupFourreError()
-        safety_index = self._find_card(
-            self._hand, self._last_hazzard_played.prevented_by,
-        )
-        if safety_index is None:
-            raise exceptions.CannotCoupFourreError()
-        if _test_only:
-            return []
-        safety = self._get_card(safety_index)
-        discards = []
+        if not _trusted:
+            exceptions.raise_for(self.check_coup_fourre())
+        self._version += 1
+        safety = deck.PREVENTED_BY[self._last_hazzard_played]
+        safety_index = self._find_card(self._hand, safety)
+        self._make_move(_COUP_FOURRE + safety)
+        discards = bytearray()
         if self._battle_pile:
-            top_battle_card = self._battle_pile[-1]
-            if top_battle_card.is_a(deck.HazardCard) and safety.is_a(
-                top_battle_card.prevented_by
-            ):
+            if safety == deck.PREVENTED_BY[self._battle_pile[-1]]:
                 self._move_card(self._battle_pile, discards, -1)
-                self._state = _States.ROLLING
         if self._speed_pile:
-            top_speed_card = self._speed_pile[-1]
-            if top_speed_card.is_a(deck.HazardCard) and safety.is_a(
-                top_speed_card.prevented_by
-            ):
+            if safety == deck.PREVENTED_BY[self._speed_pile[-1]]:
                 self._move_card(self._speed_pile, discards, -1)
-        self._move_card(self._hand, self._safeties_pile, safety_index)
+        self._add_safety(safety_index)
         self._clear_last_hazard()
         self._coup_fourre_count += 1
+        self._update_situation()
         return discards
 
-    def play_remedy(self, card_index):
+    def play_remedy(self, card_index, *, _trusted=False):
         """Play a remedy card."""
-        self._ensure_not_completed()
-        card = self._get_card(card_index)
-        self._check_type(card, deck.RemedyCard)
-        if self._state == _States.STOPPED and card.is_a(deck.RollCard):
+        if not _trusted:
+            exceptions.raise_for(self.check_remedy(card_index))
+        self._version += 1
+        card = self._hand[card_index]
+        self._make_move(card)
+        if deck.CATEGORIES[card] & deck.BATTLE:
             self._move_card(self._hand, self._battle_pile, card_index)
-            self._clear_last_hazard()
-            self._state = _States.ROLLING
-            self._sort_hand()
-            return
-        if card.is_a(deck.BattleCard):
-            if self._state != _States.BROKEN:
-                raise exceptions.InvalidPlayError()
-            if not card.is_a(self._battle_pile[-1].remedied_by):
-                raise exceptions.InvalidPlayError()
-            self._move_card(self._hand, self._battle_pile, card_index)
-            self._state = _States.STOPPED
-            if self._has_right_of_way:
-                self._state = _States.ROLLING
-        else:  # SpeedCard
-            if not self._is_limited:
-                raise exceptions.InvalidPlayError()
+        else:  # Speed card
             self._move_card(self._hand, self._speed_pile, card_index)
         self._clear_last_hazard()
-        self._sort_hand()
+        self._update_situation()
 
-    def discard(self, card_index, force=False):
+    def discard(self, card_index, force=False, *, _trusted=False):
         """Removed card from hand and returns it.
 
         Attempting to discard a Safety will raise DiscardSafetyWarning unless force is
         set to True.
         """
-        self._ensure_not_completed()
-        card = self._get_card(card_index)
-        if not force and card.is_a(deck.SafetyCard):
-            raise exceptions.DiscardSafetyWarning()
-        card = self._hand.pop(card_index)
-        self._sort_hand()
-        return card
+        if not _trusted:
+            exceptions.raise_for(self.check_discard(card_index, force))
+        self._version += 1
+        return self._hand.pop(card_index)
 
     def lost(self):
         """Sets the hand to completed when another player wins."""
         self._winner = False
         self._state = _States.COMPLETED
+        self._version += 1
+        self._update_situation()
 
     def calc_score(self, is_draw_pile_empty, is_extended, is_shutout):
         """Calculates the score card of the player if hand is completed."""
@@ -375,44 +753,77 @@ class Player:
         if self._score_card is not None:
             return
         # pylint: disable=attribute-defined-outside-init
+        rules = self._rules
         card = ScoreCard()
         card.distance = self._distance_total
-        safeties_count = len(self._safeties_pile)
-        card.safeties = config.SAFETY_SCORE * safeties_count
-        if safeties_count == config.TOTAL_SAFETIES:
-            card.all_safeties = config.ALL_SAFETIES_SCORE
-        card.coups_fourres = config.COUP_FOURRE_SCORE * self._coup_fourre_count
+        card.safeties, card.all_safeties = rules.safeties_scores[
+            len(self._safeties_pile)
+        ]
+        card.coups_fourres = rules.coup_fourre_score * self._coup_fourre_count
         if self._winner:
-            card.trip_completed = config.TRIP_COMPLETED_SCORE
+            card.trip_completed = rules.trip_completed_score
             if is_draw_pile_empty:
-                card.delayed_action = config.DELAYED_ACTION_SCORE
-            if not any([card.value == 200 for card in self._distance_pile]):
-                card.safe_trip = config.SAFE_TRIP_SCORE
+                card.delayed_action = rules.delayed_action_score
+            if not self._d200_count:
+                card.safe_trip = rules.safe_trip_score
             if is_shutout:
-                card.shut_out = config.SHUT_OUT_SCORE
+                card.shut_out = rules.shut_out_score
             if is_extended:
-                card.extension = config.EXTENSION_SCORE
+                card.extension = rules.extension_score
         card.total = sum(dataclasses.astuple(card))
         self._score_card = card
+        self._version += 1
 
     def get_state(self):
-        """Returns a representation of the player's state for display."""
+        """Returns a representation of the player's state for display.
+
+        The same frozen instance is returned until the player changes again.
+        """
+        if self._cached_version == self._version:
+            return self._cached_state
+        names = deck.NAMES.__getitem__
         state = _PlayerState(
             state=self._state,
             winner=self._winner,
             coups_fourres=self._coup_fourre_count,
             sort_hand=self._should_sort_hand,
             running_total=self._distance_total,
-            hand=tuple(card.name for card in self._hand),
+            hand=tuple(map(names, self._hand)),
             score_card=self._score_card,
+            safeties_pile=tuple(map(names, self._safeties_pile)),
+            battle_pile=tuple(map(names, self._battle_pile)),
+            speed_pile=tuple(map(names, self._speed_pile)),
+            distance_pile=tuple(map(names, self._distance_pile)),
         )
-        for name in ("safeties", "battle", "speed", "distance"):
-            pile = getattr(self, f"_{name}_pile")
-            setattr(state, f"{name}_pile", tuple(card.name for card in pile))
+        self._cached_state = state
+        self._cached_version = self._version
         return state
 
+    def get_public_state(self):
+        """Returns get_state() without the cards in the hand, as opponents see it.
+
+        Like get_state(), the same instance is returned until the player changes again.
+        """
+        state = self.get_state()
+        cached = self._cached_public_state
+        if cached is None or cached[0] is not state:
+            cached = (state, dataclasses.replace(state, hand=()))
+            self._cached_public_state = cached
+        return cached[1]
+
+    def replace_hand(self, cards):
+        """Replaces the cards in the player's hand, i.e. when dealing.
+
+        cards are deck card kinds.  Also used for guesses at hidden cards.  See
+        Hand.determinize().
+        """
+        self._version += 1
+        self._hand = bytearray(cards)
+        self._sort_hand()
+
     def toggle_sort(self):
         """Toggles whether or not the player's hand should always be sorted."""
         self._ensure_not_completed()
         self._should_sort_hand = not self._should_sort_hand
+        self._version += 1
         self._sort_hand()
@@ -0,0 +1,100 @@
+#    Race Card - An implementation of the card game Mille Bornes
+#    Copyright (C) 2020  Krys Lawrence <krys AT krys DOT ca>
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU Affero General Public License as published
+#    by the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU Affero General Public License for more details.
+#
+#    You should have received a copy of the GNU Affero General Public License
+#    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+"""Sets of rules, so that games of different variants can run side by side.
+
+Each Game has a RuleSet, shared with all its hands and players.  The defaults in config
+make up DEFAULT, the standard rules.  Make variants with dataclasses.replace(), i.e.:
+
+    short_game = dataclasses.replace(ruleset.DEFAULT, game_win_score=2500)
+
+Tables that depend on the rules, like the decks, are worked out once when the RuleSet
+is made, so the rules cost no more to look up than the config globals did.
+"""
+
+
+import dataclasses
+import typing
+
+from . import common, config, deck
+
+
+@common.slotted
+@dataclasses.dataclass(frozen=True)
+class RuleSet:  # pylint: disable=too-many-instance-attributes
+    """The rules of one variant of the game.  Immutable, so it can be shared."""
+
+    max_cards_in_hand: int = config.MAX_CARDS_IN_HAND  # Including the card drawn.
+    large_deck_players: int = config.LARGE_DECK_PLAYERS  # Fewest for the large deck.
+    max_players: int = config.MAX_PLAYERS
+    speed_limit_limit: int = config.SPEED_LIMIT_LIMIT  # Largest distance when limited.
+
+    small_win_score: int = config.SMALL_WIN_SCORE
+    large_win_score: int = config.LARGE_WIN_SCORE  # Also the win score once extended.
+    game_win_score: int = config.GAME_WIN_SCORE
+
+    safety_score: int = config.SAFETY_SCORE
+    all_safeties_score: int = config.ALL_SAFETIES_SCORE
+    coup_fourre_score: int = config.COUP_FOURRE_SCORE
+    trip_completed_score: int = config.TRIP_COMPLETED_SCORE
+    delayed_action_score: int = config.DELAYED_ACTION_SCORE
+    safe_trip_score: int = config.SAFE_TRIP_SCORE
+    shut_out_score: int = config.SHUT_OUT_SCORE
+    extension_score: int = config.EXTENSION_SCORE
+
+    # Sort weights, by card kind.  Sorted hands have the heaviest cards first.
+    weights: typing.Tuple[int, ...] = deck.WEIGHTS
+    # Unshuffled decks, as bytes of card kinds.
+    small_deck: bytes = dataclasses.field(
+        default=bytes(deck.make_unshuffled_deck(small=True)), repr=False
+    )
+    large_deck: bytes = dataclasses.field(
+        default=bytes(deck.make_unshuffled_deck(small=False)), repr=False
+    )
+
+    # Worked out from the above.
+    decks: typing.Tuple[bytes, bytes] = dataclasses.field(init=False, repr=False)
+    win_scores: typing.Tuple[int, int] = dataclasses.field(init=False, repr=False)
+    # The safeties and all safeties scores, by number of safeties played.
+    safeties_scores: typing.Tuple[typing.Tuple[int, int], ...] = dataclasses.field(
+        init=False, repr=False
+    )
+
+    def __post_init__(self):
+        # NOTE: The tables are indexed by the small deck flag, i.e. decks[small].
+        object.__setattr__(self, "decks", (self.large_deck, self.small_deck))
+        object.__setattr__(
+            self, "win_scores", (self.large_win_score, self.small_win_score)
+        )
+        object.__setattr__(
+            self,
+            "safeties_scores",
+            tuple(
+                (
+                    self.safety_score * count,
+                    self.all_safeties_score if count == config.TOTAL_SAFETIES else 0,
+                )
+                for count in range(config.TOTAL_SAFETIES + 1)
+            ),
+        )
+
+    def is_small_deck(self, num_players):
+        """Returns True if a hand with num_players players uses the small deck."""
+        return num_players < self.large_deck_players
+
+
+DEFAULT = RuleSet()
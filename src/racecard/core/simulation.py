@@ -0,0 +1,143 @@
+#    Race Card - An implementation of the card game Mille Bornes
+#    Copyright (C) 2020  Krys Lawrence <krys AT krys DOT ca>
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU Affero General Public License as published
+#    by the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU Affero General Public License for more details.
+#
+#    You should have received a copy of the GNU Affero General Public License
+#    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+"""Batch simulation of many complete games, spread over several processes.
+
+Used to tune house rules and bots by playing very large numbers of hands.  Each seat
+in a game is played by a policy, as described in the bots module, i.e.
+bots.heuristic_policy or random_policy below.  Policies run inside worker processes,
+so they must be module-level functions (or other picklable callables).  Policies
+that need randomness should use game.rng, so that every game plays out the same
+whichever process it runs in.
+"""
+
+
+import concurrent.futures
+import typing
+
+from . import bots, common, ruleset
+from . import game as game_
+from .hand import Actions
+
+DEFAULT_CHUNK_SIZE = 50
+
+
+class HandRecord(typing.NamedTuple):
+    """The compact result of one simulated hand.
+
+    Seats are indexes into the policies given to simulate().
+    """
+
+    game: int  # Index of the game in the batch.
+    hand: int  # Hand number within the game, starting at 1.
+    winner: int  # Seat of the hand winner, or -1 if there was none.
+    rounds: int
+    totals: typing.Tuple[int, ...]  # Hand score totals, by seat.
+    game_winner: int  # Seat of the game winner on its last hand, or else -1.
+
+
+def random_policy(game, player_id, moves):  # pylint: disable=unused-argument
+    """Picks any legal move at random, preferring plays to discards.
+
+    Never draws from the discard pile, which could otherwise go on forever.  Uses the
+    game's own generator, so games play out the same in any process.
+    """
+    plays = [move for move in moves if move.action is not Actions.DISCARD]
+    plays = [move for move in plays if move.action is not Actions.DRAW_DISCARD]
+    return game.rng.choice(plays or moves)
+
+
+def _game_seed(seed, game_index):
+    """Returns the seed for one game, so any game in a batch can be replayed alone."""
+    return f"{seed}:{game_index}"
+
+
+def play_game(game_index, policies, seed, rules=ruleset.DEFAULT):
+    """Plays one complete game and returns a list of HandRecords, one per hand.
+
+    rules is the ruleset.RuleSet to play by.
+    """
+    game = game_.Game(_game_seed(seed, game_index), rules=rules)
+    player_ids = [game.add_player() for _ in policies]
+    policies_by_id = dict(zip(player_ids, policies))
+    game.begin()
+    records = []
+    while True:
+        bots.autoplay(game, policies_by_id)
+        scores = game.get_hand_scores()
+        winner_id = game.hand_winner_id
+        records.append(
+            HandRecord(
+                game=game_index,
+                hand=game.hand_number,
+                winner=player_ids.index(winner_id) if winner_id is not None else -1,
+                rounds=game.round_number,
+                totals=tuple(scores[id_].total for id_ in player_ids),
+                game_winner=(
+                    player_ids.index(game.winner_id) if game.is_completed else -1
+                ),
+            )
+        )
+        if game.is_completed:
+            return records
+        game.next_hand()
+
+
+def _play_chunk(start, stop, policies, seed, rules):
+    """Plays games start to stop - 1 and returns all their HandRecords."""
+    records = []
+    for game_index in range(start, stop):
+        records.extend(play_game(game_index, policies, seed, rules))
+    return records
+
+
+def simulate(  # pylint: disable=too-many-arguments
+    num_games,
+    policies,
+    seed=None,
+    workers=None,
+    chunk_size=DEFAULT_CHUNK_SIZE,
+    rules=ruleset.DEFAULT,
+):
+    """Plays num_games complete games and yields a HandRecord for every hand.
+
+    policies has one policy per seat, so its length is the number of players.
+    seed makes the whole batch reproducible.  If it is None, a random one is used.
+    workers is the number of processes to use (default: one per CPU).  0 plays all
+    games in this process, which is useful for debugging policies.
+    Games are sent to workers in chunks of chunk_size, and records are yielded as
+    soon as each chunk completes, so they are not in game order.
+    rules is the ruleset.RuleSet every game is played by.  It is sent to the workers
+    with each chunk, so batches with different rules can run side by side.
+    """
+    if seed is None:
+        seed = common.make_seed()
+    chunks = [
+        (start, min(start + chunk_size, num_games))
+        for start in range(0, num_games, chunk_size)
+    ]
+    if workers == 0:
+        for start, stop in chunks:
+            yield from _play_chunk(start, stop, policies, seed, rules)
+        return
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            executor.submit(_play_chunk, start, stop, policies, seed, rules)
+            for start, stop in chunks
+        ]
+        for future in concurrent.futures.as_completed(futures):
+            yield from future.result()
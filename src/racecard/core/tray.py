@@ -24,20 +24,37 @@ from . import exceptions
 class Tray:
     """The tray contains all the cards in the draw and discard piles."""
 
+    __slots__ = ("_draw_pile", "_discard_pile")
+
     def __init__(self, deck):
-        # NOTE: The top of each of these piles is the last entry in the list.
-        #       Tail = top, head = bottom.
+        # NOTE: The top of each of these piles is the last entry in the bytearray.
+        #       Tail = top, head = bottom.  Entries are deck card kinds.
         self._draw_pile = deck
-        self._discard_pile = []
+        self._discard_pile = bytearray()
 
     @property
     def cards_remaining(self):
         """Returns the number of cards remaining in the draw pile."""
         return len(self._draw_pile)
 
+    @property
+    def cards_discarded(self):
+        """Returns the number of cards in the discard pile."""
+        return len(self._discard_pile)
+
+    @property
+    def draw_pile(self):
+        """Returns the card kinds in the draw pile as bytes, from bottom to top."""
+        return bytes(self._draw_pile)
+
+    @property
+    def discard_pile(self):
+        """Returns the card kinds in the discard pile as bytes, from bottom to top."""
+        return bytes(self._discard_pile)
+
     @property
     def top_discarded_card(self):
-        """Returns the top card on the discard pile or EmptyPileError is none exists.
+        """Returns the top card kind on the discard pile or EmptyPileError if none.
 
         Does not remove the card from the pile, it just peeks at it.
         """
@@ -46,9 +63,18 @@ class Tray:
         except IndexError:
             raise exceptions.EmptyPileError()
 
+    def clone(self):
+        """Returns an independent copy of the tray."""
+        clone = Tray.__new__(Tray)
+        clone._draw_pile = self._draw_pile[:]
+        clone._discard_pile = self._discard_pile[:]
+        return clone
+
     def draw(self, discard=False):
         """Draw one card from the top of either the draw or discard pile and return it.
 
+        The card is returned as its deck card kind.
+
         The card is removed from the pile, and the one under it becomes the new top
         card.
         """
@@ -58,8 +84,29 @@ class Tray:
         except IndexError:
             raise exceptions.EmptyPileError(draw=True)
 
+    def deal(self, count):
+        """Draws count cards from the draw pile at once and returns them.
+
+        The cards are returned as a bytearray of card kinds, in the order they would be
+        drawn one at a time.
+        """
+        if count > len(self._draw_pile):
+            raise exceptions.EmptyPileError(draw=True)
+        start = len(self._draw_pile) - count  # Not -count, which is 0 for no cards.
+        cards = self._draw_pile[start:]
+        del self._draw_pile[start:]
+        cards.reverse()
+        return cards
+
+    def replace_draw_pile(self, cards):
+        """Replaces the cards in the draw pile, i.e. with a guess at their order.
+
+        cards are deck card kinds, with the top card last.  See Hand.determinize().
+        """
+        self._draw_pile = bytearray(cards)
+
     def discard(self, card):
-        """Discard one card to the discard pile.
+        """Discard one card kind to the discard pile.
 
         The card is added to the top of the discard pile.
         """
@@ -24,6 +24,7 @@ import functools
 import typing
 import uuid
 
+from ....core import bots
 from ....core import exceptions as coreexceptions
 from ....core import game as coregame
 from ....core.game import GameStates
@@ -61,6 +62,8 @@ class Game(common.ModelBase):
         self._game = coregame.Game()
         # Map user ids to internal player ids.
         self._player_map: typing.Dict[common.ID, uuid.UUID] = {}
+        # Policies of players whose moves are made for them, by internal player id.
+        self._autoplay: typing.Dict[uuid.UUID, bots.Policy] = {}
         self.id = id  # pylint: disable=invalid-name
         self.owner = owner
         self.players = []
@@ -81,3 +84,26 @@ class Game(common.ModelBase):
         player_id = self._game.add_player()
         self.players.append(player)
         self._player_map[player.id] = player_id
+
+    def set_autoplay(
+        self,
+        player: user.User,
+        policy: typing.Optional[bots.Policy] = bots.heuristic_policy,
+    ):
+        """Has the given player's moves made for them by policy.  None stops it.
+
+        Moves are only made when autoplay() is called.
+        """
+        player_id = self._player_map[player.id]
+        if policy is None:
+            self._autoplay.pop(player_id, None)
+        else:
+            self._autoplay[player_id] = policy
+
+    @_raises_core_exceptions
+    def autoplay(self) -> int:
+        """Makes moves for autoplayed players until it is someone else's turn.
+
+        Returns the number of moves made.  See set_autoplay().
+        """
+        return bots.autoplay(self._game, self._autoplay)
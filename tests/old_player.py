@@ -0,0 +1,299 @@
+#    Race Card - An implementation of the card game Mille Bornes
+#    Copyright (C) 2020  Krys Lawrence <krys AT krys DOT ca>
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU Affero General Public License as published
+#    by the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU Affero General Public License for more details.
+#
+#    You should have received a copy of the GNU Affero General Public License
+#    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+"""The Player rules as they were before the transition table, for tests to check it by.
+
+The methods are copied unchanged from the original core.player.Player.  Only what the
+rule checks and state changes need is kept.
+"""
+
+from racecard.core import deck, exceptions, ruleset
+from racecard.core.exceptions import Reasons
+from racecard.core.player import _RIGHT_OF_WAY_BIT, _States
+
+
+class OldPlayer:  # pylint: disable=too-many-instance-attributes
+    """The rule checks and state changes of the original Player."""
+
+    __slots__ = (
+        "_state",
+        "_hand",
+        "_safeties_pile",
+        "_battle_pile",
+        "_speed_pile",
+        "_distance_pile",
+        "_distance_total",
+        "_d200_count",
+        "_safeties_mask",
+        "_is_limited",
+        "_coup_fourre_count",
+        "_last_hazzard_played",
+        "_winner",
+        "_version",
+        "_rules",
+    )
+
+    def __init__(self, rules=None):
+        """rules is the ruleset.RuleSet to play by.  Defaults to the standard rules."""
+        self._state = _States.STOPPED
+        # NOTE: All hands and piles are bytearrays of deck card kinds.
+        self._hand = bytearray()
+        self._safeties_pile = bytearray()
+        self._battle_pile = bytearray()
+        self._speed_pile = bytearray()
+        self._distance_pile = bytearray()
+        # NOTE: The following aggregates are kept up to date as cards are played so
+        #       that rule checks never need to scan the piles.
+        self._distance_total = 0  # Total value of all distance cards played so far.
+        self._d200_count = 0
+        self._safeties_mask = 0  # Has bit (1 << card) set for each safety played.
+        self._is_limited = False  # True if a Speed Limit is in place.
+        self._coup_fourre_count = 0
+        self._last_hazzard_played = None
+        self._winner = False
+        self._version = 0
+        self._rules = ruleset.DEFAULT if rules is None else rules
+
+    def clone(self):
+        """Returns an independent copy of the player."""
+        clone = OldPlayer.__new__(OldPlayer)
+        for name in OldPlayer.__slots__:
+            value = getattr(self, name)
+            setattr(clone, name, value[:] if isinstance(value, bytearray) else value)
+        return clone
+
+    @staticmethod
+    def _find_card(pile, card):
+        """Returns the index of the first matching card or None if no card found."""
+        index = pile.find(card)
+        return index if index >= 0 else None
+
+    @property
+    def _has_right_of_way(self):
+        """Returns True if deck.RIGHT_OF_WAY is in the safeties pile."""
+        return bool(self._safeties_mask & _RIGHT_OF_WAY_BIT)
+
+    def _has_safety(self, card):
+        """Returns True if the given safety card is in the safeties pile."""
+        return bool(self._safeties_mask & (1 << card))
+
+    @staticmethod
+    def _move_card(src_pile, dest_pile, card_index):
+        """Moves a card from one pile to another."""
+        dest_pile.append(src_pile.pop(card_index))
+
+    def _add_safety(self, card_index):
+        """Moves a safety card from the hand to the safeties pile."""
+        card = self._hand.pop(card_index)
+        self._safeties_pile.append(card)
+        self._safeties_mask |= 1 << card
+        if card == deck.RIGHT_OF_WAY:
+            self._is_limited = False
+
+    def _clear_last_hazard(self):
+        """Clear the last hazard played to prevent erroneous Coup Fourrés.
+
+        This must be called in on each play successful.
+        """
+        self._last_hazzard_played = None
+
+    def _check_remedy_card(self, card):
+        """Returns the reason the given remedy card kind cannot be played, or OK."""
+        if not deck.CATEGORIES[card] & deck.REMEDY:
+            return Reasons.INVALID_CARD
+        if self._state == _States.STOPPED and card == deck.ROLL:
+            return Reasons.OK
+        if deck.CATEGORIES[card] & deck.BATTLE:
+            if self._state != _States.BROKEN:
+                return Reasons.INVALID_PLAY
+            if card != deck.REMEDIED_BY[self._battle_pile[-1]]:
+                return Reasons.INVALID_PLAY
+        elif not self._is_limited:  # Speed card
+            return Reasons.INVALID_PLAY
+        return Reasons.OK
+
+    def _check_distance_card(self, card, win_score):
+        """Returns the reason the given distance card kind cannot be played, or OK."""
+        if not deck.CATEGORIES[card] & deck.DISTANCE:
+            return Reasons.INVALID_CARD
+        if self._state != _States.ROLLING:
+            return Reasons.INVALID_PLAY
+        value = deck.VALUES[card]
+        if self._is_limited and value > self._rules.speed_limit_limit:
+            return Reasons.INVALID_PLAY
+        if self._distance_total + value > win_score:
+            return Reasons.INVALID_PLAY
+        if card == deck.D200 and self._d200_count >= 2:
+            return Reasons.INVALID_PLAY
+        return Reasons.OK
+
+    def _check_category(self, card_index, category):
+        """Returns the reason the indexed card is unplayable as category, or OK."""
+        reason = self.check_card_index(card_index)
+        if reason is not Reasons.OK:
+            return reason
+        if not deck.CATEGORIES[self._hand[card_index]] & category:
+            return Reasons.INVALID_CARD
+        return Reasons.OK
+
+    def check_card_index(self, card_index):
+        """Checks that the hand is not completed and card_index is in the hand."""
+        if self._state == _States.COMPLETED:
+            return Reasons.HAND_COMPLETED
+        if not -len(self._hand) <= card_index < len(self._hand):
+            return Reasons.INVALID_CARD_INDEX
+        return Reasons.OK
+
+    def check_distance(self, card_index, win_score):
+        """Checks play_distance()."""
+        reason = self.check_card_index(card_index)
+        if reason is not Reasons.OK:
+            return reason
+        return self._check_distance_card(self._hand[card_index], win_score)
+
+    def check_safety(self, card_index):
+        """Checks play_safety()."""
+        return self._check_category(card_index, deck.SAFETY)
+
+    def check_recieve_hazard(self, card):
+        """Checks recieve_hazard().  card is a deck card kind."""
+        if self._state == _States.COMPLETED:
+            return Reasons.HAND_COMPLETED
+        if not deck.CATEGORIES[card] & deck.HAZARD:
+            return Reasons.INVALID_CARD
+        if self._has_safety(deck.PREVENTED_BY[card]):
+            return Reasons.INVALID_PLAY
+        if deck.CATEGORIES[card] & deck.BATTLE:
+            if self._state != _States.ROLLING:
+                return Reasons.INVALID_PLAY
+        elif self._is_limited:  # Must be a Speed Limit then.
+            return Reasons.INVALID_PLAY
+        return Reasons.OK
+
+    def check_coup_fourre(self):
+        """Checks coup_fourre()."""
+        if self._state == _States.COMPLETED:
+            return Reasons.HAND_COMPLETED
+        if self._last_hazzard_played is None:
+            return Reasons.CANNOT_COUP_FOURRE
+        if deck.PREVENTED_BY[self._last_hazzard_played] not in self._hand:
+            return Reasons.CANNOT_COUP_FOURRE
+        return Reasons.OK
+
+    def check_remedy(self, card_index):
+        """Checks play_remedy()."""
+        reason = self.check_card_index(card_index)
+        if reason is not Reasons.OK:
+            return reason
+        return self._check_remedy_card(self._hand[card_index])
+
+    def play_distance(self, card_index, win_score, *, _trusted=False):
+        """Play a distance card and return True if player won.
+
+        card_index is the index number of the card in the player's hand.
+        win_score is the score total required to win the hand.
+        """
+        if not _trusted:
+            exceptions.raise_for(self.check_distance(card_index, win_score))
+        self._version += 1
+        card = self._hand[card_index]
+        self._clear_last_hazard()
+        self._move_card(self._hand, self._distance_pile, card_index)
+        self._distance_total += deck.VALUES[card]
+        if card == deck.D200:
+            self._d200_count += 1
+        if self._distance_total == win_score:
+            self._state = _States.COMPLETED
+            self._winner = True
+            return True
+        return False
+
+    def play_safety(self, card_index, *, _trusted=False):
+        """Play a safety card."""
+        if not _trusted:
+            exceptions.raise_for(self.check_safety(card_index))
+        self._version += 1
+        card = self._hand[card_index]
+        self._clear_last_hazard()
+        self._add_safety(card_index)
+        if self._state == _States.STOPPED and card == deck.RIGHT_OF_WAY:
+            self._state = _States.ROLLING
+        elif (
+            self._state == _States.BROKEN
+            and card == deck.PREVENTED_BY[self._battle_pile[-1]]
+        ):
+            self._state = _States.STOPPED
+            if self._has_right_of_way:
+                self._state = _States.ROLLING
+
+    def recieve_hazard(self, card, *, _trusted=False):
+        """Recieve a hazard card played by an opponent."""
+        if not _trusted:
+            exceptions.raise_for(self.check_recieve_hazard(card))
+        self._version += 1
+        if deck.CATEGORIES[card] & deck.BATTLE:
+            self._battle_pile.append(card)
+            if card == deck.STOP:
+                self._state = _States.STOPPED
+            else:
+                self._state = _States.BROKEN
+        else:  # Must be a Speed Limit then.
+            self._speed_pile.append(card)
+            self._is_limited = True
+        self._last_hazzard_played = card
+
+    def coup_fourre(self, *, _trusted=False):
+        """Triggers a Coup Fourré if possible.
+
+        Returns an iterable of cards to discard if Coup Fourré was successful.
+        """
+        if not _trusted:
+            exceptions.raise_for(self.check_coup_fourre())
+        self._version += 1
+        safety = deck.PREVENTED_BY[self._last_hazzard_played]
+        safety_index = self._find_card(self._hand, safety)
+        discards = bytearray()
+        if self._battle_pile:
+            if safety == deck.PREVENTED_BY[self._battle_pile[-1]]:
+                self._move_card(self._battle_pile, discards, -1)
+                self._state = _States.ROLLING
+        if self._speed_pile:
+            if safety == deck.PREVENTED_BY[self._speed_pile[-1]]:
+                self._move_card(self._speed_pile, discards, -1)
+        self._add_safety(safety_index)
+        self._clear_last_hazard()
+        self._coup_fourre_count += 1
+        return discards
+
+    def play_remedy(self, card_index, *, _trusted=False):
+        """Play a remedy card."""
+        if not _trusted:
+            exceptions.raise_for(self.check_remedy(card_index))
+        self._version += 1
+        card = self._hand[card_index]
+        if self._state == _States.STOPPED and card == deck.ROLL:
+            self._move_card(self._hand, self._battle_pile, card_index)
+            self._state = _States.ROLLING
+        elif deck.CATEGORIES[card] & deck.BATTLE:
+            self._move_card(self._hand, self._battle_pile, card_index)
+            self._state = _States.STOPPED
+            if self._has_right_of_way:
+                self._state = _States.ROLLING
+        else:  # Speed card
+            self._move_card(self._hand, self._speed_pile, card_index)
+            self._is_limited = False
+        self._clear_last_hazard()
@@ -0,0 +1,50 @@
+#    Race Card - An implementation of the card game Mille Bornes
+#    Copyright (C) 2020  Krys Lawrence <krys AT krys DOT ca>
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU Affero General Public License as published
+#    by the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU Affero General Public License for more details.
+#
+#    You should have received a copy of the GNU Affero General Public License
+#    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+"""Tests for core.bots."""
+
+import pytest
+
+from racecard.core import bots, exceptions, game
+
+
+def _new_game(num_players=2):
+    """Returns a new, begun game and its player ids."""
+    game_ = game.Game("test")
+    player_ids = [game_.add_player() for _ in range(num_players)]
+    game_.begin()
+    return game_, player_ids
+
+
+def test_play_turn_rejects_declined_move():
+    """A policy that returns None on its own turn raises, and nothing is played."""
+    game_, _ = _new_game()
+    player_id = game_.current_player_id
+    action_log = list(game_.action_log)
+    policies = {player_id: lambda game_, player_id, moves: None}
+    with pytest.raises(exceptions.NoMoveError):
+        bots.play_turn(game_, policies)
+    assert game_.current_player_id == player_id
+    assert list(game_.action_log) == action_log
+
+
+def test_autoplay_completes_hand():
+    """The heuristic policy plays every seat through to the end of the hand."""
+    game_, player_ids = _new_game(4)
+    policies = dict.fromkeys(player_ids, bots.heuristic_policy)
+    assert bots.autoplay(game_, policies) > 0
+    assert game_.is_hand_completed
@@ -0,0 +1,75 @@
+#    Race Card - An implementation of the card game Mille Bornes
+#    Copyright (C) 2020  Krys Lawrence <krys AT krys DOT ca>
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU Affero General Public License as published
+#    by the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU Affero General Public License for more details.
+#
+#    You should have received a copy of the GNU Affero General Public License
+#    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+"""Tests for core.delta."""
+
+import dataclasses
+import random
+
+import pytest
+
+from racecard.core import delta, hand
+from racecard.core.hand import Actions, PlayResults
+
+
+def _new_mirror(hand_):
+    """Returns a Mirror of hand_, built from its snapshot."""
+    mirror = delta.Mirror(hand_.player_ids)
+    mirror.apply(delta.Delta.from_bytes(hand_.get_snapshot().to_bytes()))
+    return mirror
+
+
+def _assert_mirrors(hand_, mirror):
+    """Asserts that mirror is in the same state as hand_."""
+    for player_id in hand_.player_ids:
+        state = dataclasses.replace(hand_.get_player_state(player_id), score_card=None)
+        assert mirror.get_player_state(player_id) == state
+    assert mirror.current_player_id == hand_.current_player_id
+    assert mirror.round_number == hand_.round_number
+    assert mirror.cards_remaining == hand_.cards_remaining
+
+
+def _apply_deltas(hand_, mirror):
+    """Sends hand_'s new deltas through bytes to mirror."""
+    for delta_ in hand_.pop_deltas():
+        data = delta_.to_bytes()
+        assert delta.Delta.from_bytes(data) == delta_
+        mirror.apply(delta.Delta.from_bytes(data))
+
+
+@pytest.mark.parametrize("num_players", [2, 4, 6])
+def test_negative_card_indexes_round_trip(num_players):
+    """Plays and discards by negative card index are sent as bytes and mirrored."""
+    rng = random.Random(f"delta:{num_players}")
+    for _ in range(5):
+        hand_ = hand.Hand(list(range(num_players)), rng)
+        hand_.track_deltas()
+        mirror = _new_mirror(hand_)
+        pending_id = None
+        while not hand_.is_completed:
+            player_id, moves = hand.next_decision(hand_, pending_id)
+            move = rng.choice(moves)
+            if move is not None and move.action in (Actions.PLAY, Actions.DISCARD):
+                # Count the card from the end of the hand instead.
+                size = len(hand_.get_cards(player_id))
+                move = move._replace(card_index=move.card_index - size)
+            pending_id = None
+            result = hand.make_move(hand_, player_id, move) if move else None
+            if result is PlayResults.CAN_COUP_FOURRE:
+                pending_id = move.target_id
+            _apply_deltas(hand_, mirror)
+            _assert_mirrors(hand_, mirror)
@@ -0,0 +1,57 @@
+#    Race Card - An implementation of the card game Mille Bornes
+#    Copyright (C) 2020  Krys Lawrence <krys AT krys DOT ca>
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU Affero General Public License as published
+#    by the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU Affero General Public License for more details.
+#
+#    You should have received a copy of the GNU Affero General Public License
+#    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+"""Tests for core.events."""
+
+from racecard.core import events, game
+
+
+def test_game_events_follow_the_logged_action():
+    """Subscribers see each action logged, and the final scores, when called."""
+    game_ = game.Game("events")
+    for _ in range(2):
+        game_.add_player()
+    bus = events.EventBus()
+    seen = []
+
+    def on_event(event):
+        seen.append((type(event), len(list(game_.action_log)), game_.is_completed))
+        if isinstance(event, events.HandCompleted):
+            assert game_.get_game_totals() == {
+                id_: totals[id_] + card.total for id_, card in event.score_cards.items()
+            }
+        if isinstance(event, events.GameCompleted):
+            assert game_.get_game_totals() == event.game_totals
+
+    bus.subscribe(on_event)
+    game_.set_event_bus(bus)
+    game_.begin()
+    totals = game_.get_game_totals()
+    while not game_.is_completed:
+        if game_.is_hand_completed:
+            totals = game_.get_game_totals()
+            game_.next_hand()
+            continue
+        player_id = game_.current_player_id
+        actions = len(list(game_.action_log))
+        num_seen = len(seen)
+        game_.make_move(player_id, game_.legal_moves(player_id)[0])
+        # Every event of the move came after it was logged.
+        assert all(entry[1] == actions + 1 for entry in seen[num_seen:])
+    kinds = [entry[0] for entry in seen]
+    assert kinds[-2:] == [events.HandCompleted, events.GameCompleted]
+    assert seen[-1][2]
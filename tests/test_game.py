@@ -0,0 +1,106 @@
+#    Race Card - An implementation of the card game Mille Bornes
+#    Copyright (C) 2020  Krys Lawrence <krys AT krys DOT ca>
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU Affero General Public License as published
+#    by the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU Affero General Public License for more details.
+#
+#    You should have received a copy of the GNU Affero General Public License
+#    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+"""Tests for core.game."""
+
+import dataclasses
+
+import pytest
+
+from racecard.core import deck, exceptions, game
+from racecard.core.actionlog import Ops
+
+
+def _new_game(num_players=2, seed="test"):
+    """Returns a new, begun game and its player ids."""
+    game_ = game.Game(seed)
+    player_ids = [game_.add_player() for _ in range(num_players)]
+    game_.begin()
+    return game_, player_ids
+
+
+def test_negative_card_index_is_logged_from_start_of_hand():
+    """A discard of card -1 is logged, and replays, as the last card's index."""
+    game_, player_ids = _new_game()
+    player_id = game_.current_player_id
+    game_.draw(player_id)
+    cards = game_.get_cards(player_id)
+    game_.discard(player_id, -1, force=True)
+    assert game_.top_discarded_card == deck.NAMES[cards[-1]]
+    player_index = player_ids.index(player_id)
+    assert list(game_.action_log)[-1] == (
+        Ops.FORCED_DISCARD,
+        player_index,
+        len(cards) - 1,
+        None,
+    )
+    replayed = game.Game.replay(game_.action_log)
+    for id_ in player_ids:
+        assert replayed.get_cards(id_) == game_.get_cards(id_)
+
+
+def test_invalid_card_index_is_not_logged():
+    """An index that is not in the hand is rejected before anything changes."""
+    game_, _ = _new_game()
+    player_id = game_.current_player_id
+    game_.draw(player_id)
+    actions = list(game_.action_log)
+    with pytest.raises(exceptions.InvalidCardIndexError):
+        game_.discard(player_id, -99, force=True)
+    assert list(game_.action_log) == actions
+    assert game_.current_player_id == player_id
+
+
+def _completed_game(seed="test"):
+    """Returns a game played to completion by always making the first legal move."""
+    game_, _ = _new_game(seed=seed)
+    while not game_.is_completed:
+        if game_.is_hand_completed:
+            game_.next_hand()
+            continue
+        player_id = game_.current_player_id
+        game_.make_move(player_id, game_.legal_moves(player_id)[0])
+    return game_
+
+
+@pytest.mark.parametrize("seed", [1234, "test"])
+def test_replay_with_seed(seed):
+    """Games replay exactly from their logs, whether the seed is an int or a str."""
+    game_ = _completed_game(seed)
+    assert game_.action_log.seed == seed
+    replayed = game.Game.replay(game_.action_log)
+    assert replayed.is_completed
+    assert replayed.get_game_totals() == game_.get_game_totals()
+    assert list(replayed.action_log) == list(game_.action_log)
+
+
+def test_game_scores_are_copies():
+    """Changing the returned game score cards does not change the game."""
+    game_ = _completed_game()
+    expected = {
+        id_: dataclasses.asdict(score_card)
+        for id_, score_card in game_.get_game_scores().items()
+    }
+    totals = game_.get_game_totals()
+    for score_card in game_.get_game_scores().values():
+        score_card.total += 1000
+        score_card.distance = -1
+    assert game_.get_game_totals() == totals
+    assert {
+        id_: dataclasses.asdict(score_card)
+        for id_, score_card in game_.get_game_scores().items()
+    } == expected
@@ -0,0 +1,134 @@
+#    Race Card - An implementation of the card game Mille Bornes
+#    Copyright (C) 2020  Krys Lawrence <krys AT krys DOT ca>
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU Affero General Public License as published
+#    by the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU Affero General Public License for more details.
+#
+#    You should have received a copy of the GNU Affero General Public License
+#    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+"""Tests that core.lockstep plays exactly like core.hand."""
+
+# pylint: disable=protected-access
+
+import random
+
+import pytest
+
+from racecard.core import deck, hand, player
+from racecard.core.hand import Actions, Move, PlayResults
+
+np = pytest.importorskip("numpy")
+lockstep = pytest.importorskip("racecard.core.lockstep")
+
+NUM_HANDS = 100
+_STATES = {
+    player._States.STOPPED: lockstep.STOPPED,
+    player._States.ROLLING: lockstep.ROLLING,
+    player._States.BROKEN: lockstep.BROKEN,
+    player._States.COMPLETED: lockstep.COMPLETED,
+}
+
+
+def _to_move(engine, player_ids, action):
+    """Returns the hand.Move of a lockstep action."""
+    num_players = len(player_ids)
+    if action == lockstep.DRAW:
+        return Move(Actions.DRAW)
+    if action == lockstep.DRAW_DISCARD:
+        return Move(Actions.DRAW_DISCARD)
+    if action < engine.hazard_base:
+        return Move(Actions.PLAY, action - lockstep.PLAY)
+    if action < engine.discard_base:
+        offset = action - engine.hazard_base
+        return Move(
+            Actions.PLAY, offset // num_players, player_ids[offset % num_players]
+        )
+    if action < engine.extension:
+        return Move(Actions.DISCARD, action - engine.discard_base)
+    if action == engine.extension:
+        return Move(Actions.EXTENSION)
+    return Move(Actions.NO_EXTENSION)
+
+
+def _assert_same(engine, row, hand_, player_ids):
+    """Asserts that a row of the engine and a Hand are in the same state."""
+    assert hand_.is_completed == engine.completed[row]
+    tray = hand_._tray
+    draw_pile = engine.draw_pile[row, : engine.draw_len[row]]
+    assert bytes(tray._draw_pile) == draw_pile.tobytes()
+    discard_pile = engine.discard_pile[row, : engine.discard_len[row]]
+    assert bytes(tray._discard_pile) == discard_pile.tobytes()
+    assert hand_.round_number == engine.round_number[row]
+    if not hand_.is_completed:
+        assert hand_._turn_index == engine.turn[row]
+    for seat, player_id in enumerate(player_ids):
+        player_ = hand_._players[player_id]
+        cards = engine.hands[row, seat, : engine.hand_len[row, seat]]
+        assert player_.hand == cards.tobytes()
+        assert _STATES[player_.status[0]] == engine.states[row, seat]
+        assert player_._is_limited == engine.limited[row, seat]
+        assert player_.summary.safeties_mask == engine.safeties[row, seat]
+        assert player_.summary.distance_total == engine.distance[row, seat]
+        assert player_.status[3] == engine.coups_fourres[row, seat]
+        assert player_.is_winner == engine.winners[row, seat]
+        battle_pile = player_._battle_pile
+        top = battle_pile[-1] if battle_pile else lockstep.EMPTY
+        assert top == engine.battle_top[row, seat]
+        if hand_.is_completed:
+            assert player_.score_card.total == engine.scores[row, seat]
+
+
+@pytest.mark.parametrize("num_players", [2, 3, 4, 5, 6])
+def test_lockstep_matches_hand(num_players):
+    """Seeded hands play out the same, step by step, in both engines."""
+    rng = random.Random(f"lockstep:{num_players}")
+    small = num_players < 4
+    decks = [bytes(deck.make_deck(small, rng)) for _ in range(NUM_HANDS)]
+    player_ids = [f"p{seat}" for seat in range(num_players)]
+    hands = [hand.Hand(player_ids, cards=bytearray(cards)) for cards in decks]
+    engine = lockstep.LockstepHands(
+        np.frombuffer(b"".join(decks), np.uint8).reshape(NUM_HANDS, -1), num_players
+    )
+    np_rng = np.random.default_rng(num_players)
+    while True:
+        mask = engine.legal_mask()
+        for row, hand_ in enumerate(hands):
+            if hand_.is_completed:
+                assert not mask[row].any()
+                continue
+            moves = hand_.legal_moves(hand_.current_player_id)
+            moves = {move for move in moves if move.action is not Actions.COUP_FOURRE}
+            legal = np.flatnonzero(mask[row])
+            assert moves == {_to_move(engine, player_ids, action) for action in legal}
+        if not mask.any():
+            break
+        actions = lockstep.random_actions(mask, np_rng)
+        accept = np_rng.random(NUM_HANDS) < 0.7
+        expected = {}
+        for row, hand_ in enumerate(hands):
+            if actions[row] < 0:
+                continue
+            move = _to_move(engine, player_ids, actions[row])
+            result = hand.make_move(hand_, hand_.current_player_id, move)
+            if result is PlayResults.CAN_COUP_FOURRE and accept[row]:
+                hand_.coup_fourre(move.target_id)
+            expected[row] = result
+        results = engine.step(actions, accept)
+        for row, result in expected.items():
+            code = results[row]
+            got = None if code == lockstep.NO_RESULT else lockstep.RESULTS[code]
+            # Hand returns None for some actions that the engine reports as OK.
+            if result is not None or got not in (None, PlayResults.OK):
+                assert result is got
+        for row, hand_ in enumerate(hands):
+            _assert_same(engine, row, hand_, player_ids)
+    assert all(hand_.is_completed for hand_ in hands)
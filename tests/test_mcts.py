@@ -0,0 +1,53 @@
+#    Race Card - An implementation of the card game Mille Bornes
+#    Copyright (C) 2020  Krys Lawrence <krys AT krys DOT ca>
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU Affero General Public License as published
+#    by the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU Affero General Public License for more details.
+#
+#    You should have received a copy of the GNU Affero General Public License
+#    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+"""Tests for core.mcts."""
+
+# pylint: disable=protected-access
+
+import dataclasses
+import random
+
+from racecard.core import hand, mcts, ruleset
+
+RULES = dataclasses.replace(ruleset.DEFAULT, safety_score=7, coup_fourre_score=11)
+
+
+def test_values_use_hand_rules():
+    """Playout estimates score safeties and Coups Fourrés by the hand's rules."""
+    rng = random.Random("mcts")
+    checked = 0
+    while checked < 200:
+        hand_ = hand.Hand(["a", "b", "c"], rng, rules=RULES)
+        pending_id = None
+        while not hand_.is_completed:
+            values = mcts._values(hand_)
+            for id_ in hand_.player_ids:
+                state = hand_.get_player_state(id_)
+                assert values[id_] == (
+                    state.running_total
+                    + 7 * len(state.safeties_pile)
+                    + 11 * state.coups_fourres
+                )
+                checked += bool(state.safeties_pile)
+            player_id, moves = hand.next_decision(hand_, pending_id)
+            pending_id = hand.apply_move(hand_, player_id, rng.choice(moves))
+
+
+def test_greedy_move_without_moves():
+    """The playout policy returns None when there are no moves, like other policies."""
+    assert mcts._greedy_move(b"", []) is None
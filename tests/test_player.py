@@ -0,0 +1,206 @@
+#    Race Card - An implementation of the card game Mille Bornes
+#    Copyright (C) 2020  Krys Lawrence <krys AT krys DOT ca>
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU Affero General Public License as published
+#    by the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU Affero General Public License for more details.
+#
+#    You should have received a copy of the GNU Affero General Public License
+#    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+"""Tests for core.player."""
+
+# pylint: disable=protected-access
+
+import collections
+import dataclasses
+import functools
+import itertools
+import random
+
+import pytest
+
+from racecard.core import config, deck, hand, player, ruleset
+from racecard.core.exceptions import Reasons
+
+from . import old_player
+
+NUM_HANDS = 200
+
+
+def _random_hands(num_players):
+    """Yields every (hand, player) after each move of seeded random hands.
+
+    Every other player sorts their hand, so both hand orders are covered.
+    """
+    rng = random.Random(f"player:{num_players}")
+    for _ in range(NUM_HANDS // num_players):
+        player_ids = list(range(num_players))
+        hand_ = hand.Hand(player_ids, rng)
+        for player_id in player_ids[::2]:
+            hand_.toggle_sort(player_id)
+        pending_id = None
+        while not hand_.is_completed:
+            player_id, moves = hand.next_decision(hand_, pending_id)
+            pending_id = hand.apply_move(hand_, player_id, rng.choice(moves))
+            for player_ in hand_._players.values():
+                yield hand_, player_
+
+
+# The old object model worked these out from the piles whenever they were needed.
+
+
+def _old_distance_total(player_):
+    return sum(deck.VALUES[card] for card in player_._distance_pile)
+
+
+def _old_is_limited(player_):
+    return (
+        deck.RIGHT_OF_WAY not in player_._safeties_pile
+        and bool(player_._speed_pile)
+        and player_._speed_pile[-1] == deck.SPEED_LIMIT
+    )
+
+
+def _old_check_distance(player_, card, win_score):
+    """Returns Player.check_distance() for the card, as the old object model did."""
+    if player_.status[0].name != "ROLLING":
+        return Reasons.INVALID_PLAY
+    value = deck.VALUES[card]
+    if _old_is_limited(player_) and value > player_._rules.speed_limit_limit:
+        return Reasons.INVALID_PLAY
+    if _old_distance_total(player_) + value > win_score:
+        return Reasons.INVALID_PLAY
+    if card == deck.D200 and player_._distance_pile.count(deck.D200) >= 2:
+        return Reasons.INVALID_PLAY
+    return Reasons.OK
+
+
+@pytest.mark.parametrize("num_players", [2, 3, 4, 6])
+def test_aggregates_match_piles(num_players):
+    """The running aggregates always match what the old model worked out."""
+    for hand_, player_ in _random_hands(num_players):
+        summary = player_.summary
+        assert summary.distance_total == _old_distance_total(player_)
+        assert summary.d200_count == player_._distance_pile.count(deck.D200)
+        safeties_mask = sum(1 << card for card in player_._safeties_pile)
+        assert summary.safeties_mask == safeties_mask
+        assert player_._is_limited == _old_is_limited(player_)
+        if player_.status[2]:
+            weights = hand_.rules.weights
+            assert player_.hand == bytes(
+                sorted(player_.hand, reverse=True, key=weights.__getitem__)
+            )
+        for index, card in enumerate(player_.hand):
+            if deck.CATEGORY[card] == deck.DISTANCE:
+                expected = _old_check_distance(player_, card, hand_._win_score)
+                if player_.status[0].name == "COMPLETED":
+                    expected = Reasons.HAND_COMPLETED
+                assert player_.check_distance(index, hand_._win_score) is expected
+
+
+# The transition table is checked against the original methods, in every situation that
+# play can reach.
+
+_WIN_SCORE = 10 ** 6  # Never reached, as the table leaves totals to the Player.
+
+
+def _old_move(old, move):
+    """Returns the table entry for the move, worked out by an OldPlayer, and the player.
+
+    The move is made on a clone, which is returned if the move is allowed.
+    """
+    old = old.clone()
+    if move >= player._COUP_FOURRE:
+        old._hand = bytearray([move - player._COUP_FOURRE])
+        reason = old.check_coup_fourre()
+        make = old.coup_fourre
+    elif deck.CATEGORY[move] == deck.HAZARD:
+        reason = old.check_recieve_hazard(move)
+        make = functools.partial(old.recieve_hazard, move)
+    else:
+        old._hand = bytearray([move])
+        if deck.CATEGORY[move] == deck.SAFETY:
+            reason = old.check_safety(0)
+            make = functools.partial(old.play_safety, 0)
+        elif deck.CATEGORY[move] == deck.REMEDY:
+            reason = old.check_remedy(0)
+            make = functools.partial(old.play_remedy, 0)
+        else:
+            reason = old.check_distance(0, _WIN_SCORE)
+            make = functools.partial(old.play_distance, 0, _WIN_SCORE)
+    if reason is not Reasons.OK:
+        return (reason, old._state, old._is_limited), None
+    make()
+    return (reason, old._state, old._is_limited), old
+
+
+def _old_situation(old):
+    """Returns the (state, hazard, limited, mask) of an OldPlayer, as the table has."""
+    top = old._battle_pile[-1] if old._battle_pile else None
+    hazard = top if top in player._BATTLE_HAZARDS else None
+    return old._state, hazard, old._is_limited, old._safeties_mask
+
+
+def _reachable_cells(speed_limit_limit):
+    """Returns {(state, hazard, limited, mask, move): entry} for every reachable cell.
+
+    The entries are worked out by OldPlayers, starting from a new player and making
+    every allowed move.  Distance cards are played but never kept, so the totals never
+    get in the way.
+    """
+    rules = dataclasses.replace(ruleset.DEFAULT, speed_limit_limit=speed_limit_limit)
+    start = old_player.OldPlayer(rules)
+    seen = set()
+    queue = collections.deque([start])
+    cells = {}
+    while queue:
+        old = queue.popleft()
+        situation = _old_situation(old)
+        key = situation + (old._last_hazzard_played,)
+        if key in seen:
+            continue
+        seen.add(key)
+        moves = list(range(player._COUP_FOURRE))
+        if old._last_hazzard_played is not None:  # A Coup Fourré against it.
+            safety = deck.PREVENTED_BY[old._last_hazzard_played]
+            moves.append(player._COUP_FOURRE + safety)
+        for move in moves:
+            entry, after = _old_move(old, move)
+            assert cells.setdefault(situation + (move,), entry) == entry
+            if after is not None and after._distance_pile == old._distance_pile:
+                queue.append(after)
+        if old._last_hazzard_played is not None:
+            cleared = old.clone()
+            cleared._clear_last_hazard()  # As any other action does.
+            queue.append(cleared)
+        if old._state != player._States.COMPLETED:
+            completed = old.clone()
+            completed._state = player._States.COMPLETED  # As lost() or winning does.
+            queue.append(completed)
+    return cells
+
+
+@pytest.mark.parametrize("speed_limit_limit", [config.SPEED_LIMIT_LIMIT, 100])
+def test_transition_table_matches_old_rules(speed_limit_limit):
+    """Every reachable cell of the transition table is what the old methods did."""
+    situations = itertools.product(
+        player._STATES,
+        player._BATTLE_HAZARDS,
+        (False, True),
+        range(player._NUM_MASKS),
+        range(player._NUM_MOVES),
+    )
+    table = dict(zip(situations, player._make_transitions(speed_limit_limit)))
+    cells = _reachable_cells(speed_limit_limit)
+    states = {situation[0] for situation in cells}
+    assert states == set(player._STATES)
+    for cell, entry in cells.items():
+        assert table[cell] == entry, cell
@@ -0,0 +1,63 @@
+#    Race Card - An implementation of the card game Mille Bornes
+#    Copyright (C) 2020  Krys Lawrence <krys AT krys DOT ca>
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU Affero General Public License as published
+#    by the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU Affero General Public License for more details.
+#
+#    You should have received a copy of the GNU Affero General Public License
+#    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+"""Tests for core.simulation."""
+
+import dataclasses
+
+from racecard.core import bots, ruleset, simulation
+
+NUM_GAMES = 4
+POLICIES = (bots.heuristic_policy, bots.heuristic_policy)
+# The standard rules, but with no bonus for completing the trip.
+NO_TRIP_BONUS = dataclasses.replace(ruleset.DEFAULT, trip_completed_score=0)
+
+
+def _simulate(rules, workers=0):
+    """Starts a batch and returns its generator of HandRecords."""
+    return simulation.simulate(
+        NUM_GAMES, POLICIES, seed="test", workers=workers, chunk_size=2, rules=rules
+    )
+
+
+def _first_hands(records):
+    """Yields the HandRecord of the first hand of each game."""
+    return (record for record in records if record.hand == 1)
+
+
+def test_rules_change_scoring():
+    """Batches with different rules run side by side, each scored by its own rules.
+
+    Only the first hands are compared, as later ones differ once the game scores do.
+    """
+    default = _first_hands(_simulate(ruleset.DEFAULT))
+    variant = _first_hands(_simulate(NO_TRIP_BONUS))
+    num_compared = 0
+    for record, other in zip(default, variant):
+        assert (record.game, record.winner) == (other.game, other.winner)
+        for seat, total in enumerate(record.totals):
+            bonus = ruleset.DEFAULT.trip_completed_score if seat == record.winner else 0
+            assert total - other.totals[seat] == bonus
+        num_compared += 1
+    assert num_compared == NUM_GAMES
+
+
+def test_rules_are_sent_to_workers():
+    """Worker processes play by the given rules, just as this process does."""
+    in_workers = sorted(_first_hands(_simulate(NO_TRIP_BONUS, workers=1)))
+    assert in_workers == list(_first_hands(_simulate(NO_TRIP_BONUS)))
+    assert in_workers != list(_first_hands(_simulate(ruleset.DEFAULT)))
@@ -0,0 +1,48 @@
+#    Race Card - An implementation of the card game Mille Bornes
+#    Copyright (C) 2020  Krys Lawrence <krys AT krys DOT ca>
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU Affero General Public License as published
+#    by the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU Affero General Public License for more details.
+#
+#    You should have received a copy of the GNU Affero General Public License
+#    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+"""Tests for core.tray."""
+
+import dataclasses
+import random
+
+from racecard.core import deck, hand, ruleset, tray
+
+
+def test_deal_matches_draws():
+    """Dealt cards come off the top of the draw pile, as if drawn one at a time."""
+    dealt = tray.Tray(bytearray(range(deck.NUM_KINDS)))
+    drawn = dealt.clone()
+    cards = dealt.deal(5)
+    assert list(cards) == [drawn.draw() for _ in range(5)]
+    assert dealt.draw_pile == drawn.draw_pile
+
+
+def test_deal_no_cards():
+    """Dealing no cards leaves the draw pile alone."""
+    tray_ = tray.Tray(bytearray(range(deck.NUM_KINDS)))
+    assert tray_.deal(0) == bytearray()
+    assert tray_.cards_remaining == deck.NUM_KINDS
+
+
+def test_hand_with_one_card_limit_deals_nothing():
+    """With at most one card in hand, players start with none, as the draw adds one."""
+    rules = dataclasses.replace(ruleset.DEFAULT, max_cards_in_hand=1)
+    hand_ = hand.Hand(["a", "b"], random.Random(1), rules=rules)
+    assert hand_.cards_remaining == len(rules.decks[rules.is_small_deck(2)])
+    for player_ in hand_._players.values():  # pylint: disable=protected-access
+        assert player_.is_hand_empty